@@ -0,0 +1,82 @@
+"""Operator-only endpoints, enabled by setting ADMIN_TOKEN."""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import threading
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from .config import settings
+from .profiler import MAX_SECONDS, ProfilerBusyError, format_collapsed, sample_stacks
+from .services.scoring import model_registry
+from .slow_requests import slow_requests
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+admin_router = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+debug_router = APIRouter(
+    prefix="/debug",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+
+@admin_router.get("/model")
+async def model_status():
+    active = await model_registry.ensure_loaded()
+    return {"version": active.version, "path": str(active.path)}
+
+
+@admin_router.post("/model/reload", status_code=202)
+async def reload_model():
+    """Load the newest artifact in the background; the current model keeps serving."""
+    model_registry.reload_in_background()
+    active_version = model_registry.version if model_registry.loaded else None
+    return {"status": "reloading", "active_version": active_version}
+
+
+@debug_router.get("/slow")
+async def slowest_requests():
+    """The slowest recent requests, slowest first, with their stage breakdown."""
+    return {
+        "threshold_ms": slow_requests.threshold_ms,
+        "window_seconds": slow_requests.window_seconds,
+        "requests": slow_requests.snapshot(),
+    }
+
+
+@debug_router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=5.0, gt=0, le=MAX_SECONDS),
+    interval_ms: float = Query(default=10.0, ge=1, le=1000),
+    all_threads: bool = False,
+):
+    """Sample this worker's stacks and return them in collapsed (flamegraph) format.
+
+    By default only the event-loop thread is sampled. The sampler runs on a
+    worker thread, so the loop keeps serving traffic while it is profiled.
+    """
+    thread_ids = None if all_threads else {threading.get_ident()}
+    try:
+        stacks, samples = await asyncio.to_thread(
+            sample_stacks, seconds, interval_ms / 1000, thread_ids
+        )
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={"X-Profile-Samples": str(samples)},
+    )
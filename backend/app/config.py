@@ -1,24 +1,99 @@
 from typing import Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     google_maps_api_key: str
+    google_maps_base_url: str = "https://maps.googleapis.com"
+    open_meteo_base_url: str = "https://api.open-meteo.com"
     frontend_origins: str = "http://localhost:5173"
     log_format: Literal["plain", "json"] = "plain"
     route_weather_rate_limit: str = "30/minute"
     sentry_dsn_backend: str | None = None
     sentry_environment: str = "development"
     sentry_release: str | None = None
-    cache_backend: Literal["memory", "redis"] = "memory"
+    cache_backend: Literal["memory", "redis", "sqlite"] = "memory"
     redis_url: str | None = None
+    cache_sqlite_path: str = "data/route_cache.sqlite3"
+    cache_sqlite_max_entries: int = 100_000
+    cache_compaction_interval_seconds: float = 300.0
+    cache_local_entries: int = 100
+    cache_local_ttl_seconds: int = 60
+    web_concurrency: int = 1
+    cache_peers: str = ""
+    cache_self_url: str | None = None
+    cache_peer_secret: str | None = None
+    cache_peer_timeout_seconds: float = 10.0
+    cache_peer_hot_entries: int = 50
+    advisory_location_mode: Literal["inline", "deferred"] = "inline"
+    advisory_token_secret: str | None = None
+    inference_batch_window_ms: float = 0.0
+    inference_batch_max_rows: int = 256
+    model_dir: str | None = None
+    model_watch_interval_seconds: float = 0.0
+    admin_token: str | None = None
+    upstream_http2: bool = True
+    upstream_dns_cache_ttl_seconds: float = 300.0
+    retry_budget_capacity: float = 20.0
+    retry_budget_refill_per_second: float = 2.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 10.0
+    hedge_weather_requests: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    hedge_budget_ratio: float = 0.05
+    request_deadline_seconds: float = 10.0
+    slow_request_capacity: int = 20
+    slow_request_threshold_ms: float = 1000.0
+    slow_request_window_seconds: float = 900.0
+    loop_monitor_interval_ms: float = 100.0
+    loop_block_threshold_ms: float = 250.0
+    log_queue_size: int = 10000
+    request_log_sample_rate: float = 1.0
+    memory_trace_sample_rate: float = 0.0
+    offload_threads: int = 0
+    offload_processes: int = 0
+    offload_queue_size: int = 32
+    warmup_upstream_connections: bool = True
+    warmup_pipeline: bool = True
+    warmup_cache_keys: int = 100
+    cache_snapshot_path: str | None = None
+    cache_snapshot_interval_seconds: float = 300.0
 
-    model_config = {"env_file": ".env"}
+    model_config = {"env_file": ".env", "protected_namespaces": ("settings_",)}
+
+    @model_validator(mode="after")
+    def _require_peer_secret(self) -> "Settings":
+        # The peer endpoint is served on the public port without rate limits.
+        if self.cache_self_url and len(self.cache_peer_urls) > 1 and not self.cache_peer_secret:
+            raise ValueError("CACHE_PEERS requires CACHE_PEER_SECRET")
+        return self
+
+    @model_validator(mode="after")
+    def _require_advisory_token_secret(self) -> "Settings":
+        # Cached responses carry tokens to other workers, replicas or restarts.
+        shared_cache = (
+            self.cache_backend != "memory"
+            or self.web_concurrency > 1
+            or bool(self.cache_snapshot_path)
+            or bool(self.cache_self_url and len(self.cache_peer_urls) > 1)
+        )
+        if self.advisory_location_mode == "deferred" and shared_cache and not self.advisory_token_secret:
+            raise ValueError(
+                "ADVISORY_LOCATION_MODE=deferred with a shared or persistent route cache "
+                "requires ADVISORY_TOKEN_SECRET"
+            )
+        return self
 
     @property
     def allowed_origins(self) -> list[str]:
         return [o.strip() for o in self.frontend_origins.split(",") if o.strip()]
 
+    @property
+    def cache_peer_urls(self) -> list[str]:
+        return [p.strip() for p in self.cache_peers.split(",") if p.strip()]
+
 
 settings = Settings()
@@ -0,0 +1,62 @@
+"""Per-request time budgets carried through a context variable.
+
+``route_weather`` starts a budget; every stage below it can ask how much
+time is left and record when it had to cut corners. Stages that run out
+of time degrade instead of failing, and the response is marked degraded.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+
+
+class RequestBudget:
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+        self.degraded_reasons: list[str] = []
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+_budget_ctx: ContextVar[RequestBudget | None] = ContextVar("request_budget", default=None)
+
+
+def start_budget(seconds: float) -> Token[RequestBudget | None]:
+    return _budget_ctx.set(RequestBudget(seconds) if seconds > 0 else None)
+
+
+def reset_budget(token: Token[RequestBudget | None]) -> None:
+    _budget_ctx.reset(token)
+
+
+def current_budget() -> RequestBudget | None:
+    return _budget_ctx.get()
+
+
+def time_left(reserve: float = 0.0) -> float | None:
+    """Seconds left after holding back ``reserve``, or None when unbounded."""
+    budget = _budget_ctx.get()
+    if budget is None:
+        return None
+    return budget.remaining() - reserve
+
+
+def clamp_timeout(timeout: float) -> float:
+    """Shorten a per-call timeout so it cannot outlive the request budget."""
+    left = time_left()
+    if left is None:
+        return timeout
+    return max(0.001, min(timeout, left))
+
+
+def mark_degraded(reason: str) -> None:
+    budget = _budget_ctx.get()
+    if budget is not None and reason not in budget.degraded_reasons:
+        budget.degraded_reasons.append(reason)
+
+
+def degraded_reasons() -> list[str]:
+    budget = _budget_ctx.get()
+    return list(budget.degraded_reasons) if budget is not None else []
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import queue
+import random
 from contextvars import ContextVar, Token
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Literal
 
+from .metrics import LOG_RECORDS_DROPPED
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
 _request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
 _logging_configured = False
+_listener: QueueListener | None = None
 
 
 def get_request_id() -> str:
@@ -29,10 +41,54 @@ class RequestContextFilter(logging.Filter):
         return True
 
 
+class LevelSamplingFilter(logging.Filter):
+    """Keep only a fraction of records marked ``sampled`` at INFO or below."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno > logging.INFO:
+            return True
+        if not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread without formatting them first.
+
+    The queue is in-process, so the record (including ``exc_info``) is
+    passed as-is and the listener's handler does all formatting and I/O.
+    When the queue is full the record is dropped rather than blocking the
+    event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    return datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+
+
+def _dumps(payload: dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode()
+    return json.dumps(payload, default=str)
+
+
 class JsonLogFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": _timestamp(record),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -42,14 +98,18 @@ class JsonLogFormatter(logging.Formatter):
             "status_code": getattr(record, "status_code", None),
             "duration_ms": getattr(record, "duration_ms", None),
         }
+        for key in ("stages_ms", "counters", "memory"):
+            value = getattr(record, key, None)
+            if value:
+                payload[key] = value
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload, default=str)
+        return _dumps(payload)
 
 
 class PlainLogFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
-        timestamp = datetime.now(timezone.utc).isoformat()
+        timestamp = _timestamp(record)
         request_id = getattr(record, "request_id", get_request_id())
         path = getattr(record, "path", "-")
         method = getattr(record, "method", "-")
@@ -61,22 +121,39 @@ class PlainLogFormatter(logging.Formatter):
             f"path={path} method={method} status_code={status_code} duration_ms={duration_ms} "
             f"{message}"
         )
+        for key in ("stages_ms", "counters", "memory"):
+            value = getattr(record, key, None)
+            if value:
+                base += " " + " ".join(f"{key}.{k}={v}" for k, v in value.items())
         if record.exc_info:
             return f"{base}\n{self.formatException(record.exc_info)}"
         return base
 
 
-def configure_logging(log_format: Literal["plain", "json"]) -> None:
-    global _logging_configured
+def configure_logging(
+    log_format: Literal["plain", "json"],
+    *,
+    queue_size: int = 10000,
+    sample_rate: float = 1.0,
+) -> None:
+    global _logging_configured, _listener
     if _logging_configured:
         return
 
-    handler = logging.StreamHandler()
-    handler.addFilter(RequestContextFilter())
+    stream_handler = logging.StreamHandler()
     if log_format == "json":
-        handler.setFormatter(JsonLogFormatter())
+        stream_handler.setFormatter(JsonLogFormatter())
     else:
-        handler.setFormatter(PlainLogFormatter())
+        stream_handler.setFormatter(PlainLogFormatter())
+
+    # Filters run on the calling thread, where the request ID context var
+    # is visible; everything after the queue runs on the listener thread.
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(LevelSamplingFilter(sample_rate))
+    handler.addFilter(RequestContextFilter())
+    _listener = QueueListener(handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
@@ -84,3 +161,11 @@ def configure_logging(log_format: Literal["plain", "json"]) -> None:
     root_logger.addHandler(handler)
 
     _logging_configured = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
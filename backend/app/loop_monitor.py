@@ -0,0 +1,95 @@
+"""Event-loop lag histogram and blocking-call detector.
+
+A heartbeat task on the loop records how late each wake-up is. A watchdog
+thread notices when heartbeats stop for longer than the block threshold
+and logs the loop thread's current stack, attributed to the request ID of
+the task that is running, so synchronous work hidden in async handlers
+shows up with a culprit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from .logging_config import _request_id_ctx
+from .metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(self, interval_seconds: float, block_threshold_seconds: float):
+        self.interval = interval_seconds
+        self.block_threshold = block_threshold_seconds
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        self._reported_beat: float | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._heartbeat_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        if self.block_threshold > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        expected = time.monotonic() + self.interval
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG_SECONDS.observe(max(0.0, now - expected))
+            self._last_beat = now
+            expected = now + self.interval
+
+    def _running_request_id(self) -> str:
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        if task is None:
+            return "-"
+        return task.get_context().get(_request_id_ctx, "-")
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.block_threshold) / 2
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            stalled = time.monotonic() - beat
+            if stalled < self.block_threshold or self._reported_beat == beat:
+                continue
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            EVENT_LOOP_BLOCKS.inc()
+            logger.warning(
+                "Event loop blocked for %.0f ms\n%s",
+                stalled * 1000,
+                stack,
+                extra={"request_id": self._running_request_id()},
+            )
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 import time
 import uuid
 from contextlib import asynccontextmanager
@@ -9,32 +11,46 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
+from .admin import admin_router, debug_router
 from .config import settings
 from .logging_config import configure_logging, reset_request_id, set_request_id
+from .loop_monitor import LoopMonitor
+from .memory_trace import maybe_start as maybe_trace_memory
 from .rate_limit import RateLimitExceeded, SLOWAPI_AVAILABLE, limiter
+from .readiness import readiness
 from .routes import router
-from .services import directions, scoring, weather
-from .services.cache import route_cache
-
-try:
-    import sentry_sdk
-    from sentry_sdk.integrations.fastapi import FastApiIntegration
-except ModuleNotFoundError:  # pragma: no cover
-    sentry_sdk = None
-    FastApiIntegration = None
+from .services import scoring
+from .services.cache import cache_snapshots, peer_group, route_cache
+from .services.offload import offload
+from .services.upstream import upstream_clients
+from .slow_requests import slow_requests
+from .timing import current_trace, reset_trace, start_trace
+from .warmup import warm_up
 
 try:
     from prometheus_fastapi_instrumentator import Instrumentator
 except ModuleNotFoundError:  # pragma: no cover
     Instrumentator = None
 
-configure_logging(settings.log_format)
+configure_logging(
+    settings.log_format,
+    queue_size=settings.log_queue_size,
+    sample_rate=settings.request_log_sample_rate,
+)
 logger = logging.getLogger(__name__)
 
 if not SLOWAPI_AVAILABLE:  # pragma: no cover
     logger.warning("slowapi not installed; rate limiting is disabled.")
 
-if settings.sentry_dsn_backend and sentry_sdk and FastApiIntegration:
+
+def _init_sentry() -> None:
+    # Imported only when configured: sentry_sdk is slow to import.
+    try:
+        import sentry_sdk
+        from sentry_sdk.integrations.fastapi import FastApiIntegration
+    except ModuleNotFoundError:  # pragma: no cover
+        logger.warning("SENTRY_DSN_BACKEND is set but sentry-sdk is not installed.")
+        return
     sentry_sdk.init(
         dsn=settings.sentry_dsn_backend,
         environment=settings.sentry_environment,
@@ -44,14 +60,37 @@ if settings.sentry_dsn_backend and sentry_sdk and FastApiIntegration:
     )
 
 
+if settings.sentry_dsn_backend:
+    _init_sentry()
+
+
+loop_monitor = LoopMonitor(
+    settings.loop_monitor_interval_ms / 1000,
+    settings.loop_block_threshold_ms / 1000,
+)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # The one place the route cache backend is built.
     route_cache.configure()
+    upstream_clients.start()
+    peer_group.start()
+    scoring.model_registry.start_watching(settings.model_watch_interval_seconds)
+    offload.start()
+    loop_monitor.start()
+    cache_snapshots.start()
+    readiness.reset()
+    warmup_task = asyncio.create_task(warm_up(readiness))
     yield
+    warmup_task.cancel()
+    await cache_snapshots.stop()
+    await loop_monitor.stop()
+    offload.shutdown()
+    scoring.model_registry.stop_watching()
     route_cache.close()
-    await directions.client.aclose()
-    await weather.client.aclose()
-    await scoring.geocode_client.aclose()
+    await peer_group.aclose()
+    await upstream_clients.aclose()
 
 
 app = FastAPI(title="Route Weather API", lifespan=lifespan)
@@ -64,6 +103,13 @@ app.add_middleware(
     allow_headers=["Content-Type"],
 )
 
+if settings.web_concurrency > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    logger.warning(
+        "WEB_CONCURRENCY=%d without PROMETHEUS_MULTIPROC_DIR: /metrics only "
+        "reports the worker that answers each scrape.",
+        settings.web_concurrency,
+    )
+
 if Instrumentator:
     Instrumentator().instrument(app).expose(app, endpoint="/metrics", include_in_schema=False)
 else:  # pragma: no cover
@@ -85,6 +131,9 @@ async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
 async def request_context_middleware(request: Request, call_next):
     request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
     token = set_request_id(request_id)
+    trace_token = start_trace()
+    trace = current_trace()
+    trace.memory = maybe_trace_memory(settings.memory_trace_sample_rate)
     start = time.perf_counter()
     response = None
     try:
@@ -92,21 +141,43 @@ async def request_context_middleware(request: Request, call_next):
     finally:
         duration_ms = round((time.perf_counter() - start) * 1000, 2)
         status_code = response.status_code if response is not None else 500
-        logger.info(
+        memory = trace.memory.finish() if trace.memory is not None else None
+        logger.log(
+            logging.WARNING if status_code >= 500 else logging.INFO,
             "Request completed",
             extra={
+                "sampled": True,
                 "path": request.url.path,
                 "method": request.method,
                 "status_code": status_code,
                 "duration_ms": duration_ms,
+                "stages_ms": trace.stages_ms() or None,
+                "counters": trace.counters or None,
+                "memory": memory,
+            },
+        )
+        slow_requests.maybe_record(
+            duration_ms,
+            lambda: {
+                "request_id": request_id,
+                "path": request.url.path,
+                "method": request.method,
+                "status_code": status_code,
+                "stages_ms": trace.stages_ms(),
+                "counters": dict(trace.counters),
+                "upstream_calls": list(trace.upstream_calls),
+                "memory": memory,
             },
         )
+        reset_trace(trace_token)
         reset_request_id(token)
 
     if response is None:  # pragma: no cover
         return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
     response.headers["X-Request-ID"] = request_id
+    if trace.stages:
+        response.headers["Server-Timing"] = trace.server_timing()
     return response
 
 
@@ -115,7 +186,15 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    state = readiness.snapshot()
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=state)
+
+
 app.include_router(router)
+app.include_router(admin_router)
+app.include_router(debug_router)
 
 # Serve frontend static files in production.
 # The Dockerfile copies the built frontend to /app/static.
@@ -0,0 +1,114 @@
+"""Sampled per-request allocation accounting with ``tracemalloc``.
+
+For a sampled request the middleware starts ``tracemalloc`` and
+``timing.stage`` records, per stage, the peak bytes allocated above the
+stage's starting point and the net bytes still held at its end; both come
+from ``get_traced_memory()``, which is cheap. Counting live allocation
+blocks needs a full ``take_snapshot()``, so it is done only at the start
+and end of the request. At the end the totals and the net blocks still
+alive (typically the response tree and whatever the cache keeps of it)
+are returned for metrics and logs.
+
+Tracing slows allocation-heavy code several-fold, so only a small
+fraction of requests is sampled and only one request is traced at a time.
+``tracemalloc`` is process-wide: allocations by other requests running
+concurrently are included, which makes the numbers an upper bound under
+load.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import tracemalloc
+from typing import Any
+
+from .metrics import REQUEST_ALLOC_BLOCKS, REQUEST_ALLOC_PEAK_BYTES, STAGE_ALLOC_PEAK_BYTES
+
+_active_lock = threading.Lock()
+
+
+def _live_blocks() -> int:
+    return len(tracemalloc.take_snapshot().traces)
+
+
+class MemoryTrace:
+    def __init__(self, owns_tracing: bool):
+        self._owns_tracing = owns_tracing
+        tracemalloc.reset_peak()
+        self._base, _ = tracemalloc.get_traced_memory()
+        self._base_blocks = _live_blocks()
+        self._peak = self._base
+        # name, starting bytes, highest peak seen
+        self._open: list[list[Any]] = []
+        self._finished = False
+        self.stages: dict[str, dict[str, int]] = {}
+
+    def _fold_peak(self) -> int:
+        """Fold the tracemalloc peak into every open frame and restart it."""
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        for frame in self._open:
+            frame[2] = max(frame[2], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def enter_stage(self, name: str) -> None:
+        # Work shared with other requests can outlive this one; once the
+        # trace is finished, tracemalloc may be stopped or owned by another.
+        if self._finished:
+            return
+        current = self._fold_peak()
+        self._open.append([name, current, current])
+
+    def exit_stage(self) -> None:
+        if self._finished:
+            return
+        current = self._fold_peak()
+        name, base, peak = self._open.pop()
+        stats = self.stages.setdefault(name, {"peak_bytes": 0, "net_bytes": 0})
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak - base)
+        stats["net_bytes"] += current - base
+
+    def finish(self) -> dict[str, Any]:
+        try:
+            current = self._fold_peak()
+            summary = {
+                "peak_bytes": self._peak - self._base,
+                "net_bytes": current - self._base,
+                "net_blocks": _live_blocks() - self._base_blocks,
+                "stages": self.stages,
+            }
+        finally:
+            self._finished = True
+            if self._owns_tracing:
+                tracemalloc.stop()
+            _active_lock.release()
+
+        REQUEST_ALLOC_PEAK_BYTES.observe(summary["peak_bytes"])
+        REQUEST_ALLOC_BLOCKS.observe(max(summary["net_blocks"], 0))
+        for name, stats in self.stages.items():
+            STAGE_ALLOC_PEAK_BYTES.labels(stage=name).observe(stats["peak_bytes"])
+        return summary
+
+
+def maybe_start(sample_rate: float) -> MemoryTrace | None:
+    """Start tracing this request with probability ``sample_rate``.
+
+    Returns None when not sampled or when another request is being traced.
+    The caller must call ``finish()`` on the returned trace.
+    """
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return None
+    if not _active_lock.acquire(blocking=False):
+        return None
+    owns_tracing = not tracemalloc.is_tracing()
+    if owns_tracing:
+        tracemalloc.start()
+    try:
+        return MemoryTrace(owns_tracing)
+    except BaseException:
+        if owns_tracing:
+            tracemalloc.stop()
+        _active_lock.release()
+        raise
@@ -0,0 +1,174 @@
+"""Application Prometheus metrics.
+
+Metrics are registered on the default registry, which the Instrumentator
+exposes on ``/metrics``. When prometheus_client is not installed every
+metric becomes a no-op so call sites never need to check.
+
+With several uvicorn workers each process has its own registry, so
+``PROMETHEUS_MULTIPROC_DIR`` must point at a shared directory: every worker
+then writes its values there and ``/metrics`` merges all of them. Gauges
+declare how they merge; custom collectors (e.g. upstream connection
+counts) only report in single-process mode.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+try:
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+
+    PROMETHEUS_AVAILABLE = True
+except ModuleNotFoundError:  # pragma: no cover
+    PROMETHEUS_AVAILABLE = False
+
+    class _NoopMetric:
+        def __init__(self, *_args: Any, **_kwargs: Any) -> None:
+            return
+
+        def labels(self, *_args: Any, **_kwargs: Any) -> "_NoopMetric":
+            return self
+
+        def inc(self, _amount: float = 1) -> None:
+            return
+
+        def dec(self, _amount: float = 1) -> None:
+            return
+
+        def set(self, _value: float) -> None:
+            return
+
+        def observe(self, _value: float) -> None:
+            return
+
+    Counter = Gauge = Histogram = _NoopMetric  # type: ignore[misc, assignment]
+
+
+def register_collector(collector: Any) -> None:
+    """Register a custom collector (an object with ``collect()``) if possible."""
+    if PROMETHEUS_AVAILABLE:
+        REGISTRY.register(collector)
+
+
+INFERENCE_BATCH_ROWS = Histogram(
+    "route_weather_inference_batch_rows",
+    "Feature rows per batched model prediction.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+INFERENCE_BATCH_REQUESTS = Histogram(
+    "route_weather_inference_batch_requests",
+    "score_routes calls served by one batched model prediction.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+INFERENCE_BATCH_WAIT_SECONDS = Histogram(
+    "route_weather_inference_batch_wait_seconds",
+    "Time a caller waited in the inference batcher before prediction.",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05),
+)
+
+MODEL_INFO = Gauge(
+    "route_weather_model_info",
+    "Route scoring model versions; 1 marks the active version.",
+    ["version"],
+    multiprocess_mode="liveall",
+)
+MODEL_RELOADS = Counter(
+    "route_weather_model_reloads_total",
+    "Route model load attempts by result.",
+    ["result"],
+)
+
+UPSTREAM_RETRIES = Counter(
+    "route_weather_upstream_retries_total",
+    "Upstream retry decisions by host and outcome.",
+    ["host", "outcome"],
+)
+CIRCUIT_STATE = Gauge(
+    "route_weather_circuit_state",
+    "Upstream circuit breaker state (0 closed, 1 half-open, 2 open).",
+    ["host"],
+    multiprocess_mode="livemax",
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "route_weather_circuit_transitions_total",
+    "Upstream circuit breaker state changes by host and new state.",
+    ["host", "state"],
+)
+
+UPSTREAM_HEDGES = Counter(
+    "route_weather_upstream_hedges_total",
+    "Hedged upstream requests by host and outcome (sent, won, lost, budget_exhausted).",
+    ["host", "outcome"],
+)
+
+STAGE_SECONDS = Histogram(
+    "route_weather_stage_duration_seconds",
+    "Time spent in each route-weather pipeline stage.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "route_weather_event_loop_lag_seconds",
+    "How late the event loop woke a periodic heartbeat.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "route_weather_event_loop_blocks_total",
+    "Times the event loop was blocked longer than the block threshold.",
+)
+LOG_RECORDS_DROPPED = Counter(
+    "route_weather_log_records_dropped_total",
+    "Log records dropped because the logging queue was full.",
+)
+
+_ALLOC_BUCKETS = tuple(2**n for n in range(16, 29, 2))  # 64 KiB .. 256 MiB
+REQUEST_ALLOC_PEAK_BYTES = Histogram(
+    "route_weather_request_alloc_peak_bytes",
+    "Peak bytes allocated while serving a memory-sampled request.",
+    buckets=_ALLOC_BUCKETS,
+)
+REQUEST_ALLOC_BLOCKS = Histogram(
+    "route_weather_request_alloc_blocks",
+    "Allocation blocks still alive at the end of a memory-sampled request.",
+    buckets=(100, 1000, 10000, 50000, 100000, 500000, 1000000),
+)
+STAGE_ALLOC_PEAK_BYTES = Histogram(
+    "route_weather_stage_alloc_peak_bytes",
+    "Peak bytes allocated within a stage of a memory-sampled request.",
+    ["stage"],
+    buckets=_ALLOC_BUCKETS,
+)
+
+OFFLOAD_SAVED_SECONDS = Counter(
+    "route_weather_offload_saved_seconds_total",
+    "Seconds of stage work run in an offload pool instead of on the event loop.",
+    ["stage", "pool"],
+)
+OFFLOAD_QUEUE_WAIT_SECONDS = Histogram(
+    "route_weather_offload_queue_wait_seconds",
+    "Time spent waiting for a free offload queue slot.",
+    ["pool"],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+
+CACHE_SNAPSHOT_SECONDS = Histogram(
+    "route_weather_cache_snapshot_seconds",
+    "Time spent writing a route cache snapshot to disk.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+CACHE_SNAPSHOT_ENTRIES = Gauge(
+    "route_weather_cache_snapshot_entries",
+    "Entries in the most recent route cache snapshot.",
+    multiprocess_mode="mostrecent",
+)
+CACHE_PEER_REQUESTS = Counter(
+    "route_weather_cache_peer_requests_total",
+    "Route cache misses sent to the owning peer, by outcome.",
+    ["outcome"],
+)
+CACHE_BUSY = Counter(
+    "route_weather_cache_busy_total",
+    "SQLite route cache reads served as misses and writes skipped because the database was locked.",
+    ["operation"],
+)
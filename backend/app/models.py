@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Literal
 
-from pydantic import AwareDatetime, BaseModel, Field
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field
 
 
 class RouteRequest(BaseModel):
@@ -48,6 +48,7 @@ class WeatherAdvisory(BaseModel):
     type: str
     severity: Literal["warning", "danger"]
     message: str
+    location: LatLng | None = None
 
 
 class RouteScore(BaseModel):
@@ -58,9 +59,21 @@ class RouteScore(BaseModel):
 
 
 class RouteRecommendation(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     recommended_route_index: int
     scores: list[RouteScore]
     advisories: list[list[WeatherAdvisory]]
+    advisory_token: str | None = None
+    model_version: str | None = None
+
+
+class AdvisoryLocationsRequest(BaseModel):
+    token: str = Field(min_length=1, max_length=8192)
+
+
+class AdvisoryLocationsResponse(BaseModel):
+    advisories: list[list[WeatherAdvisory]]
 
 
 class MultiRouteResponse(BaseModel):
@@ -68,3 +81,5 @@ class MultiRouteResponse(BaseModel):
     destination_address: str
     routes: list[RouteWithWeather]
     recommendation: RouteRecommendation | None = None
+    degraded: bool = False
+    degraded_reasons: list[str] = Field(default_factory=list)
@@ -0,0 +1,81 @@
+"""Low-overhead stack sampling profiler for live workers.
+
+A timer thread snapshots the target threads' Python stacks with
+``sys._current_frames()`` and aggregates them into collapsed stacks
+(``frame;frame;frame count``), the input format of flamegraph.pl and
+speedscope. Only one profile can run at a time.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+MAX_SECONDS = 30.0
+MIN_INTERVAL_SECONDS = 0.001
+MAX_UNIQUE_STACKS = 10_000
+MAX_STACK_DEPTH = 128
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame: FrameType | None) -> str:
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(
+    seconds: float,
+    interval_seconds: float,
+    thread_ids: set[int] | None = None,
+) -> tuple[Counter[str], int]:
+    """Sample stacks for ``seconds``; returns (collapsed stack counts, samples taken).
+
+    Blocks the calling thread, so run it off the event loop. ``thread_ids``
+    restricts sampling to those threads; None samples every thread except
+    the sampler itself.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        seconds = min(max(seconds, 0.0), MAX_SECONDS)
+        interval_seconds = max(interval_seconds, MIN_INTERVAL_SECONDS)
+        own_id = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        samples = 0
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_ids is not None and thread_id not in thread_ids:
+                    continue
+                stack = _collapse(frame)
+                if stack in stacks or len(stacks) < MAX_UNIQUE_STACKS:
+                    stacks[stack] += 1
+            samples += 1
+            time.sleep(interval_seconds)
+        return stacks, samples
+    finally:
+        _profile_lock.release()
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
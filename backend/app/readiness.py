@@ -0,0 +1,61 @@
+"""Startup readiness state behind ``GET /ready``.
+
+``/health`` answers as soon as the process serves HTTP (liveness).
+``/ready`` only returns 200 once the startup warm-up has finished, so a
+load balancer or autoscaler can hold traffic until then. If a required
+warm-up step failed it stays at 503 with status ``failed``.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Literal
+
+StepStatus = Literal["pending", "running", "done", "failed", "skipped"]
+
+
+class Readiness:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self.ready = False
+        self.steps: dict[str, dict[str, Any]] = {}
+
+    def begin(self, step: str) -> None:
+        self.steps[step] = {"status": "running", "started": time.monotonic()}
+
+    def end(self, step: str, status: StepStatus = "done", detail: str | None = None) -> None:
+        entry = self.steps.setdefault(step, {"started": time.monotonic()})
+        entry["status"] = status
+        entry["duration_ms"] = round((time.monotonic() - entry["started"]) * 1000, 1)
+        if detail:
+            entry["detail"] = detail
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.finished = time.monotonic()
+
+    def mark_failed(self) -> None:
+        self.ready = False
+        self.finished = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        end = self.finished or time.monotonic()
+        if self.ready:
+            status = "ready"
+        else:
+            status = "failed" if self.finished else "starting"
+        return {
+            "status": status,
+            "elapsed_ms": round((end - self.started) * 1000, 1),
+            "steps": {
+                name: {k: v for k, v in entry.items() if k != "started"}
+                for name, entry in self.steps.items()
+            },
+        }
+
+
+readiness = Readiness()
@@ -2,70 +2,201 @@ import logging
 from datetime import datetime, timezone
 
 import httpx
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Request, Response
 
+from . import deadline, timing
 from .config import settings
-from .models import RouteRequest, RouteWithWeather, MultiRouteResponse
+from .logging_config import get_request_id, set_request_id
+from .memory_trace import MemoryTrace
+from .models import (
+    AdvisoryLocationsRequest,
+    AdvisoryLocationsResponse,
+    MultiRouteResponse,
+    RouteRequest,
+    RouteWithWeather,
+    Waypoint,
+)
 from .rate_limit import limiter
-from .services.cache import route_cache
+from .services.cache import SingleFlight, peer_group, route_cache
+from .services.cache.peers import PEER_ANSWER_HEADER, PEER_PATH, PeerError
 from .services.directions import get_routes
-from .services.sampling import sample_route_points
-from .services.scoring import score_routes
+from .services.http_client import CircuitOpenError
+from .services.model_registry import ModelUnavailableError
+from .services.offload import offload
+from .services.sampling import build_waypoints, sample_route_points, sample_routes_offsets
+from .services.scoring import resolve_advisory_locations, score_routes
 from .services.weather import get_weather_for_waypoints
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+WeatherKey = tuple[float, float, datetime]
+
+# Concurrent misses for one route share a single upstream fetch.
+_route_flights = SingleFlight()
+
+
+def _weather_key(wp: Waypoint) -> WeatherKey:
+    # ~1.1 km resolution, same hour.
+    return (
+        round(wp.location.lat, 2),
+        round(wp.location.lng, 2),
+        wp.estimated_time.replace(minute=0, second=0, microsecond=0),
+    )
+
+
+async def sample_all_routes(routes: list[dict], departure: datetime) -> list[list[Waypoint]]:
+    """Sample every route, in a worker process when one is configured.
+
+    Only the steps go to the process and plain coordinate tuples come back;
+    the ``Waypoint`` objects are built on this side.
+    """
+    if offload.processes_enabled:
+        offsets = await offload.run_in_process(
+            "sampling", sample_routes_offsets, [route["steps"] for route in routes]
+        )
+        return [build_waypoints(points, departure) for points in offsets]
+    return await offload.run_in_thread(
+        "sampling",
+        lambda: [sample_route_points(route["steps"], departure) for route in routes],
+    )
+
+
+def dedupe_waypoints(all_route_waypoints: list[list[Waypoint]]) -> dict[WeatherKey, Waypoint]:
+    """Pick one representative waypoint per weather key across all routes."""
+    unique_weather: dict[WeatherKey, Waypoint] = {}
+    for waypoints in all_route_waypoints:
+        for wp in waypoints:
+            unique_weather.setdefault(_weather_key(wp), wp)
+    return unique_weather
+
+
+def assign_weather(
+    all_route_waypoints: list[list[Waypoint]],
+    unique_weather: dict[WeatherKey, Waypoint],
+) -> None:
+    """Copy each representative's weather onto every waypoint sharing its key."""
+    weather_lookup = {k: wp.weather for k, wp in unique_weather.items()}
+    for waypoints in all_route_waypoints:
+        for wp in waypoints:
+            wp.weather = weather_lookup[_weather_key(wp)]
+
 
 @router.post("/api/route-weather", response_model=MultiRouteResponse)
 @limiter.limit(settings.route_weather_rate_limit)
 async def route_weather(request: Request, payload: RouteRequest):
+    return await _serve_route_weather(payload, ask_owner=True)
+
+
+@router.post(PEER_PATH, response_model=MultiRouteResponse, include_in_schema=False)
+async def peer_route_weather(
+    payload: RouteRequest,
+    response: Response,
+    x_cache_peer_secret: str | None = Header(default=None),
+):
+    """Serve a route for a peer replica that does not own its cache key.
+
+    Never forwarded again, so replicas with different peer lists cannot
+    bounce a request between them.
+    """
+    if not peer_group.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not peer_group.authorized(x_cache_peer_secret):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    try:
+        result = await _serve_route_weather(payload, ask_owner=False)
+    except HTTPException as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail,
+            headers={**(exc.headers or {}), PEER_ANSWER_HEADER: "1"},
+        ) from exc
+    response.headers[PEER_ANSWER_HEADER] = "1"
+    return result
+
+
+async def _serve_route_weather(payload: RouteRequest, ask_owner: bool) -> MultiRouteResponse:
     departure_iso = payload.departure_time.isoformat() if payload.departure_time else None
     cache_key = route_cache.make_key(payload.origin, payload.destination, departure_iso)
-    cached = route_cache.get(cache_key)
+    with timing.stage("cache_lookup"):
+        cached = route_cache.get(cache_key)
     if cached:
+        timing.incr("cache_hits")
         return cached
+    timing.incr("cache_misses")
+
+    owner = peer_group.remote_owner(cache_key) if ask_owner else None
+    if owner is not None:
+        try:
+            with timing.stage("peer"):
+                response = await peer_group.fetch(owner, cache_key, payload)
+        except PeerError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+        if response is not None:
+            timing.incr("peer_hits")
+            return response
+
+    request_id = get_request_id()
+    trace = timing.current_trace()
+    memory = trace.memory if trace is not None else None
+    (response, flight_trace), shared = await _route_flights.do(
+        cache_key, lambda: _build_in_flight(payload, cache_key, request_id, memory)
+    )
+    if trace is not None:
+        trace.merge(flight_trace)
+    if shared:
+        timing.incr("coalesced")
+    return response
+
+
+async def _build_in_flight(
+    payload: RouteRequest, cache_key: str, request_id: str, memory: MemoryTrace | None
+) -> tuple[MultiRouteResponse, timing.RequestTrace]:
+    # Runs detached from the requests waiting on it, with a trace of its own;
+    # callers copy its stage timings into theirs. The leading request's memory
+    # tracer records the stages directly and ignores them once it finishes.
+    set_request_id(request_id)
+    timing.start_trace()
+    timing.current_trace().memory = memory
+    response = await _build_route_weather(payload, cache_key)
+    return response, timing.current_trace()
+
 
+async def _build_route_weather(payload: RouteRequest, cache_key: str) -> MultiRouteResponse:
+    budget_token = deadline.start_budget(settings.request_deadline_seconds)
     try:
-        routes_data = await get_routes(payload.origin, payload.destination)
+        with timing.stage("directions"):
+            routes_data = await get_routes(payload.origin, payload.destination)
         departure = payload.departure_time or datetime.now(timezone.utc)
 
         # Sample waypoints for each route
-        all_route_waypoints = []
-        for route in routes_data["routes"]:
-            waypoints = sample_route_points(route["steps"], departure)
-            all_route_waypoints.append(waypoints)
+        with timing.stage("sampling"):
+            all_route_waypoints = await sample_all_routes(routes_data["routes"], departure)
 
         # Deduplicate weather calls across routes.
         # Routes often overlap, so many waypoints share nearly identical
         # locations and times. Key by (lat rounded to 2dp, lng rounded to
         # 2dp, hour) — ~1.1 km resolution, same hour.
-        unique_weather = {}  # key → waypoint (representative)
-        for waypoints in all_route_waypoints:
-            for wp in waypoints:
-                key = (
-                    round(wp.location.lat, 2),
-                    round(wp.location.lng, 2),
-                    wp.estimated_time.replace(minute=0, second=0, microsecond=0),
-                )
-                if key not in unique_weather:
-                    unique_weather[key] = wp
+        with timing.stage("dedup"):
+            unique_weather = await offload.run_in_thread(
+                "dedup", dedupe_waypoints, all_route_waypoints
+            )
+        total_points = sum(len(wps) for wps in all_route_waypoints)
+        timing.incr("waypoints", total_points)
+        timing.incr("weather_points", len(unique_weather))
+        timing.incr("dedup_saved", total_points - len(unique_weather))
 
         # Fetch weather for unique waypoints only
         unique_list = list(unique_weather.values())
-        await get_weather_for_waypoints(unique_list)
-
-        # Build lookup and assign weather to all waypoints
-        weather_lookup = {k: wp.weather for k, wp in unique_weather.items()}
-        for waypoints in all_route_waypoints:
-            for wp in waypoints:
-                key = (
-                    round(wp.location.lat, 2),
-                    round(wp.location.lng, 2),
-                    wp.estimated_time.replace(minute=0, second=0, microsecond=0),
-                )
-                wp.weather = weather_lookup[key]
+        with timing.stage("weather"):
+            await get_weather_for_waypoints(unique_list)
+
+        # Assign weather to all waypoints
+        with timing.stage("dedup_assign"):
+            await offload.run_in_thread(
+                "dedup_assign", assign_weather, all_route_waypoints, unique_weather
+            )
 
         # Build response
         route_results = []
@@ -85,20 +216,31 @@ async def route_weather(request: Request, payload: RouteRequest):
                 )
             )
 
-        recommendation = await score_routes(route_results)
+        with timing.stage("scoring"):
+            recommendation = await score_routes(route_results)
 
+        degraded_reasons = deadline.degraded_reasons()
         response = MultiRouteResponse(
             origin_address=routes_data["origin_address"],
             destination_address=routes_data["destination_address"],
             routes=route_results,
             recommendation=recommendation,
+            degraded=bool(degraded_reasons),
+            degraded_reasons=degraded_reasons,
         )
-        route_cache.set(cache_key, response)
+        # Partial answers are served but not cached, so the next request
+        # gets a chance at complete data.
+        if not degraded_reasons:
+            route_cache.set(cache_key, response)
         return response
     except HTTPException:
         raise
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="External API timed out")
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Upstream API temporarily unavailable")
+    except ModelUnavailableError:
+        raise HTTPException(status_code=503, detail="Route model unavailable")
     except httpx.HTTPStatusError as exc:
         logger.error("Upstream API error: %s", exc.response.status_code)
         raise HTTPException(
@@ -108,3 +250,15 @@ async def route_weather(request: Request, payload: RouteRequest):
     except Exception:
         logger.exception("Unexpected error in route_weather")
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        deadline.reset_budget(budget_token)
+
+
+@router.post("/api/advisory-locations", response_model=AdvisoryLocationsResponse)
+@limiter.limit(settings.route_weather_rate_limit)
+async def advisory_locations(request: Request, payload: AdvisoryLocationsRequest):
+    """Resolve location names for advisories returned with an advisory_token."""
+    advisories = await resolve_advisory_locations(payload.token)
+    if advisories is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired advisory token")
+    return AdvisoryLocationsResponse(advisories=advisories)
@@ -8,7 +8,12 @@ from typing import Any
 from ...config import settings
 from .base import BaseRouteCache
 from .memory import TTLCache
+from .peers import PeerGroup
 from .redis import RedisRouteCache
+from .snapshot import CacheSnapshotter
+from .sqlite import SQLiteRouteCache
+from .singleflight import SingleFlight
+from .tiered import TieredRouteCache
 
 logger = logging.getLogger(__name__)
 
@@ -27,9 +32,37 @@ def _build_cache_backend() -> BaseRouteCache:
             logger.warning("Redis cache unavailable (%s). Falling back to memory cache.", exc)
             return TTLCache()
 
+    if settings.cache_backend == "sqlite":
+        return _build_sqlite_backend()
+
+    if settings.web_concurrency > 1:
+        # Separate memory caches per worker would each miss on their own.
+        logger.info(
+            "WEB_CONCURRENCY=%d: sharing the route cache between workers through sqlite.",
+            settings.web_concurrency,
+        )
+        return _build_sqlite_backend()
+
     return TTLCache()
 
 
+def _build_sqlite_backend() -> BaseRouteCache:
+    try:
+        sqlite_cache = SQLiteRouteCache(
+            settings.cache_sqlite_path,
+            max_entries=settings.cache_sqlite_max_entries,
+            compaction_interval_seconds=settings.cache_compaction_interval_seconds,
+        )
+    except Exception as exc:
+        logger.warning("SQLite cache unavailable (%s). Falling back to memory cache.", exc)
+        return TTLCache()
+    logger.info("Using sqlite route cache backend at %s.", settings.cache_sqlite_path)
+    if settings.cache_local_entries <= 0:
+        return sqlite_cache
+    local = TTLCache(ttl=settings.cache_local_ttl_seconds, max_entries=settings.cache_local_entries)
+    return TieredRouteCache(local, sqlite_cache)
+
+
 class RouteCacheManager(BaseRouteCache):
     def __init__(self):
         self._backend: BaseRouteCache = TTLCache()
@@ -54,6 +87,12 @@ class RouteCacheManager(BaseRouteCache):
     def set(self, key: str, value: Any) -> None:
         self._backend.set(key, value)
 
+    def entries(self) -> list[tuple[str, Any, float, int]]:
+        return self._backend.entries()
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        self._backend.restore(key, value, expires_at, hits)
+
     def clear(self) -> None:
         self._backend.clear()
 
@@ -61,13 +100,33 @@ class RouteCacheManager(BaseRouteCache):
         self._backend.close()
 
 
+# Serves from a memory cache until ``configure()`` runs in the app lifespan.
 route_cache = RouteCacheManager()
-route_cache.configure()
+cache_snapshots = CacheSnapshotter(
+    route_cache,
+    settings.cache_snapshot_path,
+    settings.cache_snapshot_interval_seconds,
+)
+peer_group = PeerGroup(
+    settings.cache_self_url,
+    settings.cache_peer_urls,
+    secret=settings.cache_peer_secret,
+    timeout_seconds=settings.cache_peer_timeout_seconds,
+    hot_entries=settings.cache_peer_hot_entries,
+    hot_ttl_seconds=settings.cache_local_ttl_seconds,
+)
 
 __all__ = [
     "BaseRouteCache",
+    "CacheSnapshotter",
+    "PeerGroup",
     "RedisRouteCache",
     "RouteCacheManager",
+    "SingleFlight",
+    "SQLiteRouteCache",
     "TTLCache",
+    "TieredRouteCache",
+    "cache_snapshots",
+    "peer_group",
     "route_cache",
 ]
@@ -22,6 +22,12 @@ def make_cache_key(origin: str, destination: str, departure_time_iso: str | None
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
+def encode_value(value: Any) -> str:
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json()
+    return json.dumps(value, default=str)
+
+
 class BaseRouteCache(ABC):
     @staticmethod
     def make_key(origin: str, destination: str, departure_time_iso: str | None) -> str:
@@ -39,5 +45,16 @@ class BaseRouteCache(ABC):
     def clear(self) -> None:
         raise NotImplementedError
 
+    def entries(self) -> list[tuple[str, Any, float, int]]:
+        """Live ``(key, value, expires_at, hits)`` tuples for a snapshot.
+
+        Backends that persist on their own have nothing to snapshot.
+        """
+        return []
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        """Insert ``value`` so that it still expires at ``expires_at``."""
+        self.set(key, value)
+
     def close(self) -> None:
         return
@@ -14,6 +14,7 @@ class TTLCache(BaseRouteCache):
         self._ttl = ttl
         self._max_entries = max_entries
         self._store: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._hits: dict[str, int] = {}
 
     def get(self, key: str) -> Any | None:
         if key not in self._store:
@@ -21,16 +22,37 @@ class TTLCache(BaseRouteCache):
         ts, value = self._store[key]
         if time.time() - ts > self._ttl:
             del self._store[key]
+            self._hits.pop(key, None)
             return None
         self._store.move_to_end(key)
+        self._hits[key] = self._hits.get(key, 0) + 1
         return value
 
     def set(self, key: str, value: Any) -> None:
-        if key in self._store:
-            self._store.move_to_end(key)
-        self._store[key] = (time.time(), value)
-        while len(self._store) > self._max_entries:
-            self._store.popitem(last=False)
+        self._insert(key, time.time(), value, 0)
+
+    def entries(self) -> list[tuple[str, Any, float, int]]:
+        now = time.time()
+        return [
+            (key, value, ts + self._ttl, self._hits.get(key, 0))
+            for key, (ts, value) in list(self._store.items())
+            if ts + self._ttl > now
+        ]
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        # Back-date the insert time so the entry keeps its original expiry.
+        if expires_at > time.time():
+            self._insert(key, expires_at - self._ttl, value, hits)
 
     def clear(self) -> None:
         self._store.clear()
+        self._hits.clear()
+
+    def _insert(self, key: str, ts: float, value: Any, hits: int) -> None:
+        if key in self._store:
+            self._store.move_to_end(key)
+        self._store[key] = (ts, value)
+        self._hits[key] = hits
+        while len(self._store) > self._max_entries:
+            evicted, _ = self._store.popitem(last=False)
+            self._hits.pop(evicted, None)
@@ -0,0 +1,170 @@
+"""Route cache sharding across replicas.
+
+Every replica is configured with the same peer list. Keys are assigned to
+an owner by consistent hashing; a replica that misses a key it does not
+own asks the owner, which answers from its cache or computes the route
+once and caches it there. Each key is then cached on one replica, so the
+combined cache grows with the number of replicas instead of every
+replica holding the same popular routes.
+
+Routes fetched from a peer are kept briefly in a small local "hot" cache
+so a very popular key does not turn its owner into a hotspot. A peer
+that cannot be reached is skipped for a short cooldown and the route is
+computed locally.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import secrets
+import time
+
+import httpx
+
+from ...metrics import CACHE_PEER_REQUESTS
+from ...models import MultiRouteResponse, RouteRequest
+from .memory import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PEER_PATH = "/internal/cache/route-weather"
+PEER_SECRET_HEADER = "X-Cache-Peer-Secret"
+# Set on every answer from the peer endpoint itself, errors included, so a
+# route-level 404 can be told apart from a missing or disabled endpoint.
+PEER_ANSWER_HEADER = "X-Cache-Peer-Answer"
+
+
+class PeerError(Exception):
+    """The owner answered with an error; ``status_code`` and ``detail`` are its own."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with ``replicas`` virtual points per node."""
+
+    def __init__(self, nodes: list[str], replicas: int = 64):
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        if not self._hashes:
+            raise LookupError("hash ring is empty")
+        idx = bisect.bisect_right(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[idx]
+
+
+class PeerGroup:
+    def __init__(
+        self,
+        self_url: str | None,
+        peer_urls: list[str],
+        *,
+        secret: str | None = None,
+        timeout_seconds: float = 10.0,
+        hot_entries: int = 50,
+        hot_ttl_seconds: int = 60,
+        cooldown_seconds: float = 5.0,
+    ):
+        self.self_url = self_url.rstrip("/") if self_url else None
+        peers = [url.rstrip("/") for url in peer_urls]
+        if self.self_url and peers and self.self_url not in peers:
+            logger.warning("CACHE_SELF_URL %s is not in CACHE_PEERS; adding it.", self.self_url)
+            peers.append(self.self_url)
+        self.ring = HashRing(peers)
+        self.hot = TTLCache(ttl=hot_ttl_seconds, max_entries=hot_entries)
+        self._secret = secret
+        self._timeout = timeout_seconds
+        self._cooldown = cooldown_seconds
+        self._down_until: dict[str, float] = {}
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.self_url is not None and len(self.ring.nodes) > 1
+
+    def owner(self, key: str) -> str:
+        return self.ring.owner(key)
+
+    def remote_owner(self, key: str) -> str | None:
+        """The peer to ask for ``key``, or None to handle it here."""
+        if not self.enabled:
+            return None
+        owner = self.owner(key)
+        if owner == self.self_url or self._down_until.get(owner, 0.0) > time.monotonic():
+            return None
+        return owner
+
+    def authorized(self, secret: str | None) -> bool:
+        # Without a configured secret no caller is trusted.
+        if not self._secret:
+            return False
+        return secret is not None and secrets.compare_digest(secret, self._secret)
+
+    def start(self) -> None:
+        if self.enabled and self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self._timeout, connect=1.0))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, owner: str, key: str, payload: RouteRequest) -> MultiRouteResponse | None:
+        """Ask ``owner`` for the route; None when it cannot be reached.
+
+        Raises ``PeerError`` when the owner answered with an error, so an
+        upstream outage is not retried by every replica.
+        """
+        hot = self.hot.get(key)
+        if hot is not None:
+            CACHE_PEER_REQUESTS.labels(outcome="hot").inc()
+            return hot
+        self.start()
+        headers = {PEER_SECRET_HEADER: self._secret} if self._secret else {}
+        try:
+            response = await self._client.post(
+                f"{owner}{PEER_PATH}", json=payload.model_dump(mode="json"), headers=headers
+            )
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as exc:
+            logger.warning("Cache peer %s unreachable (%s); computing locally.", owner, exc)
+            self._down_until[owner] = time.monotonic() + self._cooldown
+            CACHE_PEER_REQUESTS.labels(outcome="unreachable").inc()
+            return None
+        except httpx.TimeoutException:
+            CACHE_PEER_REQUESTS.labels(outcome="error").inc()
+            raise PeerError(504, "External API timed out") from None
+        if response.status_code in (403, 404) and PEER_ANSWER_HEADER not in response.headers:
+            logger.warning(
+                "Cache peer %s rejected the request (%d); check CACHE_PEERS and CACHE_PEER_SECRET.",
+                owner,
+                response.status_code,
+            )
+            self._down_until[owner] = time.monotonic() + self._cooldown
+            CACHE_PEER_REQUESTS.labels(outcome="unreachable").inc()
+            return None
+        if response.status_code != 200:
+            CACHE_PEER_REQUESTS.labels(outcome="error").inc()
+            try:
+                detail = response.json().get("detail", response.reason_phrase)
+            except ValueError:
+                detail = response.reason_phrase
+            raise PeerError(response.status_code, detail)
+        CACHE_PEER_REQUESTS.labels(outcome="owner").inc()
+        result = MultiRouteResponse.model_validate_json(response.content)
+        if not result.degraded:
+            self.hot.set(key, result)
+        return result
@@ -4,15 +4,10 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from typing import Any
 
-from .base import BaseRouteCache, DEFAULT_TTL
-
-try:
-    import redis
-except ModuleNotFoundError:  # pragma: no cover - exercised via fallback tests
-    redis = None
-
+from .base import BaseRouteCache, DEFAULT_TTL, encode_value
 from ...models import MultiRouteResponse
 
 logger = logging.getLogger(__name__)
@@ -20,8 +15,11 @@ logger = logging.getLogger(__name__)
 
 class RedisRouteCache(BaseRouteCache):
     def __init__(self, redis_url: str, ttl: int = DEFAULT_TTL):
-        if redis is None:
-            raise RuntimeError("redis package is not installed")
+        # Imported here so memory-cache deployments never pay for it.
+        try:
+            import redis
+        except ModuleNotFoundError:  # pragma: no cover - exercised via fallback tests
+            raise RuntimeError("redis package is not installed") from None
         self._ttl = ttl
         self._client = redis.Redis.from_url(
             redis_url,
@@ -46,11 +44,12 @@ class RedisRouteCache(BaseRouteCache):
             return None
 
     def set(self, key: str, value: Any) -> None:
-        if hasattr(value, "model_dump"):
-            payload = json.dumps(value.model_dump(mode="json"))
-        else:
-            payload = json.dumps(value, default=str)
-        self._client.setex(key, self._ttl, payload)
+        self._client.setex(key, self._ttl, encode_value(value))
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        remaining = int(expires_at - time.time())
+        if remaining > 0:
+            self._client.setex(key, remaining, encode_value(value))
 
     def clear(self) -> None:
         self._client.flushdb()
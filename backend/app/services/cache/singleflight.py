@@ -0,0 +1,35 @@
+"""Coalesce concurrent cache misses for the same key into one computation."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class SingleFlight:
+    """Runs at most one ``fn`` per key at a time; later callers share its result.
+
+    The work runs in its own task, so a caller that gives up (a client
+    disconnect cancels its request) does not cancel it for the others. The
+    task starts from an empty ``contextvars`` context: it outlives the
+    request that started it, so it must not write to that request's
+    per-request state. ``fn`` sets up whatever context it needs.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is False for the caller that ran ``fn``."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(fn(), context=contextvars.Context())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), shared
@@ -0,0 +1,181 @@
+"""Route cache snapshots on local disk.
+
+A snapshot is JSON lines, one entry per line::
+
+    {"key": "...", "expires_at": 1767225600.0, "hits": 12, "value": {...}}
+
+``value`` is a ``MultiRouteResponse`` dumped in JSON mode and
+``expires_at`` is a Unix timestamp, so a restored entry expires when the
+original would have rather than getting a fresh TTL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from ...metrics import CACHE_SNAPSHOT_ENTRIES, CACHE_SNAPSHOT_SECONDS
+from ...models import MultiRouteResponse
+from .base import BaseRouteCache, encode_value
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    key: str
+    value: dict[str, Any]
+    expires_at: float
+    hits: int = 0
+
+
+def read_snapshot(path: Path, limit: int | None = None, now: float | None = None) -> list[SnapshotEntry]:
+    """Unexpired entries from ``path``, most-hit first, at most ``limit``.
+
+    A missing file yields no entries; malformed lines are skipped.
+    """
+    now = time.time() if now is None else now
+    if not path.exists():
+        return []
+    entries = []
+    with path.open(encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+                entry = SnapshotEntry(
+                    key=raw["key"],
+                    value=raw["value"],
+                    expires_at=float(raw["expires_at"]),
+                    hits=int(raw.get("hits", 0)),
+                )
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping malformed cache snapshot line %s:%d", path, line_no)
+                continue
+            if entry.expires_at > now:
+                entries.append(entry)
+    entries.sort(key=lambda e: e.hits, reverse=True)
+    return entries[:limit] if limit is not None else entries
+
+
+def write_snapshot(path: Path, entries: list[tuple[str, Any, float, int]]) -> int:
+    """Write ``(key, value, expires_at, hits)`` tuples to ``path``.
+
+    The file is written next to ``path`` and renamed into place, so a
+    reader never sees a half-written snapshot.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        for key, value, expires_at, hits in entries:
+            fh.write(
+                f'{{"key":{json.dumps(key)},"expires_at":{expires_at:.3f},'
+                f'"hits":{int(hits)},"value":{encode_value(value)}}}\n'
+            )
+    os.replace(tmp, path)
+    return len(entries)
+
+
+class CacheSnapshotter:
+    """Writes ``cache`` to ``path`` every ``interval_seconds`` and on stop.
+
+    Nothing is written until ``restore`` has run, so a replica that shuts
+    down before its warm-up reached the cache does not replace a good
+    snapshot with an empty one.
+    """
+
+    def __init__(self, cache: BaseRouteCache, path: str | Path | None, interval_seconds: float):
+        self._cache = cache
+        self.path = Path(path) if path else None
+        self._interval = interval_seconds
+        self._restored = False
+        self._task: asyncio.Task | None = None
+        # A cancelled periodic write keeps running in its thread.
+        self._write_lock = threading.Lock()
+
+    @property
+    def restored(self) -> bool:
+        return self._restored
+
+    def start(self) -> None:
+        if self.path is None or self._interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.save()
+        except Exception as exc:
+            logger.warning("Cache snapshot on shutdown failed: %s", exc)
+
+    async def restore(self, limit: int | None = None) -> int:
+        """Load unexpired entries from the snapshot into the cache."""
+        if self.path is None:
+            return 0
+        try:
+            loaded = await asyncio.to_thread(self._load, self.path, limit)
+        except (OSError, ValueError) as exc:
+            # An unreadable snapshot is replaced by the next save.
+            logger.warning("Cannot read cache snapshot %s: %s", self.path, exc)
+            loaded = []
+        # Least-hit first, so the most-hit entries are the last evicted.
+        for key, value, expires_at, hits in reversed(loaded):
+            self._cache.restore(key, value, expires_at, hits)
+        self._restored = True
+        return len(loaded)
+
+    async def save(self) -> int | None:
+        """Snapshot the cache now; ``None`` when there is nothing to write."""
+        if self.path is None or not self._restored:
+            return None
+        entries = self._cache.entries()
+        if not entries:
+            return None
+        start = time.perf_counter()
+        written = await asyncio.to_thread(self._write, self.path, entries)
+        elapsed = time.perf_counter() - start
+        CACHE_SNAPSHOT_SECONDS.observe(elapsed)
+        CACHE_SNAPSHOT_ENTRIES.set(written)
+        logger.info("Wrote %d cache entries to %s in %.1f ms", written, self.path, elapsed * 1000)
+        return written
+
+    def _write(self, path: Path, entries: list[tuple[str, Any, float, int]]) -> int:
+        with self._write_lock:
+            return write_snapshot(path, entries)
+
+    @staticmethod
+    def _load(path: Path, limit: int | None) -> list[tuple[str, Any, float, int]]:
+        loaded = []
+        for entry in read_snapshot(path, limit=limit):
+            try:
+                value = MultiRouteResponse.model_validate(entry.value)
+            except ValidationError:
+                logger.warning("Skipping cache snapshot entry %s that no longer validates", entry.key)
+                continue
+            loaded.append((entry.key, value, entry.expires_at, entry.hits))
+        return loaded
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.save()
+            except Exception as exc:
+                logger.warning("Periodic cache snapshot failed: %s", exc)
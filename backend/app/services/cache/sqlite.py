@@ -0,0 +1,237 @@
+"""SQLite-backed cache implementation.
+
+The database runs in WAL mode, so worker processes on the same host can
+share one file: readers never block each other or the writer. Calls are
+made on the request path, so they wait only a short ``busy_timeout`` for
+the write lock; a read that cannot get it is a miss and a write is
+skipped. Expired rows are filtered out on read and deleted by a
+background compaction thread, which also trims the table to
+``max_entries`` and checkpoints the WAL. Only one process on the host
+compacts at a time: the thread takes an advisory lock on a file next to
+the database and other processes skip their turn.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .base import BaseRouteCache, DEFAULT_TTL, encode_value
+from ...metrics import CACHE_BUSY
+from ...models import MultiRouteResponse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX; every process compacts
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 100_000
+# Request-path wait for the write lock before giving up.
+DEFAULT_BUSY_TIMEOUT_MS = 50
+COMPACTION_BUSY_TIMEOUT_MS = 5000
+# Rows deleted per transaction, so compaction never holds the lock for long.
+COMPACTION_BATCH = 500
+# The WAL file is truncated back to this size after a checkpoint resets it.
+JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS route_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS route_cache_expires_at ON route_cache (expires_at);
+"""
+
+
+class SQLiteRouteCache(BaseRouteCache):
+    def __init__(
+        self,
+        path: str | Path,
+        ttl: int = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        compaction_interval_seconds: float = 300.0,
+        busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+    ):
+        self._path = Path(path)
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._busy_timeout_ms = busy_timeout_ms
+        # sqlite3 connections must not be shared between threads.
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._open(COMPACTION_BUSY_TIMEOUT_MS)
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+        self._compaction_lock_fd: int | None = None
+        self._compaction_stop = threading.Event()
+        self._compaction_thread: threading.Thread | None = None
+        if compaction_interval_seconds > 0:
+            self._compaction_thread = threading.Thread(
+                target=self._compact_periodically,
+                args=(compaction_interval_seconds,),
+                name="sqlite-cache-compaction",
+                daemon=True,
+            )
+            self._compaction_thread.start()
+
+    def _open(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            timeout=busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few writes on power loss is fine for a cache.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT}")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        conn = self._open(self._busy_timeout_ms)
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def get(self, key: str) -> Any | None:
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM route_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            CACHE_BUSY.labels(operation="get").inc()
+            return None
+        if row is None:
+            return None
+        try:
+            return MultiRouteResponse.model_validate_json(row[0])
+        except Exception:
+            logger.warning("Failed to decode cached value for key %s", key)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        self._write(key, value, time.time() + self._ttl)
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        if expires_at > time.time():
+            self._write(key, value, expires_at)
+
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO route_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encode_value(value), expires_at),
+            )
+        except sqlite3.OperationalError:
+            CACHE_BUSY.labels(operation="set").inc()
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM route_cache")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM route_cache").fetchone()[0]
+
+    def compact(self, now: float | None = None) -> int:
+        """Delete expired rows, trim to ``max_entries`` and checkpoint the WAL.
+
+        Rows are deleted in small batches, each its own transaction, so
+        request-path writes wait at most one batch. The checkpoint is
+        passive: it copies what it can without waiting for readers.
+        Returns the number of rows deleted.
+        """
+        now = time.time() if now is None else now
+        conn = self._open(COMPACTION_BUSY_TIMEOUT_MS)
+        try:
+            deleted = self._delete_batches(
+                conn,
+                "DELETE FROM route_cache WHERE key IN "
+                "(SELECT key FROM route_cache WHERE expires_at <= ? LIMIT ?)",
+                (now,),
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM route_cache").fetchone()[0] - self._max_entries
+            if excess > 0:
+                # The soonest to expire are the oldest writes.
+                deleted += self._delete_batches(
+                    conn,
+                    "DELETE FROM route_cache WHERE key IN "
+                    "(SELECT key FROM route_cache ORDER BY expires_at LIMIT ?)",
+                    (),
+                    limit=excess,
+                )
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            conn.close()
+        return deleted
+
+    @staticmethod
+    def _delete_batches(
+        conn: sqlite3.Connection, sql: str, params: tuple, limit: int | None = None
+    ) -> int:
+        deleted = 0
+        while limit is None or deleted < limit:
+            batch = COMPACTION_BATCH if limit is None else min(COMPACTION_BATCH, limit - deleted)
+            count = conn.execute(sql, (*params, batch)).rowcount
+            deleted += count
+            if count < batch:
+                break
+        return deleted
+
+    def _acquire_compaction_lock(self) -> bool:
+        """Whether this process is the one that compacts the shared file."""
+        if fcntl is None or self._compaction_lock_fd is not None:
+            return True
+        fd = os.open(f"{self._path}.compact.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._compaction_lock_fd = fd
+        return True
+
+    def _release_compaction_lock(self) -> None:
+        if self._compaction_lock_fd is not None:
+            os.close(self._compaction_lock_fd)
+            self._compaction_lock_fd = None
+
+    def _compact_periodically(self, interval_seconds: float) -> None:
+        while not self._compaction_stop.wait(interval_seconds):
+            try:
+                if not self._acquire_compaction_lock():
+                    continue
+                deleted = self.compact()
+                if deleted:
+                    logger.info("Compacted sqlite route cache: %d rows deleted", deleted)
+            except Exception:
+                logger.exception("SQLite route cache compaction failed")
+
+    def close(self) -> None:
+        self._compaction_stop.set()
+        if self._compaction_thread is not None:
+            self._compaction_thread.join(timeout=5)
+            self._compaction_thread = None
+        self._release_compaction_lock()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
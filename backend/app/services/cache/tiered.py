@@ -0,0 +1,52 @@
+"""Two-tier cache: a small per-process cache in front of a shared one."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .base import BaseRouteCache
+from .memory import TTLCache
+
+
+class TieredRouteCache(BaseRouteCache):
+    """Serves hot keys from process memory and everything else from ``shared``.
+
+    With several workers, ``shared`` is what they all see; the local tier
+    only saves the decode of popular entries. Its TTL is kept short because
+    it does not know how long an entry has left in the shared tier.
+    """
+
+    def __init__(self, local: TTLCache, shared: BaseRouteCache):
+        self._local = local
+        self._shared = shared
+
+    @property
+    def shared(self) -> BaseRouteCache:
+        return self._shared
+
+    def get(self, key: str) -> Any | None:
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        value = self._shared.get(key)
+        if value is not None:
+            self._local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._shared.set(key, value)
+        self._local.set(key, value)
+
+    def entries(self) -> list[tuple[str, Any, float, int]]:
+        return self._shared.entries()
+
+    def restore(self, key: str, value: Any, expires_at: float, hits: int = 0) -> None:
+        self._shared.restore(key, value, expires_at, hits)
+
+    def clear(self) -> None:
+        self._local.clear()
+        self._shared.clear()
+
+    def close(self) -> None:
+        self._local.clear()
+        self._shared.close()
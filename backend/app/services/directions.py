@@ -1,23 +1,21 @@
 import logging
 
-import httpx
 from fastapi import HTTPException
 
 from ..config import settings
 from .http_client import request_with_retry
+from .upstream import upstream_clients
 
 logger = logging.getLogger(__name__)
 
-DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
-
-client = httpx.AsyncClient(timeout=30.0)
+DIRECTIONS_URL = f"{settings.google_maps_base_url}/maps/api/directions/json"
 
 
 async def get_routes(origin: str, destination: str) -> dict:
     """Fetch all route alternatives from Google Directions API."""
     logger.info("Fetching directions: %s -> %s", origin, destination)
     response = await request_with_retry(
-        client,
+        upstream_clients.get("google"),
         "GET",
         DIRECTIONS_URL,
         params={
@@ -29,8 +27,11 @@ async def get_routes(origin: str, destination: str) -> dict:
         },
     )
     response.raise_for_status()
-    data = response.json()
+    return parse_directions(response.json())
+
 
+def parse_directions(data: dict) -> dict:
+    """Flatten a Directions API response into per-route step lists."""
     if data["status"] != "OK":
         raise HTTPException(
             status_code=400,
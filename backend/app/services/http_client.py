@@ -1,13 +1,179 @@
-"""HTTP client helpers with bounded retry behavior."""
+"""HTTP client helpers with bounded retry behavior.
+
+Retries are limited three ways: a fixed per-call schedule, a process-wide
+token-bucket retry budget, and a per-host circuit breaker. Together they
+keep an upstream brownout from multiplying our outbound traffic.
+
+Callers can also opt in to hedging: when an attempt is slower than the
+host's recent latency percentile, a duplicate is sent and the first
+response wins. Hedges are capped at a fixed fraction of requests.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import email.utils
+import random
+import time
+from collections import deque
+from typing import Literal
 
 import httpx
 
+from .. import deadline, timing
+from ..config import settings
+from ..metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS, UPSTREAM_HEDGES, UPSTREAM_RETRIES
+
 RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 BACKOFF_SCHEDULE_SECONDS = (0.2, 0.5)
+# A Retry-After longer than this is not worth holding the request for.
+MAX_RETRY_AFTER_SECONDS = 2.0
+
+CircuitState = Literal["closed", "open", "half_open"]
+_STATE_VALUES: dict[CircuitState, int] = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class RetryBudget:
+    """Token bucket shared by all retries in the process.
+
+    Each retry spends one token; tokens refill at ``refill_per_second`` up
+    to ``capacity``. First attempts are never limited.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self._capacity = capacity
+        self._refill = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._refill)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class HedgeBudget:
+    """Allows at most ``ratio`` hedges per request, with a small burst allowance."""
+
+    def __init__(self, ratio: float, capacity: float = 10.0):
+        self._ratio = ratio
+        self._capacity = capacity
+        self._tokens = 0.0
+
+    def record_request(self) -> None:
+        self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def try_acquire(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Recent successful-response latencies for one host."""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int) -> float | None:
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after consecutive failures, probes when half-open."""
+
+    def __init__(self, host: str, failure_threshold: int, reset_seconds: float):
+        self.host = host
+        self._threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.state: CircuitState = "closed"
+        CIRCUIT_STATE.labels(host=host).set(_STATE_VALUES["closed"])
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        CIRCUIT_STATE.labels(host=self.host).set(_STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(host=self.host, state=state).inc()
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self._reset_seconds:
+                return False
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._transition("closed")
+
+    def release(self) -> None:
+        """Give up a half-open probe slot without a verdict on the upstream."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self._threshold:
+            self._opened_at = time.monotonic()
+            self._transition("open")
+
+
+retry_budget = RetryBudget(settings.retry_budget_capacity, settings.retry_budget_refill_per_second)
+hedge_budget = HedgeBudget(settings.hedge_budget_ratio)
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[str, LatencyTracker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            host, settings.circuit_failure_threshold, settings.circuit_reset_seconds
+        )
+        _breakers[host] = breaker
+    return breaker
+
+
+def get_latency_tracker(host: str) -> LatencyTracker:
+    tracker = _latencies.get(host)
+    if tracker is None:
+        tracker = LatencyTracker()
+        _latencies[host] = tracker
+    return tracker
+
+
+def reset_resilience_state() -> None:
+    """Forget all breaker, budget and latency state (used by tests)."""
+    global retry_budget, hedge_budget
+    _breakers.clear()
+    _latencies.clear()
+    retry_budget = RetryBudget(settings.retry_budget_capacity, settings.retry_budget_refill_per_second)
+    hedge_budget = HedgeBudget(settings.hedge_budget_ratio)
 
 
 def _is_retryable_exception(exc: Exception) -> bool:
@@ -17,25 +183,176 @@ def _is_retryable_exception(exc: Exception) -> bool:
     )
 
 
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def _backoff_seconds(attempt: int, response: httpx.Response | None = None) -> float | None:
+    """Jittered delay before the next attempt, or None if we should not retry."""
+    base = BACKOFF_SCHEDULE_SECONDS[attempt]
+    delay = base / 2 + random.uniform(0, base / 2)
+    if response is not None:
+        retry_after = _retry_after_seconds(response)
+        if retry_after is not None:
+            if retry_after > MAX_RETRY_AFTER_SECONDS:
+                return None
+            delay = max(delay, retry_after)
+    return delay
+
+
+def _can_retry(host: str, breaker: CircuitBreaker, delay: float) -> bool:
+    left = deadline.time_left()
+    if left is not None and delay >= left:
+        UPSTREAM_RETRIES.labels(host=host, outcome="deadline").inc()
+        return False
+    if breaker.state == "open":
+        UPSTREAM_RETRIES.labels(host=host, outcome="circuit_open").inc()
+        return False
+    if not retry_budget.try_acquire():
+        UPSTREAM_RETRIES.labels(host=host, outcome="budget_exhausted").inc()
+        return False
+    UPSTREAM_RETRIES.labels(host=host, outcome="retried").inc()
+    return True
+
+
+async def _timed_request(
+    client: httpx.AsyncClient,
+    tracker: LatencyTracker,
+    method: str,
+    url: str,
+    **kwargs,
+) -> httpx.Response:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    tracker.record(time.perf_counter() - start)
+    return response
+
+
+async def _hedged_request(
+    client: httpx.AsyncClient,
+    host: str,
+    method: str,
+    url: str,
+    **kwargs,
+) -> httpx.Response:
+    """Send a request, duplicating it if it outlives the host's latency percentile."""
+    tracker = get_latency_tracker(host)
+    hedge_budget.record_request()
+    hedge_after = tracker.percentile(settings.hedge_percentile, settings.hedge_min_samples)
+
+    primary = asyncio.ensure_future(_timed_request(client, tracker, method, url, **kwargs))
+    if hedge_after is None:
+        return await primary
+
+    pending: set[asyncio.Future] = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return primary.result()
+        if not hedge_budget.try_acquire():
+            UPSTREAM_HEDGES.labels(host=host, outcome="budget_exhausted").inc()
+            return await primary
+
+        UPSTREAM_HEDGES.labels(host=host, outcome="sent").inc()
+        hedge = asyncio.ensure_future(_timed_request(client, tracker, method, url, **kwargs))
+        pending.add(hedge)
+        first_exc: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    outcome = "won" if task is hedge else "lost"
+                    UPSTREAM_HEDGES.labels(host=host, outcome=outcome).inc()
+                    return task.result()
+                first_exc = first_exc or exc
+        assert first_exc is not None
+        raise first_exc
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _cap_timeout(timeout: object, left: float) -> httpx.Timeout | float:
+    """Cap a per-call ``timeout`` (number, ``httpx.Timeout`` or ``None``) at ``left``."""
+    if isinstance(timeout, httpx.Timeout):
+        fields = (timeout.connect, timeout.read, timeout.write, timeout.pool)
+        connect, read, write, pool = (
+            left if field is None else min(field, left) for field in fields
+        )
+        return httpx.Timeout(connect=connect, read=read, write=write, pool=pool)
+    if isinstance(timeout, (int, float)):
+        return min(timeout, left)
+    return left
+
+
 async def request_with_retry(
     client: httpx.AsyncClient,
     method: str,
     url: str,
+    *,
+    hedge: bool = False,
     **kwargs,
 ) -> httpx.Response:
+    host = httpx.URL(url).host
+    breaker = get_breaker(host)
     retries = len(BACKOFF_SCHEDULE_SECONDS)
     for attempt in range(retries + 1):
+        left = deadline.time_left()
+        if left is not None:
+            if left <= 0:
+                raise httpx.TimeoutException(f"Request deadline exceeded before calling {host}")
+            # The request budget caps each attempt's timeout, including the
+            # client's own default when the caller did not pass one.
+            kwargs["timeout"] = _cap_timeout(kwargs.get("timeout", client.timeout), left)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}")
+        start = time.perf_counter()
         try:
-            response = await client.request(method, url, **kwargs)
+            if hedge:
+                response = await _hedged_request(client, host, method, url, **kwargs)
+            else:
+                response = await client.request(method, url, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            timing.record_upstream(host, time.perf_counter() - start, "cancelled")
+            raise
         except Exception as exc:
-            if not _is_retryable_exception(exc) or attempt >= retries:
+            timing.record_upstream(host, time.perf_counter() - start, type(exc).__name__)
+            if not _is_retryable_exception(exc):
+                breaker.release()
                 raise
-            await asyncio.sleep(BACKOFF_SCHEDULE_SECONDS[attempt])
+            breaker.record_failure()
+            if attempt >= retries:
+                raise
+            delay = _backoff_seconds(attempt)
+            if not _can_retry(host, breaker, delay):
+                raise
+            await asyncio.sleep(delay)
             continue
 
-        if response.status_code in RETRYABLE_STATUS_CODES and attempt < retries:
-            await asyncio.sleep(BACKOFF_SCHEDULE_SECONDS[attempt])
-            continue
-        return response
+        timing.record_upstream(host, time.perf_counter() - start, str(response.status_code))
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        if attempt >= retries:
+            return response
+        delay = _backoff_seconds(attempt, response)
+        if delay is None or not _can_retry(host, breaker, delay):
+            return response
+        await asyncio.sleep(delay)
 
     raise RuntimeError("request_with_retry reached unreachable state")
@@ -0,0 +1,111 @@
+"""Micro-batching for model inference across concurrent requests."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from ..metrics import (
+    INFERENCE_BATCH_REQUESTS,
+    INFERENCE_BATCH_ROWS,
+    INFERENCE_BATCH_WAIT_SECONDS,
+)
+from .offload import offload
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBatcher:
+    """Collect feature rows for ``window_seconds`` and predict them in one call.
+
+    Each caller awaits its own slice of the batch result. A batch is flushed
+    early once it holds ``max_rows`` rows. Callers name the model to predict
+    with, and ``predict_fn(model, matrix)`` is called once per distinct model
+    in the batch, so rows queued across a hot-swap are never scored by a
+    model their caller did not pick. ``predict_fn`` runs through
+    ``offload.run_in_thread("inference", ...)``, the same path an unbatched
+    prediction takes, so a flush never blocks the event loop while the
+    inference thread pool is enabled.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[Any, np.ndarray], np.ndarray],
+        window_seconds: float,
+        max_rows: int = 256,
+    ):
+        self._predict_fn = predict_fn
+        self._window = window_seconds
+        self._max_rows = max_rows
+        self._pending: list[tuple[Any, np.ndarray, asyncio.Future, float]] = []
+        self._pending_rows = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Flushes in progress; held so the tasks are not garbage collected.
+        self._flushing: set[asyncio.Task] = set()
+
+    async def predict(self, model: Any, rows: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((model, rows, future, time.perf_counter()))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self._max_rows:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        self._pending_rows = 0
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        for _, _, _, enqueued in batch:
+            INFERENCE_BATCH_WAIT_SECONDS.observe(now - enqueued)
+        INFERENCE_BATCH_ROWS.observe(sum(len(rows) for _, rows, _, _ in batch))
+        INFERENCE_BATCH_REQUESTS.observe(len(batch))
+
+        # Group by model identity; a hot-swap mid-window splits the batch.
+        groups: dict[int, tuple[Any, list[tuple[np.ndarray, asyncio.Future]]]] = {}
+        for model, rows, future, _ in batch:
+            groups.setdefault(id(model), (model, []))[1].append((rows, future))
+
+        for model, entries in groups.values():
+            task = asyncio.get_running_loop().create_task(
+                self._predict_group(model, entries)
+            )
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _predict_group(
+        self, model: Any, entries: list[tuple[np.ndarray, asyncio.Future]]
+    ) -> None:
+        matrix = np.vstack([rows for rows, _ in entries])
+        try:
+            predictions = await offload.run_in_thread(
+                "inference", self._predict_fn, model, matrix
+            )
+        except Exception as exc:
+            logger.warning("Batched prediction failed: %s", exc)
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        offset = 0
+        for rows, future in entries:
+            end = offset + len(rows)
+            if not future.done():
+                future.set_result(predictions[offset:end])
+            offset = end
@@ -0,0 +1,191 @@
+"""Versioned route-model registry with background hot reload."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ..metrics import MODEL_INFO, MODEL_RELOADS
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 9
+ARTIFACT_GLOB = "*.joblib"
+
+# Fastest route, clear weather: every valid model must score this finitely.
+_PROBE_ROW = np.array([[1.0, 0.0, 0.0, 5.0, 5.0, 0.0, 0.0, 0.0, 0.0]])
+
+
+class ModelUnavailableError(RuntimeError):
+    """No route model is active and the last attempt to load one failed."""
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: Any
+    version: str
+    path: Path
+    mtime: float
+
+
+def artifact_version(path: Path) -> str:
+    """Version string for an artifact: file stem plus a short content hash."""
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    return f"{path.stem}-{digest}"
+
+
+def load_artifact(path: Path) -> LoadedModel:
+    """Load and validate a model artifact. Raises on anything unusable."""
+    # joblib.load pulls in scikit-learn, which dominates import time; keep it
+    # off the import path until a model is actually needed.
+    import joblib
+
+    mtime = path.stat().st_mtime
+    version = artifact_version(path)
+    model = joblib.load(path)
+
+    n_features = getattr(model, "n_features_in_", N_FEATURES)
+    if n_features != N_FEATURES:
+        raise ValueError(f"Model expects {n_features} features, not {N_FEATURES}")
+
+    prediction = np.asarray(model.predict(_PROBE_ROW))
+    if prediction.shape != (1,) or not np.isfinite(prediction).all():
+        raise ValueError(f"Model returned an invalid probe prediction: {prediction!r}")
+
+    return LoadedModel(model=model, version=version, path=path, mtime=mtime)
+
+
+class ModelRegistry:
+    """Holds the active route model and swaps in new artifacts atomically.
+
+    Loading and validation happen on a background thread; requests keep
+    using the current model until the new one is fully ready, at which
+    point a single reference assignment makes it active.
+    """
+
+    def __init__(self, default_path: Path, model_dir: Path | None = None):
+        self._default_path = default_path
+        self._model_dir = model_dir
+        self._active: LoadedModel | None = None
+        self._rejected: tuple[Path, float] | None = None
+        self._load_error: str | None = None
+        self._reload_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: threading.Thread | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._active is not None
+
+    @property
+    def active(self) -> LoadedModel:
+        """The active model, loading the latest artifact on first use."""
+        if self._active is None:
+            self.load()
+        return self._active
+
+    @property
+    def version(self) -> str:
+        return self.active.version
+
+    async def ensure_loaded(self) -> LoadedModel:
+        """The active model for async callers; never loads on the event loop.
+
+        After a failed load this raises ``ModelUnavailableError`` at once
+        instead of retrying per request; a successful reload (watcher or
+        admin endpoint) clears the failure.
+        """
+        if self._active is not None:
+            return self._active
+        if self._load_error is not None:
+            raise ModelUnavailableError(self._load_error)
+        await asyncio.to_thread(self.load)
+        return self._active
+
+    def predict(self, feature_matrix: np.ndarray) -> np.ndarray:
+        return self.active.model.predict(feature_matrix)
+
+    def latest_artifact(self) -> Path:
+        """Newest artifact in the model directory, or the bundled default."""
+        if self._model_dir is not None and self._model_dir.is_dir():
+            candidates = sorted(
+                self._model_dir.glob(ARTIFACT_GLOB),
+                key=lambda p: p.stat().st_mtime,
+            )
+            if candidates:
+                return candidates[-1]
+        return self._default_path
+
+    def load(self) -> None:
+        """Synchronously load the latest artifact unless a model is already active."""
+        with self._load_lock:
+            if self._active is not None:
+                return
+            if not self.reload_now():
+                self._load_error = f"Could not load route model from {self.latest_artifact()}"
+                raise ModelUnavailableError(self._load_error)
+
+    def reload_now(self, path: Path | None = None) -> bool:
+        """Load, validate and activate an artifact. Returns True on success."""
+        path = path or self.latest_artifact()
+        with self._reload_lock:
+            try:
+                loaded = load_artifact(path)
+            except Exception as exc:
+                self._rejected = (path, path.stat().st_mtime) if path.exists() else None
+                MODEL_RELOADS.labels(result="failed").inc()
+                logger.warning("Rejected model artifact %s: %s", path, exc)
+                return False
+
+            previous, self._active = self._active, loaded
+            self._load_error = None
+            if previous is not None:
+                MODEL_INFO.labels(version=previous.version).set(0)
+            MODEL_INFO.labels(version=loaded.version).set(1)
+            MODEL_RELOADS.labels(result="loaded").inc()
+            logger.info("Activated route model %s from %s", loaded.version, path)
+            return True
+
+    def reload_in_background(self, path: Path | None = None) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.reload_now, args=(path,), name="model-reload", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def start_watching(self, interval_seconds: float) -> None:
+        """Poll the model directory and hot-reload when a newer artifact appears."""
+        if self._model_dir is None or interval_seconds <= 0 or self._watch_thread:
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch, args=(interval_seconds,), name="model-watch", daemon=True
+        )
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    def _watch(self, interval_seconds: float) -> None:
+        while not self._watch_stop.wait(interval_seconds):
+            try:
+                latest = self.latest_artifact()
+                mtime = latest.stat().st_mtime
+                current = self._active
+                if self._rejected == (latest, mtime):
+                    continue
+                if current is None or (latest, mtime) != (current.path, current.mtime):
+                    self.reload_now(latest)
+            except Exception:
+                logger.exception("Model directory watch failed")
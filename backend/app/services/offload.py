@@ -0,0 +1,134 @@
+"""Run CPU-bound pipeline stages off the event loop.
+
+Two optional pools:
+
+* a thread pool for sampling/dedup glue and NumPy/scikit-learn work that
+  shares the request's objects in place (nothing is copied), and
+* a process pool for pure-Python sampling, which otherwise holds the GIL.
+  It is only handed polyline steps and returns plain coordinate tuples, so
+  no large object graph crosses the process boundary.
+
+Each pool has a bounded queue: once ``queue_size`` calls are in flight,
+further callers wait for a slot instead of piling work onto the executor.
+With no pools configured every call runs inline on the loop, exactly as
+before. Time spent running work in a pool is counted in
+``route_weather_offload_saved_seconds_total`` as loop time saved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from ..config import settings
+from ..metrics import OFFLOAD_QUEUE_WAIT_SECONDS, OFFLOAD_SAVED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _noop() -> None:
+    return None
+
+
+class OffloadPools:
+    def __init__(self, threads: int, processes: int, queue_size: int):
+        self.threads = threads
+        self.processes = processes
+        self.queue_size = max(queue_size, 1)
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def threads_enabled(self) -> bool:
+        return self.threads > 0
+
+    @property
+    def processes_enabled(self) -> bool:
+        return self.processes > 0
+
+    def start(self) -> None:
+        if self.threads_enabled and self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="offload"
+            )
+        if self.processes_enabled and self._process_pool is None:
+            # spawn, not fork: the parent already runs logging and watchdog threads.
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            for _ in range(self.processes):
+                self._process_pool.submit(_noop)
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        self._slots.clear()
+
+    async def _submit(
+        self,
+        pool: str,
+        executor: Executor,
+        stage: str,
+        call: Callable[[], tuple[T, float]],
+    ) -> T:
+        slots = self._slots.get(pool)
+        if slots is None:
+            slots = self._slots[pool] = asyncio.Semaphore(self.queue_size)
+        loop = asyncio.get_running_loop()
+        queued = time.perf_counter()
+        async with slots:
+            OFFLOAD_QUEUE_WAIT_SECONDS.labels(pool=pool).observe(time.perf_counter() - queued)
+            result, seconds = await loop.run_in_executor(executor, call)
+        OFFLOAD_SAVED_SECONDS.labels(stage=stage, pool=pool).inc(seconds)
+        return result
+
+    async def run_in_thread(self, stage: str, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` in the thread pool, or inline when it is disabled."""
+        if self.threads_enabled and self._thread_pool is None:
+            self.start()
+        if self._thread_pool is None:
+            return fn(*args)
+        # Keep the request ID and trace visible to logging inside the worker.
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, _timed, fn, *args)
+        return await self._submit("thread", self._thread_pool, stage, call)
+
+    async def run_in_process(self, stage: str, fn: Callable[..., T], *args: Any) -> T:
+        """Run picklable ``fn(*args)`` in the process pool.
+
+        Falls back to the thread pool (or inline) when no processes are
+        configured.
+        """
+        if self.processes_enabled and self._process_pool is None:
+            self.start()
+        if self._process_pool is None:
+            return await self.run_in_thread(stage, fn, *args)
+        call = functools.partial(_timed, fn, *args)
+        return await self._submit("process", self._process_pool, stage, call)
+
+
+offload = OffloadPools(
+    threads=settings.offload_threads,
+    processes=settings.offload_processes,
+    queue_size=settings.offload_queue_size,
+)
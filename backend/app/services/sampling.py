@@ -27,30 +27,24 @@ def _interpolate(p1: tuple, p2: tuple, fraction: float) -> tuple:
     )
 
 
-def sample_route_points(
-    steps: list[dict],
-    departure_time: datetime,
-) -> list[Waypoint]:
-    """Sample waypoints along the route at 15-minute intervals.
+SampledPoint = tuple[float, float, float]  # lat, lng, seconds from start
+
+
+def sample_route_offsets(steps: list[dict]) -> list[SampledPoint]:
+    """Sample (lat, lng, seconds from start) along the route every 15 minutes.
 
     Walks through each step's decoded polyline, tracking cumulative elapsed
     time. When a 15-minute boundary is crossed, the exact position is
-    interpolated within that polyline segment.
+    interpolated within that polyline segment. Plain tuples keep the result
+    cheap to send back from a worker process.
     """
     if not steps:
         return []
 
     # Always include the starting point
     first_step = steps[0]
-    waypoints = [
-        Waypoint(
-            location=LatLng(
-                lat=first_step["start_location"]["lat"],
-                lng=first_step["start_location"]["lng"],
-            ),
-            minutes_from_start=0,
-            estimated_time=departure_time,
-        )
+    points: list[SampledPoint] = [
+        (first_step["start_location"]["lat"], first_step["start_location"]["lng"], 0.0)
     ]
 
     elapsed_seconds = 0.0
@@ -85,34 +79,40 @@ def sample_route_points(
                 fraction = max(0.0, min(1.0, fraction))
 
                 point = _interpolate(p1, p2, fraction)
-                minutes = int(next_threshold // 60)
-
-                waypoints.append(
-                    Waypoint(
-                        location=LatLng(lat=point[0], lng=point[1]),
-                        minutes_from_start=minutes,
-                        estimated_time=departure_time
-                        + timedelta(seconds=next_threshold),
-                    )
-                )
+                points.append((point[0], point[1], float(next_threshold)))
                 next_threshold += INTERVAL_SECONDS
 
             elapsed_seconds = segment_end_elapsed
 
     # Always include the ending point
     last_step = steps[-1]
-    total_minutes = int(elapsed_seconds // 60)
-    if not waypoints or waypoints[-1].minutes_from_start != total_minutes:
-        waypoints.append(
-            Waypoint(
-                location=LatLng(
-                    lat=last_step["end_location"]["lat"],
-                    lng=last_step["end_location"]["lng"],
-                ),
-                minutes_from_start=total_minutes,
-                estimated_time=departure_time
-                + timedelta(seconds=elapsed_seconds),
-            )
+    if int(points[-1][2] // 60) != int(elapsed_seconds // 60):
+        points.append(
+            (last_step["end_location"]["lat"], last_step["end_location"]["lng"], elapsed_seconds)
+        )
+
+    return points
+
+
+def sample_routes_offsets(steps_per_route: list[list[dict]]) -> list[list[SampledPoint]]:
+    """``sample_route_offsets`` for several routes in one call (one worker hop)."""
+    return [sample_route_offsets(steps) for steps in steps_per_route]
+
+
+def build_waypoints(points: list[SampledPoint], departure_time: datetime) -> list[Waypoint]:
+    return [
+        Waypoint(
+            location=LatLng(lat=lat, lng=lng),
+            minutes_from_start=int(seconds // 60),
+            estimated_time=departure_time + timedelta(seconds=seconds),
         )
+        for lat, lng, seconds in points
+    ]
 
-    return waypoints
+
+def sample_route_points(
+    steps: list[dict],
+    departure_time: datetime,
+) -> list[Waypoint]:
+    """Sample waypoints along the route at 15-minute intervals."""
+    return build_waypoints(sample_route_offsets(steps), departure_time)
@@ -3,15 +3,24 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import hashlib
+import hmac
+import json
 import logging
+import secrets
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Literal
 
 import httpx
-import joblib
 import numpy as np
 
+from .. import deadline, timing
 from ..config import settings
 from ..models import (
+    LatLng,
     RouteRecommendation,
     RouteScore,
     RouteWithWeather,
@@ -19,12 +28,24 @@ from ..models import (
     WeatherAdvisory,
     WeatherData,
 )
+from .cache.base import DEFAULT_TTL
+from .cache.memory import TTLCache
+from .inference import InferenceBatcher
+from .model_registry import LoadedModel, ModelRegistry
+from .offload import offload
+from .upstream import upstream_clients
 
 logger = logging.getLogger(__name__)
 
-GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+GEOCODE_URL = f"{settings.google_maps_base_url}/maps/api/geocode/json"
 
-geocode_client = httpx.AsyncClient(timeout=10.0)
+GEOCODE_TIMEOUT_SECONDS = 10.0
+# Below this much request budget, advisories keep coordinates instead of names.
+GEOCODE_MIN_SECONDS = 0.5
+
+# Shared across all routes and requests so overlapping alternatives cannot
+# open an unbounded burst of geocode connections.
+_geocode_semaphore = asyncio.Semaphore(5)
 
 # ---------------------------------------------------------------------------
 # WMO code → severity (0.0 = benign, 1.0 = extreme)
@@ -61,15 +82,45 @@ WMO_SEVERITY: dict[int, float] = {
 }
 
 # ---------------------------------------------------------------------------
-# Load the pre-trained model once at import time
+# Load the pre-trained model once at import time; the registry can hot-swap it
 # ---------------------------------------------------------------------------
 _MODEL_PATH = Path(__file__).resolve().parent.parent / "ml" / "route_model.joblib"
-try:
-    _model = joblib.load(_MODEL_PATH)
-except FileNotFoundError:
+if not _MODEL_PATH.is_file() and not settings.model_dir:
     raise RuntimeError(
         f"ML model not found at {_MODEL_PATH}. Run: python -m app.ml.train_model"
     )
+# Loaded during the startup warm-up, or on first use.
+model_registry = ModelRegistry(
+    _MODEL_PATH,
+    Path(settings.model_dir) if settings.model_dir else None,
+)
+
+
+def _predict_rows(loaded: LoadedModel, feature_matrix: np.ndarray) -> np.ndarray:
+    return loaded.model.predict(feature_matrix)
+
+
+# Optional cross-request micro-batching (INFERENCE_BATCH_WINDOW_MS > 0).
+_batcher: InferenceBatcher | None = (
+    InferenceBatcher(
+        _predict_rows,
+        settings.inference_batch_window_ms / 1000,
+        max_rows=settings.inference_batch_max_rows,
+    )
+    if settings.inference_batch_window_ms > 0
+    else None
+)
+
+
+async def _predict_scores(
+    loaded: LoadedModel, feature_matrix: np.ndarray
+) -> np.ndarray:
+    """Predict with ``loaded`` itself, never whatever model is active by then."""
+    if _batcher is not None:
+        return await _batcher.predict(loaded, feature_matrix)
+    return await offload.run_in_thread(
+        "inference", _predict_rows, loaded, feature_matrix
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -121,12 +172,32 @@ def _format_coords(lat: float, lng: float) -> str:
     return f"{abs(lat):.1f}\u00b0{ns}, {abs(lng):.1f}\u00b0{ew}"
 
 
+async def _geocode_point(lat: float, lng: float) -> httpx.Response:
+    async with _geocode_semaphore:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await upstream_clients.get("google").get(
+                GEOCODE_URL,
+                params={
+                    "latlng": f"{lat},{lng}",
+                    "key": settings.google_maps_api_key,
+                },
+                timeout=deadline.clamp_timeout(GEOCODE_TIMEOUT_SECONDS),
+            )
+            outcome = str(response.status_code)
+            return response
+        finally:
+            timing.record_upstream("geocode", time.perf_counter() - start, outcome)
+
+
 async def _reverse_geocode_batch(
     coords: list[tuple[float, float]],
 ) -> dict[tuple[float, float], str]:
     """Reverse-geocode a list of (lat, lng) pairs to 'Town, State' strings.
 
-    Deduplicates by rounding to 2 decimal places (~1.1 km).
+    Deduplicates by rounding to 2 decimal places (~1.1 km) and limits the
+    number of in-flight geocode requests with a shared semaphore.
     Falls back to formatted coordinates when geocoding fails.
     """
     # Deduplicate by rounded coords
@@ -138,19 +209,8 @@ async def _reverse_geocode_batch(
 
     results: dict[tuple[float, float], str] = {}
 
-    tasks = []
-    keys = []
-    for key, (lat, lng) in unique.items():
-        keys.append(key)
-        tasks.append(
-            geocode_client.get(
-                GEOCODE_URL,
-                params={
-                    "latlng": f"{lat},{lng}",
-                    "key": settings.google_maps_api_key,
-                },
-            )
-        )
+    keys = list(unique.keys())
+    tasks = [_geocode_point(lat, lng) for lat, lng in unique.values()]
     responses = await asyncio.gather(*tasks, return_exceptions=True)
 
     for key, resp in zip(keys, responses):
@@ -206,109 +266,330 @@ async def _reverse_geocode_batch(
 # Advisory generation (rule-based)
 # ---------------------------------------------------------------------------
 
-def _check_advisory_conditions(
-    wp: Waypoint,
-) -> list[tuple[str, str, str]]:
-    """Return list of (type, severity, message_template) for a single waypoint."""
-    w = wp.weather
-    if w is None:
-        return []
-
-    triggered: list[tuple[str, str, str]] = []
-
-    checks: list[tuple[str, str, bool, str]] = [
-        (
-            "heavy_rain", "danger",
-            w.weather_code in (65, 82) or w.precipitation_mm >= 7.5,
-            "Heavy rain expected near {loc}",
-        ),
-        (
-            "moderate_rain", "warning",
-            w.weather_code in (63, 81) or (4.0 <= w.precipitation_mm < 7.5),
-            "Moderate rain expected near {loc}",
-        ),
-        (
-            "freezing_rain", "danger",
-            w.weather_code in (56, 57, 66, 67),
-            "Freezing rain/drizzle near {loc} \u2014 road ice likely",
-        ),
-        (
-            "heavy_snow", "danger",
-            w.weather_code in (73, 75, 86),
-            "Heavy snow expected near {loc}",
-        ),
-        (
-            "snow", "warning",
-            w.weather_code in (71, 77, 85),
-            "Snow expected near {loc}",
-        ),
-        (
-            "high_wind", "danger",
-            w.wind_speed_kmh >= 75,
-            f"Dangerous winds ({round(w.wind_speed_kmh)} km/h) near {{loc}}",
-        ),
-        (
-            "high_wind", "warning",
-            50 <= w.wind_speed_kmh < 75,
-            f"Strong winds ({round(w.wind_speed_kmh)} km/h) near {{loc}}",
-        ),
-        (
-            "thunderstorm", "danger",
-            w.weather_code == 95,
-            "Thunderstorm expected near {loc}",
-        ),
-        (
-            "hail", "danger",
-            w.weather_code in (96, 99),
-            "Thunderstorm with hail near {loc}",
-        ),
-        (
-            "fog", "warning",
-            w.weather_code in (45, 48),
-            "Fog near {loc} \u2014 reduced visibility",
-        ),
+@dataclass(frozen=True)
+class AdvisoryRule:
+    """Declarative advisory trigger.
+
+    A rule fires when the waypoint's weather code is in ``codes`` or when
+    ``field`` lies in the half-open range ``[min_value, max_value)``.
+    Templates are formatted only for triggering rows, with ``{loc}`` and
+    ``{wind}`` (rounded km/h) available.
+    """
+
+    type: str
+    severity: Literal["warning", "danger"]
+    template: str
+    codes: tuple[int, ...] = ()
+    field: str | None = None
+    min_value: float = -np.inf
+    max_value: float = np.inf
+
+    def matches(self, weather: WeatherData) -> bool:
+        """Scalar form of the mask built in ``_evaluate_advisory_rules``."""
+        if weather.weather_code in self.codes:
+            return True
+        if self.field is None:
+            return False
+        return self.min_value <= getattr(weather, self.field) < self.max_value
+
+
+ADVISORY_RULES: tuple[AdvisoryRule, ...] = (
+    AdvisoryRule(
+        "heavy_rain", "danger", "Heavy rain expected near {loc}",
+        codes=(65, 82), field="precipitation_mm", min_value=7.5,
+    ),
+    AdvisoryRule(
+        "moderate_rain", "warning", "Moderate rain expected near {loc}",
+        codes=(63, 81), field="precipitation_mm", min_value=4.0, max_value=7.5,
+    ),
+    AdvisoryRule(
+        "freezing_rain", "danger",
+        "Freezing rain/drizzle near {loc} \u2014 road ice likely",
+        codes=(56, 57, 66, 67),
+    ),
+    AdvisoryRule(
+        "heavy_snow", "danger", "Heavy snow expected near {loc}",
+        codes=(73, 75, 86),
+    ),
+    AdvisoryRule(
+        "snow", "warning", "Snow expected near {loc}",
+        codes=(71, 77, 85),
+    ),
+    AdvisoryRule(
+        "high_wind", "danger", "Dangerous winds ({wind} km/h) near {loc}",
+        field="wind_speed_kmh", min_value=75,
+    ),
+    AdvisoryRule(
+        "high_wind", "warning", "Strong winds ({wind} km/h) near {loc}",
+        field="wind_speed_kmh", min_value=50, max_value=75,
+    ),
+    AdvisoryRule(
+        "thunderstorm", "danger", "Thunderstorm expected near {loc}",
+        codes=(95,),
+    ),
+    AdvisoryRule(
+        "hail", "danger", "Thunderstorm with hail near {loc}",
+        codes=(96, 99),
+    ),
+    AdvisoryRule(
+        "fog", "warning", "Fog near {loc} \u2014 reduced visibility",
+        codes=(45, 48),
+    ),
+)
+
+_RULE_COLUMNS = ("weather_code", "precipitation_mm", "wind_speed_kmh")
+_RULE_INDEX = {rule: i for i, rule in enumerate(ADVISORY_RULES)}
+
+# A triggered rule with what its message needs: the location and wind speed.
+AdvisoryHit = tuple[AdvisoryRule, LatLng, float]
+
+
+def _advisory_hits(
+    triggered_per_route: list[list[tuple[AdvisoryRule, Waypoint]]],
+) -> list[list[AdvisoryHit]]:
+    return [
+        [(rule, wp.location, wp.weather.wind_speed_kmh) for rule, wp in triggered]
+        for triggered in triggered_per_route
     ]
 
-    for adv_type, severity, condition, template in checks:
-        if condition:
-            triggered.append((adv_type, severity, template))
-
-    return triggered
-
-
-async def _collect_advisories(waypoints: list[Waypoint]) -> list[WeatherAdvisory]:
-    """Generate weather advisories with location names for a route's waypoints."""
-    # First pass: find which waypoints trigger advisories (dedup by type+severity)
-    seen: set[tuple[str, str]] = set()
-    pending: list[tuple[str, str, str, float, float]] = []  # type, severity, template, lat, lng
-
-    for wp in waypoints:
-        triggered = _check_advisory_conditions(wp)
-        for adv_type, severity, template in triggered:
-            if (adv_type, severity) not in seen:
-                seen.add((adv_type, severity))
-                pending.append((
-                    adv_type, severity, template,
-                    wp.location.lat, wp.location.lng,
-                ))
-
-    if not pending:
-        return []
-
-    # Batch reverse-geocode all advisory locations
-    coords = [(lat, lng) for _, _, _, lat, lng in pending]
-    location_names = await _reverse_geocode_batch(coords)
-
-    # Build advisories with resolved location names
-    advisories: list[WeatherAdvisory] = []
-    for adv_type, severity, template, lat, lng in pending:
-        loc_name = location_names.get((lat, lng), "unknown location")
-        message = template.format(loc=loc_name)
-        advisories.append(
-            WeatherAdvisory(type=adv_type, severity=severity, message=message)
+
+# Below this many waypoints in total, checking rules row by row beats
+# building the columns (about 80 for a typical set of short alternatives).
+ADVISORY_SCALAR_MAX_WAYPOINTS = 96
+
+
+def _evaluate_advisory_rules(
+    waypoint_lists: list[list[Waypoint]],
+) -> list[list[tuple[AdvisoryRule, Waypoint]]]:
+    """Return the first triggering waypoint for each rule, per route."""
+    if sum(len(waypoints) for waypoints in waypoint_lists) < ADVISORY_SCALAR_MAX_WAYPOINTS:
+        return _evaluate_rules_by_row(waypoint_lists)
+    return _evaluate_rules_by_column(waypoint_lists)
+
+
+def _evaluate_rules_by_row(
+    waypoint_lists: list[list[Waypoint]],
+) -> list[list[tuple[AdvisoryRule, Waypoint]]]:
+    """Scan each route once per rule, stopping at the first match."""
+    results: list[list[tuple[AdvisoryRule, Waypoint]]] = []
+    for waypoints in waypoint_lists:
+        triggered = []
+        for rule in ADVISORY_RULES:
+            hit = next(
+                (wp for wp in waypoints if wp.weather is not None and rule.matches(wp.weather)),
+                None,
+            )
+            if hit is not None:
+                triggered.append((rule, hit))
+        results.append(triggered)
+    return results
+
+
+def _evaluate_rules_by_column(
+    waypoint_lists: list[list[Waypoint]],
+) -> list[list[tuple[AdvisoryRule, Waypoint]]]:
+    """Evaluate each rule as one boolean mask over weather columns.
+
+    Weather for every waypoint of every route is laid out as columns, so
+    only the rows that actually trigger are touched again in Python.
+    """
+    flat: list[Waypoint] = []
+    route_ids: list[int] = []
+    for route_id, waypoints in enumerate(waypoint_lists):
+        for wp in waypoints:
+            if wp.weather is not None:
+                flat.append(wp)
+                route_ids.append(route_id)
+
+    results: list[list[tuple[AdvisoryRule, Waypoint]]] = [[] for _ in waypoint_lists]
+    if not flat:
+        return results
+
+    columns = {
+        name: np.fromiter(
+            (getattr(wp.weather, name) for wp in flat), dtype=float, count=len(flat)
         )
+        for name in _RULE_COLUMNS
+    }
+    route_id_arr = np.asarray(route_ids)
+
+    for rule in ADVISORY_RULES:
+        mask = np.zeros(len(flat), dtype=bool)
+        if rule.codes:
+            mask |= np.isin(columns["weather_code"], rule.codes)
+        if rule.field is not None:
+            values = columns[rule.field]
+            mask |= (values >= rule.min_value) & (values < rule.max_value)
+
+        hits = np.flatnonzero(mask)
+        if hits.size == 0:
+            continue
+        # Waypoints are laid out route by route, so the first hit for each
+        # route id is that route's first triggering waypoint.
+        hit_routes, first = np.unique(route_id_arr[hits], return_index=True)
+        for route_id, pos in zip(hit_routes.tolist(), hits[first].tolist()):
+            results[route_id].append((rule, flat[pos]))
+
+    return results
+
+
+def _build_advisories(
+    hits_per_route: list[list[AdvisoryHit]],
+    location_names: dict[tuple[float, float], str],
+) -> list[list[WeatherAdvisory]]:
+    """Format triggered rules into advisories, falling back to coordinates."""
+    all_advisories: list[list[WeatherAdvisory]] = []
+    for hits in hits_per_route:
+        advisories: list[WeatherAdvisory] = []
+        for rule, location, wind in hits:
+            lat, lng = location.lat, location.lng
+            loc_name = location_names.get((lat, lng)) or _format_coords(lat, lng)
+            message = rule.template.format(loc=loc_name, wind=round(wind))
+            advisories.append(
+                WeatherAdvisory(
+                    type=rule.type,
+                    severity=rule.severity,
+                    message=message,
+                    location=location,
+                )
+            )
+        advisories.sort(key=lambda a: (0 if a.severity == "danger" else 1, a.type))
+        all_advisories.append(advisories)
+
+    return all_advisories
+
+
+async def _resolve_advisories(
+    hits_per_route: list[list[AdvisoryHit]],
+) -> list[list[WeatherAdvisory]]:
+    """Reverse-geocode every advisory location in one batch and format messages."""
+    coords = [
+        (location.lat, location.lng)
+        for hits in hits_per_route
+        for _, location, _ in hits
+    ]
+    if not coords:
+        return [[] for _ in hits_per_route]
+
+    left = deadline.time_left()
+    if left is not None and left < GEOCODE_MIN_SECONDS:
+        deadline.mark_degraded("geocoding_skipped")
+        return _build_advisories(hits_per_route, {})
+
+    try:
+        with timing.stage("geocoding"):
+            location_names = await asyncio.wait_for(_reverse_geocode_batch(coords), left)
+    except asyncio.TimeoutError:
+        deadline.mark_degraded("geocoding_skipped")
+        location_names = {}
+    return _build_advisories(hits_per_route, location_names)
+
+
+async def _collect_advisories(
+    waypoint_lists: list[list[Waypoint]],
+) -> list[list[WeatherAdvisory]]:
+    """Generate weather advisories with location names for every route.
+
+    Advisory locations from all routes are reverse-geocoded in a single
+    batch, so a storm shared by overlapping alternatives is looked up once.
+    """
+    return await _resolve_advisories(_advisory_hits(_evaluate_advisory_rules(waypoint_lists)))
+
+
+# ---------------------------------------------------------------------------
+# Deferred advisory location resolution
+# ---------------------------------------------------------------------------
+
+# Tokens are self-contained: the triggered rules, coordinates and wind
+# speeds, signed with ADVISORY_TOKEN_SECRET. Any worker or replica sharing
+# the secret can resolve a token, whichever one built the response. They
+# stay valid for a full cache TTL after the last moment the response they
+# came with can still be served from the route cache.
+ADVISORY_TOKEN_TTL = 2 * DEFAULT_TTL
+_SIGNATURE_BYTES = 16
+# Without a configured secret tokens only resolve in the issuing process.
+_process_token_key = secrets.token_bytes(32)
+
+# token -> advisories with location names, so repeated lookups on the
+# same worker do not geocode again.
+_resolved_advisories = TTLCache(ttl=DEFAULT_TTL, max_entries=1000)
+
+
+def _token_key() -> bytes:
+    secret = settings.advisory_token_secret
+    return secret.encode() if secret else _process_token_key
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
 
-    advisories.sort(key=lambda a: (0 if a.severity == "danger" else 1, a.type))
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(_token_key(), payload.encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:_SIGNATURE_BYTES])
+
+
+def _encode_advisory_token(hits_per_route: list[list[AdvisoryHit]], expires_at: float) -> str:
+    body = [
+        int(expires_at),
+        [
+            [[_RULE_INDEX[rule], location.lat, location.lng, round(wind)] for rule, location, wind in hits]
+            for hits in hits_per_route
+        ],
+    ]
+    payload = _b64encode(json.dumps(body, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def _decode_advisory_token(token: str, now: float | None = None) -> list[list[AdvisoryHit]] | None:
+    """The hits in ``token``, or None if it is malformed, forged or expired."""
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        expires_at, routes = json.loads(_b64decode(payload))
+        if expires_at <= (time.time() if now is None else now):
+            return None
+        return [
+            [
+                (ADVISORY_RULES[index], LatLng(lat=lat, lng=lng), float(wind))
+                for index, lat, lng, wind in hits
+            ]
+            for hits in routes
+        ]
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def _defer_advisories(
+    waypoint_lists: list[list[Waypoint]],
+) -> tuple[list[list[WeatherAdvisory]], str | None]:
+    """Build coordinate-labelled advisories and a token to resolve names later."""
+    hits_per_route = _advisory_hits(_evaluate_advisory_rules(waypoint_lists))
+    advisories = _build_advisories(hits_per_route, {})
+    if not any(hits_per_route):
+        return advisories, None
+    return advisories, _encode_advisory_token(hits_per_route, time.time() + ADVISORY_TOKEN_TTL)
+
+
+async def resolve_advisory_locations(token: str) -> list[list[WeatherAdvisory]] | None:
+    """Return advisories with location names for a deferred token.
+
+    Returns None when the token is invalid or has expired.
+    """
+    hits_per_route = _decode_advisory_token(token)
+    if hits_per_route is None:
+        return None
+    resolved = _resolved_advisories.get(token)
+    if resolved is not None:
+        return resolved
+
+    advisories = await _resolve_advisories(hits_per_route)
+    _resolved_advisories.set(token, advisories)
     return advisories
 
 
@@ -346,6 +627,18 @@ def _generate_reason(
 # Main entry point
 # ---------------------------------------------------------------------------
 
+async def warm_up(routes: list[RouteWithWeather]) -> None:
+    """Run feature extraction, inference and advisory rules once, discarding
+    the results, so the first real request does not pay their first-use costs.
+
+    Unlike ``score_routes`` it never geocodes or issues advisory tokens.
+    """
+    min_duration = min(r.total_duration_minutes for r in routes)
+    feature_matrix = np.array([extract_features(r, min_duration) for r in routes])
+    await _predict_scores(await model_registry.ensure_loaded(), feature_matrix)
+    _evaluate_advisory_rules([r.waypoints for r in routes])
+
+
 async def score_routes(routes: list[RouteWithWeather]) -> RouteRecommendation:
     """Score all routes with the ML model and generate advisories."""
     if not routes:
@@ -354,22 +647,30 @@ async def score_routes(routes: list[RouteWithWeather]) -> RouteRecommendation:
     min_duration = min(r.total_duration_minutes for r in routes)
 
     # Extract features and predict
-    feature_matrix = np.array(
-        [extract_features(r, min_duration) for r in routes]
-    )
-    predicted_scores = _model.predict(feature_matrix)
+    with timing.stage("inference"):
+        feature_matrix = await offload.run_in_thread(
+            "features",
+            lambda: np.array([extract_features(r, min_duration) for r in routes]),
+        )
+        # One model for both the prediction and the reported version, even if
+        # the watcher swaps in a new artifact while this request is waiting.
+        loaded = await model_registry.ensure_loaded()
+        predicted_scores = await _predict_scores(loaded, feature_matrix)
     predicted_scores = np.clip(predicted_scores, 0, 100)
 
-    # Collect advisories for all routes in parallel (includes reverse geocoding)
-    advisory_tasks = [_collect_advisories(r.waypoints) for r in routes]
-    all_advisories_raw = await asyncio.gather(*advisory_tasks, return_exceptions=True)
-    all_advisories = []
-    for a in all_advisories_raw:
-        if isinstance(a, list):
-            all_advisories.append(a)
+    # Collect advisories for all routes in one pass. In deferred mode the
+    # geocoding is left to the follow-up endpoint and only a token is returned.
+    advisory_token: str | None = None
+    try:
+        if settings.advisory_location_mode == "deferred":
+            all_advisories, advisory_token = _defer_advisories(
+                [r.waypoints for r in routes]
+            )
         else:
-            logger.warning("Advisory collection failed: %s", a)
-            all_advisories.append([])
+            all_advisories = await _collect_advisories([r.waypoints for r in routes])
+    except Exception as exc:
+        logger.warning("Advisory collection failed: %s", exc)
+        all_advisories = [[] for _ in routes]
 
     # Compute sub-scores for the UI
     scores: list[RouteScore] = []
@@ -398,4 +699,6 @@ async def score_routes(routes: list[RouteWithWeather]) -> RouteRecommendation:
         recommended_route_index=routes[best_idx].route_index,
         scores=scores,
         advisories=list(all_advisories),
+        advisory_token=advisory_token,
+        model_version=loaded.version,
     )
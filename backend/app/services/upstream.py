@@ -0,0 +1,281 @@
+"""Shared, lifespan-managed HTTP clients for upstream APIs.
+
+One ``httpx.AsyncClient`` per upstream host, with tuned connection limits,
+keep-alive expiry, optional HTTP/2 multiplexing and a small DNS cache, so
+parallel Directions, Geocoding and Open-Meteo calls reuse a few warm
+connections instead of repeating DNS lookups and TLS handshakes.
+
+Passing ``transport=`` makes httpx skip its ``HTTP(S)_PROXY``/``NO_PROXY``
+handling, so the clients mount the environment's proxies themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import ipaddress
+import logging
+import socket
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Iterable
+
+import httpcore
+import httpx
+
+from ..config import settings
+from ..metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+
+
+# Per-request timeouts still apply on top (e.g. 10 s for geocoding).
+UPSTREAMS: dict[str, UpstreamConfig] = {
+    "google": UpstreamConfig(
+        timeout=30.0,
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=60.0,
+    ),
+    "open_meteo": UpstreamConfig(
+        timeout=30.0,
+        max_connections=10,
+        max_keepalive_connections=10,
+        keepalive_expiry=60.0,
+    ),
+}
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches resolved addresses for ``ttl`` seconds."""
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float):
+        self._backend = backend
+        self._ttl = ttl
+        self._cache: dict[tuple[str, int], tuple[float, list[str]]] = {}
+
+    async def _resolve(self, host: str, port: int) -> list[str]:
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await self._resolve(host, port)
+        except OSError:
+            addresses = [host]
+
+        last_exc: Exception | None = None
+        for address in addresses:
+            try:
+                # TLS still uses the origin hostname for SNI and verification.
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                last_exc = exc
+
+        self._cache.pop((host, port), None)
+        assert last_exc is not None
+        raise last_exc
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: float | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class UpstreamTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport with a DNS-caching backend and pool statistics."""
+
+    def __init__(
+        self,
+        *,
+        limits: httpx.Limits,
+        http2: bool,
+        dns_ttl: float,
+        proxy: httpx.Proxy | None = None,
+    ):
+        super().__init__(limits=limits, http2=http2, proxy=proxy)
+        # httpx does not expose the network backend, so wrap the one its
+        # connection pool already created. Both attributes are private
+        # (httpcore is pinned to 1.0.x); if either moves, run uncached.
+        pool = getattr(self, "_pool", None)
+        backend = getattr(pool, "_network_backend", None)
+        if dns_ttl > 0 and backend is not None:
+            pool._network_backend = CachingDNSBackend(backend, dns_ttl)
+        elif dns_ttl > 0:  # pragma: no cover
+            logger.warning("httpcore pool has no network backend; DNS cache disabled.")
+
+    def pool_stats(self) -> dict[str, int]:
+        connections = getattr(getattr(self, "_pool", None), "connections", [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {"active": len(connections) - idle, "idle": idle}
+
+
+def environment_proxies() -> dict[str, str | None]:
+    """URL patterns to proxy URLs (``None`` = direct), as httpx reads the environment."""
+    proxies = urllib.request.getproxies()
+    mounts: dict[str, str | None] = {}
+    for scheme in ("http", "https", "all"):
+        url = proxies.get(scheme)
+        if url:
+            mounts[f"{scheme}://"] = url if "://" in url else f"http://{url}"
+
+    for host in (h.strip() for h in proxies.get("no", "").split(",")):
+        if host == "*":
+            return {}
+        if not host:
+            continue
+        if "://" in host:
+            mounts[host] = None
+            continue
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            mounts[f"all://*{host.lstrip('.')}"] = None
+        else:
+            mounts[f"all://[{ip}]" if ip.version == 6 else f"all://{ip}"] = None
+    return mounts
+
+
+class UpstreamClients:
+    """Creates one client per upstream on first use and closes them on shutdown."""
+
+    def __init__(
+        self,
+        configs: dict[str, UpstreamConfig] | None = None,
+        http2: bool | None = None,
+        dns_ttl: float | None = None,
+    ):
+        self._configs = configs or UPSTREAMS
+        self._http2 = (settings.upstream_http2 if http2 is None else http2) and HTTP2_AVAILABLE
+        self._dns_ttl = settings.upstream_dns_cache_ttl_seconds if dns_ttl is None else dns_ttl
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._transports: dict[str, list[UpstreamTransport]] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self._configs[name]
+            limits = httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            )
+
+            def transport(proxy: str | None = None) -> UpstreamTransport:
+                return UpstreamTransport(
+                    limits=limits,
+                    http2=self._http2,
+                    dns_ttl=self._dns_ttl,
+                    proxy=httpx.Proxy(proxy) if proxy else None,
+                )
+
+            default = transport()
+            mounts = {
+                pattern: transport(proxy) if proxy else None
+                for pattern, proxy in environment_proxies().items()
+            }
+            client = httpx.AsyncClient(
+                transport=default, mounts=mounts, timeout=config.timeout
+            )
+            self._clients[name] = client
+            self._transports[name] = [default, *filter(None, mounts.values())]
+        return client
+
+    def start(self) -> None:
+        if settings.upstream_http2 and not HTTP2_AVAILABLE:  # pragma: no cover
+            logger.warning("h2 not installed; upstream clients will use HTTP/1.1.")
+        for name in self._configs:
+            self.get(name)
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        self._transports = {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def warm(self, urls: dict[str, str], timeout: float = 3.0) -> dict[str, str]:
+        """Open a connection to each upstream with one cheap request.
+
+        Any HTTP response counts: the point is the DNS lookup, TCP and TLS
+        handshakes, and leaving a keep-alive connection in the pool.
+        Returns the outcome per upstream.
+        """
+
+        async def _touch(name: str, url: str) -> str:
+            try:
+                response = await self.get(name).get(url, timeout=timeout)
+            except httpx.HTTPError as exc:
+                return type(exc).__name__
+            return str(response.status_code)
+
+        names = list(urls)
+        outcomes = await asyncio.gather(*(_touch(name, urls[name]) for name in names))
+        return dict(zip(names, outcomes))
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        stats: dict[str, dict[str, int]] = {}
+        for name, transports in self._transports.items():
+            per_transport = [t.pool_stats() for t in transports]
+            stats[name] = {
+                state: sum(s[state] for s in per_transport) for state in ("active", "idle")
+            }
+        return stats
+
+    def collect(self):
+        """Prometheus collector hook: connection counts per upstream and state."""
+        from prometheus_client.core import GaugeMetricFamily
+
+        family = GaugeMetricFamily(
+            "route_weather_upstream_connections",
+            "Open upstream connections by upstream and state.",
+            labels=["upstream", "state"],
+        )
+        for name, stats in self.pool_stats().items():
+            for state, count in stats.items():
+                family.add_metric([name, state], count)
+        yield family
+
+
+upstream_clients = UpstreamClients()
+register_collector(upstream_clients)
@@ -4,12 +4,15 @@ from datetime import datetime
 
 import httpx
 
+from .. import deadline
+from ..config import settings
 from ..models import Waypoint, WeatherData
 from .http_client import request_with_retry
+from .upstream import upstream_clients
 
 logger = logging.getLogger(__name__)
 
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_URL = f"{settings.open_meteo_base_url}/v1/forecast"
 
 HOURLY_PARAMS = [
     "temperature_2m",
@@ -51,6 +54,9 @@ WMO_CODES = {
 
 _semaphore = asyncio.Semaphore(5)
 
+# Time held back from the weather stage for scoring and geocoding.
+SCORING_RESERVE_SECONDS = 1.0
+
 
 async def _fetch_weather_for_point(
     client: httpx.AsyncClient,
@@ -73,6 +79,7 @@ async def _fetch_weather_for_point(
                 "end_date": date_str,
                 "timezone": "auto",
             },
+            hedge=settings.hedge_weather_requests,
         )
     response.raise_for_status()
     data = response.json()
@@ -101,25 +108,50 @@ async def _fetch_weather_for_point(
     )
 
 
-client = httpx.AsyncClient(timeout=30.0)
-
-
 async def get_weather_for_waypoints(
     waypoints: list[Waypoint],
 ) -> list[Waypoint]:
-    """Fetch weather for all waypoints in parallel."""
+    """Fetch weather for all waypoints in parallel.
+
+    Under a request budget, points still pending when the budget (minus a
+    reserve for scoring) runs out are left without weather and the request
+    is marked degraded.
+    """
+    timeout = deadline.time_left(reserve=SCORING_RESERVE_SECONDS)
+    if timeout is not None and timeout <= 0:
+        deadline.mark_degraded("weather_skipped")
+        return waypoints
+
+    client = upstream_clients.get("open_meteo")
     tasks = [
-        _fetch_weather_for_point(
-            client,
-            wp.location.lat,
-            wp.location.lng,
-            wp.estimated_time,
+        asyncio.ensure_future(
+            _fetch_weather_for_point(
+                client,
+                wp.location.lat,
+                wp.location.lng,
+                wp.estimated_time,
+            )
         )
         for wp in waypoints
     ]
-    weather_results = await asyncio.gather(*tasks, return_exceptions=True)
+    if not tasks:
+        return waypoints
+
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        deadline.mark_degraded("weather_partial")
+        logger.warning(
+            "Weather deadline reached with %d of %d points pending",
+            len(pending), len(tasks),
+        )
 
-    for wp, weather in zip(waypoints, weather_results):
+    for wp, task in zip(waypoints, tasks):
+        if task in pending:
+            continue  # leave wp.weather as None
+        weather = task.exception() or task.result()
         if isinstance(weather, Exception):
             logger.warning(
                 "Weather fetch failed for (%s, %s): %s",
@@ -0,0 +1,58 @@
+"""Tail-sampling recorder for the slowest recent requests.
+
+Requests faster than the threshold cost a single comparison. Slower ones
+are kept, with their stage breakdown and upstream calls, if they rank
+among the ``capacity`` slowest seen within the window.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+from .config import settings
+
+
+class SlowRequestRecorder:
+    def __init__(self, capacity: int, threshold_ms: float, window_seconds: float):
+        self.capacity = capacity
+        self.threshold_ms = threshold_ms
+        self.window_seconds = window_seconds
+        self._entries: list[dict[str, Any]] = []
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        self._entries = [e for e in self._entries if e["recorded_at"] >= cutoff]
+
+    def maybe_record(self, duration_ms: float, build: Callable[[], dict[str, Any]]) -> bool:
+        """Keep the request if it is slow enough; ``build`` runs only then."""
+        if duration_ms < self.threshold_ms or self.capacity <= 0:
+            return False
+
+        now = time.time()
+        self._prune(now)
+        if len(self._entries) >= self.capacity:
+            fastest = min(self._entries, key=lambda e: e["duration_ms"])
+            if duration_ms <= fastest["duration_ms"]:
+                return False
+            self._entries.remove(fastest)
+
+        entry = build()
+        entry["duration_ms"] = duration_ms
+        entry["recorded_at"] = now
+        self._entries.append(entry)
+        return True
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        self._prune(time.time())
+        return sorted(self._entries, key=lambda e: e["duration_ms"], reverse=True)
+
+    def clear(self) -> None:
+        self._entries = []
+
+
+slow_requests = SlowRequestRecorder(
+    capacity=settings.slow_request_capacity,
+    threshold_ms=settings.slow_request_threshold_ms,
+    window_seconds=settings.slow_request_window_seconds,
+)
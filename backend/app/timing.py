@@ -0,0 +1,107 @@
+"""Per-request stage timings and upstream call accounting.
+
+``request_context_middleware`` starts a trace for every request. Code under
+it wraps work in ``stage(...)`` and reports upstream calls and counters;
+the middleware turns the result into a ``Server-Timing`` header and extra
+fields on the "Request completed" log line. Stage durations are also
+observed in a Prometheus histogram.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .metrics import STAGE_SECONDS
+
+if TYPE_CHECKING:
+    from .memory_trace import MemoryTrace
+
+# Bounds memory for pathological requests; counts stay exact.
+MAX_UPSTREAM_CALLS_RECORDED = 200
+
+
+class RequestTrace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.upstream_calls: list[dict[str, Any]] = []
+        self.memory: MemoryTrace | None = None
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_upstream(self, host: str, seconds: float, outcome: str) -> None:
+        self.incr("upstream_calls")
+        if len(self.upstream_calls) < MAX_UPSTREAM_CALLS_RECORDED:
+            self.upstream_calls.append(
+                {"host": host, "duration_ms": round(seconds * 1000, 2), "outcome": outcome}
+            )
+
+    def merge(self, other: RequestTrace) -> None:
+        """Add the stages, counters and upstream calls of work done for this request elsewhere."""
+        for name, seconds in other.stages.items():
+            self.add_stage(name, seconds)
+        for name, amount in other.counters.items():
+            self.incr(name, amount)
+        room = MAX_UPSTREAM_CALLS_RECORDED - len(self.upstream_calls)
+        self.upstream_calls.extend(other.upstream_calls[:max(room, 0)])
+
+    def stages_ms(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{name};dur={ms}" for name, ms in self.stages_ms().items()
+        )
+
+
+_trace_ctx: ContextVar[RequestTrace | None] = ContextVar("request_trace", default=None)
+
+
+def start_trace() -> Token[RequestTrace | None]:
+    return _trace_ctx.set(RequestTrace())
+
+
+def reset_trace(token: Token[RequestTrace | None]) -> None:
+    _trace_ctx.reset(token)
+
+
+def current_trace() -> RequestTrace | None:
+    return _trace_ctx.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    trace = _trace_ctx.get()
+    memory = trace.memory if trace is not None else None
+    if memory is not None:
+        memory.enter_stage(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=name).observe(elapsed)
+        if memory is not None:
+            memory.exit_stage()
+        if trace is not None:
+            trace.add_stage(name, elapsed)
+
+
+def incr(name: str, amount: int = 1) -> None:
+    trace = _trace_ctx.get()
+    if trace is not None:
+        trace.incr(name, amount)
+
+
+def record_upstream(host: str, seconds: float, outcome: str) -> None:
+    trace = _trace_ctx.get()
+    if trace is not None:
+        trace.record_upstream(host, seconds, outcome)
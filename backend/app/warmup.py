@@ -0,0 +1,159 @@
+"""Startup warm-up, run in the background once the app starts serving.
+
+Steps, in order: open upstream connections, load the route model, push a
+small built-in route through sampling, dedup, feature extraction,
+prediction and serialization, and optionally restore popular route cache
+entries from the last snapshot. Each step is reported through ``readiness``.
+The model step is required: if it fails the instance never reports ready,
+since it could only answer route requests with 503s. The other steps are
+optional; a failure is recorded and logged but does not block readiness,
+since that work also happens lazily on first use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+import polyline
+
+from .config import settings
+from .models import MultiRouteResponse, RouteWithWeather, WeatherData
+from .readiness import Readiness
+from .routes import assign_weather, dedupe_waypoints, sample_all_routes
+from .services import scoring
+from .services.cache import cache_snapshots
+from .services.upstream import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+
+class StepSkipped(Exception):
+    """Raised by a step that is disabled by configuration."""
+
+
+# Downtown Los Angeles to Pasadena, ~40 minutes in four steps.
+_WARMUP_PATH = [
+    (34.0522, -118.2437),
+    (34.0700, -118.2200),
+    (34.1000, -118.1900),
+    (34.1250, -118.1600),
+    (34.1478, -118.1445),
+]
+_WARMUP_WEATHER = WeatherData(
+    temperature_c=18.0,
+    apparent_temperature_c=17.0,
+    precipitation_mm=0.5,
+    precipitation_probability=40,
+    weather_code=61,
+    weather_description="Slight rain",
+    wind_speed_kmh=20.0,
+    humidity_percent=70,
+)
+
+
+def _warmup_route() -> dict:
+    steps = [
+        {
+            "duration_seconds": 600,
+            "distance_meters": 4000,
+            "start_location": {"lat": a[0], "lng": a[1]},
+            "end_location": {"lat": b[0], "lng": b[1]},
+            "polyline": polyline.encode([a, b]),
+        }
+        for a, b in zip(_WARMUP_PATH, _WARMUP_PATH[1:])
+    ]
+    return {
+        "overview_polyline": polyline.encode(_WARMUP_PATH),
+        "summary": "Warm-up",
+        "total_duration_seconds": sum(s["duration_seconds"] for s in steps),
+        "total_distance_meters": sum(s["distance_meters"] for s in steps),
+        "steps": steps,
+    }
+
+
+async def _open_connections() -> str:
+    if not settings.warmup_upstream_connections:
+        raise StepSkipped("disabled")
+    outcomes = await upstream_clients.warm(
+        {"google": settings.google_maps_base_url, "open_meteo": settings.open_meteo_base_url}
+    )
+    if not any(outcome.isdigit() for outcome in outcomes.values()):
+        raise RuntimeError(f"no upstream reachable: {outcomes}")
+    return ", ".join(f"{name}={outcome}" for name, outcome in outcomes.items())
+
+
+async def _load_model() -> str:
+    # Unpickling the model imports scikit-learn; keep it off the event loop.
+    await asyncio.to_thread(scoring.model_registry.load)
+    return scoring.model_registry.version
+
+
+async def _run_pipeline() -> None:
+    """Exercise the CPU stages once so first-use costs are paid now."""
+    if not settings.warmup_pipeline:
+        raise StepSkipped("disabled")
+    route = _warmup_route()
+    waypoint_lists = await sample_all_routes([route], datetime.now(timezone.utc))
+    unique = dedupe_waypoints(waypoint_lists)
+    for wp in unique.values():
+        wp.weather = _WARMUP_WEATHER
+    assign_weather(waypoint_lists, unique)
+
+    result = RouteWithWeather(
+        route_index=0,
+        overview_polyline=route["overview_polyline"],
+        summary=route["summary"],
+        total_duration_minutes=route["total_duration_seconds"] // 60,
+        total_distance_km=round(route["total_distance_meters"] / 1000, 1),
+        waypoints=waypoint_lists[0],
+    )
+    await scoring.warm_up([result])
+    MultiRouteResponse(
+        origin_address="Warm-up Origin",
+        destination_address="Warm-up Destination",
+        routes=[result],
+    ).model_dump_json()
+
+
+async def _preload_cache() -> str:
+    if cache_snapshots.path is None:
+        raise StepSkipped("no snapshot configured")
+    loaded = await cache_snapshots.restore(settings.warmup_cache_keys)
+    return f"{loaded} entries"
+
+
+WARMUP_STEPS: list[tuple[str, Callable[[], Awaitable[str | None]]]] = [
+    ("connections", _open_connections),
+    ("model", _load_model),
+    ("pipeline", _run_pipeline),
+    ("cache", _preload_cache),
+]
+
+# Steps whose failure keeps /ready at 503.
+REQUIRED_STEPS = frozenset({"model"})
+
+
+async def warm_up(readiness: Readiness) -> None:
+    failed_required: list[str] = []
+    for name, step in WARMUP_STEPS:
+        readiness.begin(name)
+        try:
+            detail = await step()
+        except StepSkipped as exc:
+            readiness.end(name, "skipped", detail=str(exc))
+        except Exception as exc:
+            logger.warning("Warm-up step %s failed: %s", name, exc)
+            readiness.end(name, "failed", detail=str(exc))
+            if name in REQUIRED_STEPS:
+                failed_required.append(name)
+        else:
+            readiness.end(name, detail=detail)
+    if failed_required:
+        readiness.mark_failed()
+        logger.error("Warm-up failed on required step(s): %s", ", ".join(failed_required))
+        return
+    readiness.mark_ready()
+    logger.info("Warm-up finished in %.0f ms", readiness.snapshot()["elapsed_ms"])
@@ -0,0 +1,8 @@
+"""Offline benchmarks for the route-weather backend.
+
+``bench.standins`` serves local stand-ins for the Directions, Geocoding and
+Open-Meteo APIs, and ``bench.load`` drives the real app against them at a
+target concurrency. Run from ``backend/``::
+
+    python -m bench.load --concurrency 16 --requests 500
+"""
@@ -0,0 +1,304 @@
+"""End-to-end load benchmark against local upstream stand-ins.
+
+Starts the stand-ins in a background thread, launches the real app with
+uvicorn in a subprocess pointed at them, and drives
+``POST /api/route-weather`` at a fixed concurrency. Throughput, overall
+latency and per-stage latency (read from each response's
+``Server-Timing`` header) are reported as p50/p95/p99.
+
+    python -m bench.load --concurrency 32 --requests 1000 \\
+        --weather-latency 80,400 --error-rate 0.01 --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from .standins import LatencyProfile, ServiceProfile, StandInConfig, create_standin_app
+from .synthetic import RouteSpec, generate_directions
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    stages: dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if not name:
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                stages[name] = float(value)
+    return stages
+
+
+def summarize(
+    latencies_ms: list[float],
+    stages_ms: dict[str, list[float]],
+    statuses: Counter,
+    elapsed_seconds: float,
+) -> dict:
+    def dist(values: list[float]) -> dict:
+        return {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 2),
+            "p95": round(percentile(values, 95), 2),
+            "p99": round(percentile(values, 99), 2),
+        }
+
+    return {
+        "requests": len(latencies_ms),
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "throughput_rps": round(len(latencies_ms) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "latency_ms": dist(latencies_ms),
+        "stages_ms": {name: dist(values) for name, values in sorted(stages_ms.items())},
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"requests={report['requests']} elapsed={report['elapsed_seconds']}s "
+        f"throughput={report['throughput_rps']} req/s statuses={report['statuses']}",
+        f"{'stage':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    rows = [("total", report["latency_ms"])] + list(report["stages_ms"].items())
+    for name, d in rows:
+        lines.append(f"{name:<16}{d['count']:>8}{d['p50']:>10}{d['p95']:>10}{d['p99']:>10}")
+    if "upstream_calls" in report:
+        calls = " ".join(f"{name}={count}" for name, count in report["upstream_calls"].items())
+        lines.append(f"upstream calls: {calls}")
+    return "\n".join(lines)
+
+
+async def drive(
+    base_url: str,
+    *,
+    concurrency: int,
+    total_requests: int,
+    distinct_routes: int = 0,
+    timeout: float = 30.0,
+    transport: httpx.AsyncBaseTransport | None = None,
+    replicas: list[str] | None = None,
+) -> dict:
+    """Send ``total_requests`` route requests with ``concurrency`` in flight.
+
+    Every request uses a unique origin (so it misses the route cache) unless
+    ``distinct_routes`` is set, in which case requests cycle through that
+    many origins. With ``replicas``, each request goes to one of those
+    base URLs at random (seeded), as behind a load balancer, instead of
+    ``base_url``.
+    """
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    counter = iter(range(total_requests))
+    pick = random.Random(0)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits, transport=transport
+    ) as client:
+
+        async def worker() -> None:
+            for i in counter:
+                key = i % distinct_routes if distinct_routes else i
+                path = "/api/route-weather"
+                if replicas:
+                    path = f"{pick.choice(replicas)}{path}"
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        path,
+                        json={"origin": f"Bench Origin {key}", "destination": "Bench Destination"},
+                    )
+                except httpx.HTTPError as exc:
+                    statuses[type(exc).__name__] += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[response.status_code] += 1
+                for name, ms in parse_server_timing(response.headers.get("Server-Timing")).items():
+                    stages[name].append(ms)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, stages, statuses, elapsed)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-standins", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def launch_app(
+    port: int, env: dict[str, str], workers: int = 1, show_logs: bool = False
+) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        # The app reads this to share its route cache between workers.
+        env={**os.environ, "WEB_CONCURRENCY": str(workers), **env},
+        stdout=None if show_logs else subprocess.DEVNULL,
+        stderr=None if show_logs else subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app exited during startup with code {process.returncode}")
+        # /ready waits for the warm-up, so the model load is not measured.
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1)
+        except httpx.HTTPError:
+            response = None
+        if response is not None and response.status_code == 200:
+            return process
+        if response is not None and response.json().get("status") == "failed":
+            process.terminate()
+            raise RuntimeError(f"app warm-up failed: {response.json()['steps']}")
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("app did not become ready within 30 s")
+
+
+def _latency(value: str) -> LatencyProfile:
+    median, _, p99 = value.partition(",")
+    return LatencyProfile(float(median), float(p99 or median))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct-routes", type=int, default=0,
+                        help="cycle through this many origins (0 = every request unique)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--directions-latency", type=_latency, default=LatencyProfile(150, 600),
+                        metavar="MEDIAN,P99", help="milliseconds")
+    parser.add_argument("--geocode-latency", type=_latency, default=LatencyProfile(60, 300),
+                        metavar="MEDIAN,P99")
+    parser.add_argument("--weather-latency", type=_latency, default=LatencyProfile(80, 400),
+                        metavar="MEDIAN,P99")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of upstream calls answered with 503")
+    parser.add_argument("--payload", type=Path,
+                        help="recorded Directions API response to serve instead of the default")
+    parser.add_argument("--route-hours", type=float,
+                        help="serve a synthetic route of this many hours (see bench.synthetic)")
+    parser.add_argument("--route-steps", type=int, default=500)
+    parser.add_argument("--alternatives", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app (repeatable)")
+    parser.add_argument("--show-app-logs", action="store_true")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = build_parser().parse_args(argv)
+    config = StandInConfig(
+        directions=ServiceProfile(args.directions_latency, args.error_rate),
+        geocode=ServiceProfile(args.geocode_latency, args.error_rate),
+        weather=ServiceProfile(args.weather_latency, args.error_rate),
+        seed=args.seed,
+    )
+    payload = None
+    if args.payload:
+        payload = json.loads(args.payload.read_text())
+    elif args.route_hours:
+        payload = generate_directions(
+            RouteSpec(
+                hours=args.route_hours,
+                steps=args.route_steps,
+                alternatives=args.alternatives,
+                seed=args.seed or 0,
+            )
+        )
+    standin_port, app_port = free_port(), free_port()
+    standin_app = create_standin_app(config, payload)
+    standins = serve_in_thread(standin_app, standin_port)
+    # A fresh shared cache per run, so earlier runs cannot warm it.
+    cache_dir = tempfile.TemporaryDirectory(prefix="bench-cache-")
+    upstream = f"http://127.0.0.1:{standin_port}"
+    env = {
+        "GOOGLE_MAPS_API_KEY": "bench",
+        "GOOGLE_MAPS_BASE_URL": upstream,
+        "OPEN_METEO_BASE_URL": upstream,
+        "ROUTE_WEATHER_RATE_LIMIT": "1000000/minute",
+        "CACHE_BACKEND": "memory",
+        "CACHE_SQLITE_PATH": str(Path(cache_dir.name) / "route_cache.sqlite3"),
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    app = launch_app(app_port, env, workers=args.workers, show_logs=args.show_app_logs)
+    try:
+        report = asyncio.run(
+            drive(
+                f"http://127.0.0.1:{app_port}",
+                concurrency=args.concurrency,
+                total_requests=args.requests,
+                distinct_routes=args.distinct_routes,
+            )
+        )
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+        standins.should_exit = True
+        cache_dir.cleanup()
+
+    report["upstream_calls"] = dict(standin_app.state.calls)
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "error_rate": args.error_rate,
+        "env": {k: v for k, v in env.items() if k != "GOOGLE_MAPS_API_KEY"},
+    }
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
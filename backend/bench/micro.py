@@ -0,0 +1,304 @@
+"""Microbenchmarks for the CPU-bound pipeline stages.
+
+Each case times one stage on fixed synthetic inputs with ``timeit``, so
+numbers are comparable between runs on the same machine. Results can be
+saved as JSON and compared against a saved baseline; any case whose
+median slows down by more than the threshold fails the run.
+
+    python -m bench.micro --json baseline.json
+    python -m bench.micro --baseline baseline.json --threshold 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+# Nothing here calls Google, but app.config requires a key to import.
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "bench")
+
+import numpy as np
+
+from app.models import MultiRouteResponse, RouteWithWeather, WeatherData
+from app.routes import assign_weather, dedupe_waypoints
+from app.services.cache.base import MAX_ENTRIES, make_cache_key
+from app.services.cache.snapshot import write_snapshot
+from app.services.cache.sqlite import SQLiteRouteCache
+from app.services.directions import parse_directions
+from app.services.sampling import sample_route_points
+from app.services.scoring import (
+    _evaluate_advisory_rules,
+    extract_features,
+    model_registry,
+    score_routes,
+)
+from app.services.weather import WMO_CODES
+
+from .standins import default_directions_payload, forecast_payload
+from .synthetic import RouteSpec, generate_directions
+
+DEPARTURE = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+
+Case = Callable[[], Callable[[], object]]
+
+
+def _weather_for(lat: float, lng: float, hour: int) -> WeatherData:
+    hourly = forecast_payload(round(lat, 2), round(lng, 2))["hourly"]
+    code = hourly["weather_code"][hour]
+    return WeatherData(
+        temperature_c=hourly["temperature_2m"][hour],
+        apparent_temperature_c=hourly["apparent_temperature"][hour],
+        precipitation_mm=hourly["precipitation"][hour],
+        precipitation_probability=hourly["precipitation_probability"][hour],
+        weather_code=code,
+        weather_description=WMO_CODES.get(code, "Unknown"),
+        wind_speed_kmh=hourly["wind_speed_10m"][hour],
+        humidity_percent=hourly["relative_humidity_2m"][hour],
+    )
+
+
+def short_routes() -> dict:
+    return parse_directions(default_directions_payload())
+
+
+def cross_country_routes() -> dict:
+    """Three overlapping ~40 hour alternatives, 2,500 steps each."""
+    return parse_directions(generate_directions(RouteSpec(hours=40, steps=2500, alternatives=3)))
+
+
+def sampled_waypoints(routes: dict, with_weather: bool = False):
+    all_waypoints = [sample_route_points(r["steps"], DEPARTURE) for r in routes["routes"]]
+    if with_weather:
+        for waypoints in all_waypoints:
+            for wp in waypoints:
+                wp.weather = _weather_for(wp.location.lat, wp.location.lng, wp.estimated_time.hour)
+    return all_waypoints
+
+
+def route_results(routes: dict) -> list[RouteWithWeather]:
+    return [
+        RouteWithWeather(
+            route_index=idx,
+            overview_polyline=route["overview_polyline"],
+            summary=route["summary"],
+            total_duration_minutes=route["total_duration_seconds"] // 60,
+            total_distance_km=round(route["total_distance_meters"] / 1000, 1),
+            waypoints=waypoints,
+        )
+        for idx, (route, waypoints) in enumerate(
+            zip(routes["routes"], sampled_waypoints(routes, with_weather=True))
+        )
+    ]
+
+
+def response_for(routes: dict) -> MultiRouteResponse:
+    results = route_results(routes)
+    return MultiRouteResponse(
+        origin_address=routes["origin_address"],
+        destination_address=routes["destination_address"],
+        routes=results,
+        recommendation=asyncio.run(_score_offline(results)),
+    )
+
+
+async def _score_offline(results: list[RouteWithWeather]):
+    # Geocoding is network I/O, not part of what these cases measure.
+    with patch("app.services.scoring._reverse_geocode_batch", _no_geocode):
+        return await score_routes(results)
+
+
+async def _no_geocode(coords):
+    return {}
+
+
+def _sampling(routes_fn) -> Case:
+    def setup():
+        steps = routes_fn()["routes"][0]["steps"]
+        return lambda: sample_route_points(steps, DEPARTURE)
+    return setup
+
+
+def _dedup(routes_fn) -> Case:
+    def setup():
+        all_waypoints = sampled_waypoints(routes_fn())
+        return lambda: dedupe_waypoints(all_waypoints)
+    return setup
+
+
+def _dedup_assign(routes_fn) -> Case:
+    def setup():
+        all_waypoints = sampled_waypoints(routes_fn(), with_weather=True)
+        unique = dedupe_waypoints(all_waypoints)
+        return lambda: assign_weather(all_waypoints, unique)
+    return setup
+
+
+def _extract_features() -> Callable[[], object]:
+    results = route_results(cross_country_routes())
+    min_duration = min(r.total_duration_minutes for r in results)
+    return lambda: [extract_features(r, min_duration) for r in results]
+
+
+def _predict(rows: int) -> Case:
+    def setup():
+        features = np.random.default_rng(0).random((rows, 9))
+        return lambda: model_registry.predict(features)
+    return setup
+
+
+def _evaluate_rules(routes_fn) -> Case:
+    def setup():
+        all_waypoints = sampled_waypoints(routes_fn(), with_weather=True)
+        return lambda: _evaluate_advisory_rules(all_waypoints)
+    return setup
+
+
+def _make_key() -> Callable[[], object]:
+    return lambda: make_cache_key("New York, NY", "Los Angeles, CA", "2026-01-01T08:00:00+00:00")
+
+
+def _snapshot_write(routes_fn) -> Case:
+    def setup():
+        response = response_for(routes_fn())
+        expires_at = time.time() + 600
+        entries = [(f"key-{i}", response, expires_at, i) for i in range(MAX_ENTRIES)]
+        path = Path(tempfile.mkdtemp()) / "routes.jsonl"
+        return lambda: write_snapshot(path, entries)
+    return setup
+
+
+def _sqlite_get(routes_fn) -> Case:
+    def setup():
+        cache = SQLiteRouteCache(Path(tempfile.mkdtemp()) / "cache.db", compaction_interval_seconds=0)
+        cache.set("key", response_for(routes_fn()))
+        return lambda: cache.get("key")
+    return setup
+
+
+def _serialize(routes_fn) -> Case:
+    def setup():
+        response = response_for(routes_fn())
+        return response.model_dump_json
+    return setup
+
+
+def _validate(routes_fn) -> Case:
+    def setup():
+        payload = response_for(routes_fn()).model_dump_json()
+        return lambda: MultiRouteResponse.model_validate_json(payload)
+    return setup
+
+
+CASES: dict[str, Case] = {
+    "sampling.short": _sampling(short_routes),
+    "sampling.cross_country": _sampling(cross_country_routes),
+    "dedup.short": _dedup(short_routes),
+    "dedup.cross_country": _dedup(cross_country_routes),
+    "dedup_assign.cross_country": _dedup_assign(cross_country_routes),
+    "extract_features.cross_country": _extract_features,
+    "model.predict.3_rows": _predict(3),
+    "model.predict.256_rows": _predict(256),
+    "advisories.evaluate_rules.short": _evaluate_rules(short_routes),
+    "advisories.evaluate_rules.cross_country": _evaluate_rules(cross_country_routes),
+    "cache.make_key": _make_key,
+    "cache.snapshot_write.short": _snapshot_write(short_routes),
+    "cache.sqlite_get.short": _sqlite_get(short_routes),
+    "response.serialize.short": _serialize(short_routes),
+    "response.serialize.cross_country": _serialize(cross_country_routes),
+    "response.validate.cross_country": _validate(cross_country_routes),
+}
+
+
+def run_case(fn: Callable[[], object], repeat: int = 5, min_seconds: float = 0.2) -> dict:
+    """Time ``fn`` and return per-call seconds (min and median of ``repeat`` runs)."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_seconds:
+        number = max(1, int(number * min_seconds / max(elapsed, 1e-9)))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "min_seconds": min(runs),
+        "median_seconds": statistics.median(runs),
+    }
+
+
+def run(cases: dict[str, Case], repeat: int = 5, min_seconds: float = 0.2) -> dict:
+    results = {}
+    for name, setup in cases.items():
+        results[name] = run_case(setup(), repeat=repeat, min_seconds=min_seconds)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "model_version": model_registry.version,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Return cases whose median is more than ``threshold`` slower than baseline."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_seconds"] / base["median_seconds"]
+        if ratio > 1 + threshold:
+            regressions.append({"case": name, "ratio": round(ratio, 3)})
+    return regressions
+
+
+def format_results(current: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'case':<42}{'median':>12}{'min':>12}{'vs base':>10}"]
+    for name, result in current["results"].items():
+        base = (baseline or {}).get("results", {}).get(name)
+        change = f"{result['median_seconds'] / base['median_seconds']:.2f}x" if base else "-"
+        lines.append(
+            f"{name:<42}{result['median_seconds'] * 1e6:>10.1f}us"
+            f"{result['min_seconds'] * 1e6:>10.1f}us{change:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", "--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.2,
+                        help="minimum time per timing run")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against saved results")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed median slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    cases = {name: case for name, case in CASES.items() if args.filter in name}
+    current = run(cases, repeat=args.repeat, min_seconds=args.min_seconds)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print(format_results(current, baseline))
+    if args.json:
+        args.json.write_text(json.dumps(current, indent=2))
+
+    if baseline is None:
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']}: {regression['ratio']}x baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Route cache hit rate across replicas, with and without peer sharding.
+
+Starts the upstream stand-ins once, then for each replica count launches
+that many app processes on local ports and sends requests to them in
+turn, cycling through ``--distinct-routes`` routes for ``--passes``
+passes. Each count runs twice: with ``independent`` caches (no peers)
+and ``sharded`` (``CACHE_PEERS`` lists every replica). The Directions
+calls seen by the stand-ins count route cache misses across the fleet.
+
+    python -m bench.peers --replicas 1,2,3 --distinct-routes 250 --passes 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from .load import _latency, drive, free_port, launch_app, serve_in_thread
+from .standins import LatencyProfile, ServiceProfile, StandInConfig, create_standin_app
+
+MODES = ("independent", "sharded")
+
+
+def replica_env(ports: list[int], index: int, sharded: bool) -> dict[str, str]:
+    if not sharded:
+        return {}
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    return {
+        "CACHE_PEERS": ",".join(urls),
+        "CACHE_SELF_URL": urls[index],
+        "CACHE_PEER_SECRET": "bench",
+    }
+
+
+def run_fleet(
+    replicas: int,
+    sharded: bool,
+    base_env: dict[str, str],
+    *,
+    concurrency: int,
+    total_requests: int,
+    distinct_routes: int,
+    show_logs: bool = False,
+) -> dict:
+    ports = [free_port() for _ in range(replicas)]
+    processes = []
+    try:
+        for index, port in enumerate(ports):
+            env = {**base_env, **replica_env(ports, index, sharded)}
+            processes.append(launch_app(port, env, show_logs=show_logs))
+        return asyncio.run(
+            drive(
+                f"http://127.0.0.1:{ports[0]}",
+                concurrency=concurrency,
+                total_requests=total_requests,
+                distinct_routes=distinct_routes,
+                replicas=[f"http://127.0.0.1:{port}" for port in ports],
+            )
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def hit_ratio(requests: int, directions_calls: int) -> float:
+    """Share of requests answered without a Directions call."""
+    return round(1 - directions_calls / requests, 3) if requests else 0.0
+
+
+def format_rows(rows: list[dict]) -> str:
+    lines = [f"{'replicas':>8}  {'mode':<12}{'req/s':>10}{'p50 ms':>10}{'directions':>12}{'hit ratio':>11}"]
+    for row in rows:
+        lines.append(
+            f"{row['replicas']:>8}  {row['mode']:<12}{row['throughput_rps']:>10}"
+            f"{row['p50_ms']:>10}{row['directions_calls']:>12}{row['hit_ratio']:>11}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--replicas", type=lambda v: [int(n) for n in v.split(",")], default=[1, 2, 3])
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both")
+    parser.add_argument("--distinct-routes", type=int, default=250,
+                        help="routes to cycle through; above 100 overflows one memory cache")
+    parser.add_argument("--passes", type=int, default=3, help="times each route is requested")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--directions-latency", type=_latency, default=LatencyProfile(50, 150),
+                        metavar="MEDIAN,P99", help="milliseconds")
+    parser.add_argument("--weather-latency", type=_latency, default=LatencyProfile(20, 80),
+                        metavar="MEDIAN,P99")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--show-app-logs", action="store_true")
+    parser.add_argument("--json", type=Path, help="write the rows to this file")
+    args = parser.parse_args(argv)
+
+    config = StandInConfig(
+        directions=ServiceProfile(args.directions_latency),
+        geocode=ServiceProfile(LatencyProfile(20, 80)),
+        weather=ServiceProfile(args.weather_latency),
+    )
+    standin_app = create_standin_app(config)
+    standin_port = free_port()
+    standins = serve_in_thread(standin_app, standin_port)
+    upstream = f"http://127.0.0.1:{standin_port}"
+    base_env = {
+        "GOOGLE_MAPS_API_KEY": "bench",
+        "GOOGLE_MAPS_BASE_URL": upstream,
+        "OPEN_METEO_BASE_URL": upstream,
+        "ROUTE_WEATHER_RATE_LIMIT": "1000000/minute",
+        "CACHE_BACKEND": "memory",
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    modes = MODES if args.mode == "both" else (args.mode,)
+    total_requests = args.distinct_routes * args.passes
+
+    rows = []
+    try:
+        for replicas in args.replicas:
+            for mode in modes:
+                for name in standin_app.state.calls:
+                    standin_app.state.calls[name] = 0
+                report = run_fleet(
+                    replicas,
+                    mode == "sharded",
+                    base_env,
+                    concurrency=args.concurrency,
+                    total_requests=total_requests,
+                    distinct_routes=args.distinct_routes,
+                    show_logs=args.show_app_logs,
+                )
+                directions = standin_app.state.calls["directions"]
+                rows.append(
+                    {
+                        "replicas": replicas,
+                        "mode": mode,
+                        "requests": report["requests"],
+                        "statuses": report["statuses"],
+                        "throughput_rps": report["throughput_rps"],
+                        "p50_ms": report["latency_ms"]["p50"],
+                        "directions_calls": directions,
+                        "hit_ratio": hit_ratio(report["requests"], directions),
+                    }
+                )
+                print(format_rows(rows[-1:]).splitlines()[-1], flush=True)
+    finally:
+        standins.should_exit = True
+
+    print(format_rows(rows))
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
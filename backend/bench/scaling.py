@@ -0,0 +1,136 @@
+"""Latency and memory scaling of the CPU-bound stages with route size.
+
+Generates synthetic routes of increasing length (``bench.synthetic``) and,
+for each size, records wall time and peak traced allocations for
+sampling, weather dedup and assignment, scoring and response
+serialization.
+
+    python -m bench.scaling --alternatives 5 --json scaling.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "bench")
+
+from app.models import MultiRouteResponse, RouteWithWeather
+from app.routes import assign_weather, dedupe_waypoints
+from app.services.directions import parse_directions
+from app.services.sampling import sample_route_points
+
+from .micro import DEPARTURE, _score_offline, _weather_for
+from .synthetic import RouteSpec, generate_directions
+
+# (hours, steps) per size; the largest is a 40 hour, 5,000 step route.
+DEFAULT_SIZES = ((1, 50), (6, 300), (12, 1000), (24, 2500), (40, 5000))
+
+
+def _measure(fn: Callable[[], object]) -> tuple[object, dict]:
+    """Time one untraced call, then run again under tracemalloc for the peak."""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"ms": round(elapsed * 1000, 2), "peak_kib": round(peak / 1024, 1)}
+
+
+def measure_size(hours: float, steps: int, alternatives: int, seed: int = 0) -> dict:
+    routes = parse_directions(
+        generate_directions(RouteSpec(hours=hours, steps=steps, alternatives=alternatives, seed=seed))
+    )
+    stages: dict[str, dict] = {}
+
+    all_waypoints, stages["sampling"] = _measure(
+        lambda: [sample_route_points(r["steps"], DEPARTURE) for r in routes["routes"]]
+    )
+    unique, stages["dedup"] = _measure(lambda: dedupe_waypoints(all_waypoints))
+    for wp in unique.values():
+        wp.weather = _weather_for(wp.location.lat, wp.location.lng, wp.estimated_time.hour)
+    _, stages["dedup_assign"] = _measure(lambda: assign_weather(all_waypoints, unique))
+
+    results = [
+        RouteWithWeather(
+            route_index=idx,
+            overview_polyline=route["overview_polyline"],
+            summary=route["summary"],
+            total_duration_minutes=route["total_duration_seconds"] // 60,
+            total_distance_km=round(route["total_distance_meters"] / 1000, 1),
+            waypoints=waypoints,
+        )
+        for idx, (route, waypoints) in enumerate(zip(routes["routes"], all_waypoints))
+    ]
+    recommendation, stages["scoring"] = _measure(lambda: asyncio.run(_score_offline(results)))
+    response = MultiRouteResponse(
+        origin_address=routes["origin_address"],
+        destination_address=routes["destination_address"],
+        routes=results,
+        recommendation=recommendation,
+    )
+    body, stages["serialize"] = _measure(response.model_dump_json)
+
+    return {
+        "hours": hours,
+        "steps": steps,
+        "alternatives": alternatives,
+        "waypoints": sum(len(w) for w in all_waypoints),
+        "weather_points": len(unique),
+        "response_kib": round(len(body) / 1024, 1),
+        "stages": stages,
+    }
+
+
+def format_rows(rows: list[dict]) -> str:
+    stage_names = list(rows[0]["stages"]) if rows else []
+    header = f"{'hours':>6}{'steps':>7}{'wps':>7}{'uniq':>7}" + "".join(
+        f"{name:>22}" for name in stage_names
+    )
+    lines = [header + "   (ms / peak KiB)"]
+    for row in rows:
+        line = f"{row['hours']:>6}{row['steps']:>7}{row['waypoints']:>7}{row['weather_points']:>7}"
+        for name in stage_names:
+            s = row["stages"][name]
+            line += f"{s['ms']:>12.1f} /{s['peak_kib']:>8.0f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--alternatives", type=int, default=5)
+    parser.add_argument("--size", action="append", metavar="HOURS:STEPS",
+                        help="route size to measure (repeatable; defaults to 1 h to 40 h)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the rows to this file")
+    args = parser.parse_args(argv)
+
+    sizes = (
+        [tuple(float(v) for v in size.split(":")) for size in args.size]
+        if args.size
+        else DEFAULT_SIZES
+    )
+    rows = [
+        measure_size(hours, int(steps), args.alternatives, seed=args.seed)
+        for hours, steps in sizes
+    ]
+    print(format_rows(rows))
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
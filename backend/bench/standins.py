@@ -0,0 +1,169 @@
+"""Local stand-ins for the Google Directions/Geocoding and Open-Meteo APIs.
+
+Each service sleeps for a latency drawn from a log-normal distribution
+(given as a median and p99) and fails a configurable fraction of calls
+with a 503, so retries, circuit breakers and deadlines get exercised the
+way real upstreams would.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+
+import polyline
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+# z-score of the 99th percentile of a standard normal distribution.
+_Z99 = 2.326
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    median_ms: float = 0.0
+    p99_ms: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Return a latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99_ms, self.median_ms) / self.median_ms) / _Z99
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+@dataclass(frozen=True)
+class ServiceProfile:
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    error_rate: float = 0.0
+
+
+@dataclass(frozen=True)
+class StandInConfig:
+    directions: ServiceProfile = field(default_factory=ServiceProfile)
+    geocode: ServiceProfile = field(default_factory=ServiceProfile)
+    weather: ServiceProfile = field(default_factory=ServiceProfile)
+    seed: int | None = None
+
+
+def route_through(anchors: list[tuple[float, float]], steps: int, step_seconds: int) -> dict:
+    """A single-leg Directions route visiting ``anchors`` in ``steps`` equal steps."""
+    segments = len(anchors) - 1
+    points = []
+    for i in range(steps + 1):
+        pos = i * segments / steps
+        seg = min(int(pos), segments - 1)
+        frac = pos - seg
+        (lat_a, lng_a), (lat_b, lng_b) = anchors[seg], anchors[seg + 1]
+        points.append((lat_a + (lat_b - lat_a) * frac, lng_a + (lng_b - lng_a) * frac))
+    leg_steps = [
+        {
+            "duration": {"value": step_seconds},
+            "distance": {"value": step_seconds * 25},
+            "start_location": {"lat": a[0], "lng": a[1]},
+            "end_location": {"lat": b[0], "lng": b[1]},
+            "polyline": {"points": polyline.encode([a, b])},
+        }
+        for a, b in zip(points, points[1:])
+    ]
+    return {
+        "summary": f"{steps}-step route",
+        "overview_polyline": {"points": polyline.encode(points)},
+        "legs": [
+            {
+                "start_address": "Stand-in Origin",
+                "end_address": "Stand-in Destination",
+                "steps": leg_steps,
+            }
+        ],
+    }
+
+
+def default_directions_payload() -> dict:
+    """Three ~6 hour alternatives between Los Angeles and Phoenix."""
+    start, end = (34.05, -118.24), (33.45, -112.07)
+    return {
+        "status": "OK",
+        "routes": [
+            route_through([start, end], steps=40, step_seconds=540),
+            route_through([start, (33.9, -115.5), end], steps=50, step_seconds=450),
+            route_through([start, (34.5, -114.0), end], steps=60, step_seconds=390),
+        ],
+    }
+
+
+def forecast_payload(lat: float, lng: float) -> dict:
+    """An Open-Meteo hourly forecast whose values vary with location and hour."""
+    seed = int(abs(lat * 1000) + abs(lng * 1000))
+    hours = range(24)
+    return {
+        "latitude": lat,
+        "longitude": lng,
+        "hourly": {
+            "time": [f"2026-01-01T{h:02d}:00" for h in hours],
+            "temperature_2m": [10 + (seed + h) % 20 for h in hours],
+            "apparent_temperature": [8 + (seed + h) % 20 for h in hours],
+            "precipitation": [((seed * 7 + h) % 13) / 4 for h in hours],
+            "precipitation_probability": [(seed * 3 + h * 11) % 100 for h in hours],
+            "weather_code": [(0, 3, 61, 63, 71, 95)[(seed + h) % 6] for h in hours],
+            "wind_speed_10m": [(seed + h * 5) % 70 for h in hours],
+            "relative_humidity_2m": [40 + (seed + h) % 50 for h in hours],
+        },
+    }
+
+
+def geocode_payload(lat: float, lng: float) -> dict:
+    return {
+        "status": "OK",
+        "results": [
+            {
+                "formatted_address": f"{lat:.2f}, {lng:.2f}",
+                "address_components": [
+                    {"long_name": f"Town {abs(int(lat * 10 + lng * 10)) % 500}", "types": ["locality"]},
+                    {"long_name": "Arizona", "short_name": "AZ", "types": ["administrative_area_level_1"]},
+                ],
+            }
+        ],
+    }
+
+
+def create_standin_app(
+    config: StandInConfig | None = None,
+    directions_payload: dict | None = None,
+) -> FastAPI:
+    """Build one app serving all three stand-in upstreams.
+
+    Point the backend at it with ``GOOGLE_MAPS_BASE_URL`` and
+    ``OPEN_METEO_BASE_URL``.
+    """
+    config = config or StandInConfig()
+    payload = directions_payload or default_directions_payload()
+    rng = random.Random(config.seed)
+    app = FastAPI()
+    app.state.calls = {"directions": 0, "geocode": 0, "weather": 0}
+
+    async def _simulate(name: str, profile: ServiceProfile) -> JSONResponse | None:
+        app.state.calls[name] += 1
+        delay = profile.latency.sample(rng)
+        if delay:
+            await asyncio.sleep(delay)
+        if profile.error_rate and rng.random() < profile.error_rate:
+            return JSONResponse(status_code=503, content={"error": "stand-in failure"})
+        return None
+
+    @app.get("/maps/api/directions/json")
+    async def directions():
+        return await _simulate("directions", config.directions) or payload
+
+    @app.get("/maps/api/geocode/json")
+    async def geocode(latlng: str):
+        lat, lng = (float(v) for v in latlng.split(","))
+        return await _simulate("geocode", config.geocode) or geocode_payload(lat, lng)
+
+    @app.get("/v1/forecast")
+    async def forecast(latitude: float, longitude: float):
+        return await _simulate("weather", config.weather) or forecast_payload(latitude, longitude)
+
+    return app
@@ -0,0 +1,122 @@
+"""Startup profile: import-time breakdown and time to ready.
+
+Imports ``app.main`` under ``python -X importtime`` and sums self time by
+top-level package, then starts the app under uvicorn and reports how
+long ``/health`` (serving) and ``/ready`` (warm-up finished) take to go
+green, with the warm-up steps from the ``/ready`` body.
+
+    python -m bench.startup --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from .load import BACKEND_DIR, free_port
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for each ``-X importtime`` line."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def import_profile(module: str = "app.main", env: dict[str, str] | None = None) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    by_package: Counter = Counter()
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = next((cum for name, _, cum, _ in rows if name == module), 0)
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {pkg: round(us / 1000, 1) for pkg, us in by_package.most_common()},
+    }
+
+
+def time_to_ready(env: dict[str, str], timeout: float = 60.0) -> dict:
+    port = free_port()
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    marks: dict[str, float] = {}
+    body: dict = {}
+    try:
+        while time.monotonic() - started < timeout and "ready" not in marks:
+            for name in ("health", "ready"):
+                if name in marks:
+                    continue
+                try:
+                    response = httpx.get(f"http://127.0.0.1:{port}/{name}", timeout=1)
+                except httpx.HTTPError:
+                    break
+                if response.status_code == 200:
+                    marks[name] = time.monotonic() - started
+                    if name == "ready":
+                        body = response.json()
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {
+        "serving_ms": round(marks["health"] * 1000, 1) if "health" in marks else None,
+        "ready_ms": round(marks["ready"] * 1000, 1) if "ready" in marks else None,
+        "warmup_steps": body.get("steps", {}),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=12, help="packages to list")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--json", type=Path, help="write the profile to this file")
+    args = parser.parse_args(argv)
+
+    env = {"GOOGLE_MAPS_API_KEY": "bench", **dict(item.split("=", 1) for item in args.env)}
+    profile = import_profile(env=env)
+    profile["startup"] = time_to_ready(env)
+
+    print(f"import app.main: {profile['total_ms']} ms")
+    for package, ms in list(profile["packages_ms"].items())[: args.top]:
+        print(f"  {package:<36}{ms:>10.1f} ms")
+    startup = profile["startup"]
+    print(f"serving after {startup['serving_ms']} ms, ready after {startup['ready_ms']} ms")
+    for step, info in startup["warmup_steps"].items():
+        print(f"  {step:<36}{info.get('duration_ms', 0):>10.1f} ms  {info['status']}")
+    if args.json:
+        args.json.write_text(json.dumps(profile, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Synthetic Directions API payloads at configurable scale.
+
+Routes meander between a start and an end point with step lengths and
+speeds that mix short urban steps and long highway stretches.
+Alternatives share the primary route's opening and closing steps verbatim
+(so cross-route weather dedup has real work to do) and take a different
+detour in between. The output has the same shape as a Google Directions
+response, so it can be served by ``bench.standins`` or fed straight to
+``parse_directions``.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import polyline
+
+_KM_PER_DEG_LAT = 111.32
+
+
+@dataclass(frozen=True)
+class RouteSpec:
+    hours: float = 6.0
+    steps: int = 200
+    alternatives: int = 3
+    overlap: float = 0.6  # fraction of the primary's steps each alternative reuses
+    points_per_step: int = 4
+    avg_speed_kmh: float = 90.0
+    start: tuple[float, float] = (40.71, -74.01)
+    bearing_degrees: float = 250.0
+    seed: int = 0
+
+    def __post_init__(self):
+        # Each alternative needs at least one step of its own between the shared ends.
+        if not 0 <= self.overlap < 1:
+            raise ValueError(f"overlap must be in [0, 1), got {self.overlap}")
+
+
+def _offset(origin: tuple[float, float], north_km: float, east_km: float) -> tuple[float, float]:
+    lat = origin[0] + north_km / _KM_PER_DEG_LAT
+    lng = origin[1] + east_km / (_KM_PER_DEG_LAT * math.cos(math.radians(origin[0])))
+    return (lat, lng)
+
+
+def _haversine_m(a: tuple[float, float], b: tuple[float, float]) -> float:
+    lat1, lat2 = math.radians(a[0]), math.radians(b[0])
+    dlat, dlng = lat2 - lat1, math.radians(b[1] - a[1])
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 6_371_000 * 2 * math.atan2(math.sqrt(h), math.sqrt(1 - h))
+
+
+Lateral = Callable[[float], float]
+
+
+def _wiggle(rng: random.Random, amplitude_km: float) -> Lateral:
+    """Sideways offset (km) at fraction ``t`` of the route; zero at both ends."""
+    waves = [(rng.uniform(1, 4) * k, rng.uniform(0, 2 * math.pi)) for k in (1, 3, 7)]
+
+    def lateral(t: float) -> float:
+        return amplitude_km * math.sin(math.pi * t) * sum(
+            math.sin(freq * math.pi * t + phase) / (i + 1)
+            for i, (freq, phase) in enumerate(waves)
+        )
+
+    return lateral
+
+
+def _detour(base: Lateral, lo: float, hi: float, bulge_km: float) -> Lateral:
+    """``base`` plus a bulge between ``lo`` and ``hi`` that meets it at both ends."""
+
+    def lateral(t: float) -> float:
+        return base(t) + bulge_km * math.sin(math.pi * (t - lo) / (hi - lo))
+
+    return lateral
+
+
+def _path(spec: RouteSpec, fractions: list[float], lateral: Lateral) -> list[tuple[float, float]]:
+    """Points at ``fractions`` of the way along the start-to-end path."""
+    length_km = spec.hours * spec.avg_speed_kmh
+    bearing = math.radians(spec.bearing_degrees)
+    along = (math.cos(bearing), math.sin(bearing))
+    across = (-along[1], along[0])
+
+    points = []
+    for t in fractions:
+        d, side = length_km * t, lateral(t)
+        points.append(
+            _offset(
+                spec.start,
+                along[0] * d + across[0] * side,
+                along[1] * d + across[1] * side,
+            )
+        )
+    return points
+
+
+def _step_fractions(rng: random.Random, steps: int) -> list[float]:
+    # Log-normal step lengths: many short steps, a few very long ones.
+    lengths = [rng.lognormvariate(0, 1.2) for _ in range(steps)]
+    total = sum(lengths)
+    fractions, acc = [0.0], 0.0
+    for length in lengths:
+        acc += length
+        fractions.append(acc / total)
+    fractions[-1] = 1.0
+    return fractions
+
+
+def _build_steps(spec: RouteSpec, fractions: list[float], lateral: Lateral) -> list[dict]:
+    per = max(spec.points_per_step - 1, 1)
+    detail = [
+        fractions[i] + (fractions[i + 1] - fractions[i]) * j / per
+        for i in range(len(fractions) - 1)
+        for j in range(per)
+    ] + [fractions[-1]]
+    points = _path(spec, detail, lateral)
+
+    steps = []
+    for i in range(len(fractions) - 1):
+        step_points = points[i * per : (i + 1) * per + 1]
+        distance = sum(_haversine_m(a, b) for a, b in zip(step_points, step_points[1:]))
+        # Short steps are city streets, long ones are highway.
+        speed_mps = 8.0 if distance < 500 else 15.0 if distance < 5000 else 29.0
+        steps.append(
+            {
+                "duration": {"value": max(1, round(distance / speed_mps))},
+                "distance": {"value": max(1, round(distance))},
+                "start_location": {"lat": step_points[0][0], "lng": step_points[0][1]},
+                "end_location": {"lat": step_points[-1][0], "lng": step_points[-1][1]},
+                "polyline": {"points": polyline.encode(step_points)},
+            }
+        )
+    return steps
+
+
+def _route(steps: list[dict], summary: str) -> dict:
+    overview = [(s["start_location"]["lat"], s["start_location"]["lng"]) for s in steps]
+    overview.append((steps[-1]["end_location"]["lat"], steps[-1]["end_location"]["lng"]))
+    stride = max(1, len(overview) // 500)
+    return {
+        "summary": summary,
+        "overview_polyline": {"points": polyline.encode(overview[::stride] + [overview[-1]])},
+        "legs": [
+            {
+                "start_address": "Synthetic Origin",
+                "end_address": "Synthetic Destination",
+                "steps": steps,
+            }
+        ],
+    }
+
+
+def _scale_durations(steps: list[dict], total_seconds: float) -> None:
+    factor = total_seconds / sum(s["duration"]["value"] for s in steps)
+    for step in steps:
+        step["duration"]["value"] = max(1, round(step["duration"]["value"] * factor))
+
+
+def generate_directions(spec: RouteSpec | None = None) -> dict:
+    """Build a Directions-shaped payload with ``spec.alternatives`` routes."""
+    spec = spec or RouteSpec()
+    rng = random.Random(spec.seed)
+    fractions = _step_fractions(rng, spec.steps)
+    base = _wiggle(rng, amplitude_km=spec.hours * 4)
+    primary = _build_steps(spec, fractions, base)
+    _scale_durations(primary, spec.hours * 3600)
+    routes = [_route(primary, "Synthetic Route 1")]
+
+    shared = int(spec.steps * spec.overlap / 2)
+    head, tail = primary[:shared], primary[spec.steps - shared :]
+    lo, hi = fractions[shared], fractions[spec.steps - shared]
+    for n in range(1, spec.alternatives):
+        middle_fractions = [lo + (hi - lo) * f for f in _step_fractions(rng, spec.steps - 2 * shared)]
+        bulge = spec.hours * rng.uniform(3, 6) * (1 if n % 2 else -1)
+        middle = _build_steps(spec, middle_fractions, _detour(base, lo, hi, bulge))
+        # Detours are a little slower than the primary route.
+        primary_middle = sum(s["duration"]["value"] for s in primary[shared : spec.steps - shared])
+        _scale_durations(middle, primary_middle * (1 + rng.uniform(0.03, 0.15)))
+        routes.append(_route(head + middle + tail, f"Synthetic Route {n + 1}"))
+
+    return {"status": "OK", "routes": routes}
@@ -0,0 +1,91 @@
+"""Throughput scaling with the number of uvicorn workers.
+
+Runs ``bench.load`` once per worker count with the same scenario and
+lists throughput, latency and upstream Directions calls side by side.
+With ``--distinct-routes``, Directions calls show whether the workers
+share the route cache: each route should be fetched about once however
+many workers serve it.
+
+    python -m bench.workers --workers 1,2,4 -- --concurrency 64 \\
+        --requests 2000 --route-hours 12 --distinct-routes 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from . import load
+
+
+def default_worker_counts(cpus: int | None = None) -> list[int]:
+    """Powers of two up to the CPU count, plus the CPU count itself."""
+    cpus = cpus or os.cpu_count() or 1
+    counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cpus]
+    return counts + [cpus]
+
+
+def scale_rows(reports: dict[int, dict]) -> list[dict]:
+    baseline = reports[min(reports)]["throughput_rps"] or 1.0
+    rows = []
+    for workers, report in sorted(reports.items()):
+        ok = report["statuses"].get("200", 0)
+        rows.append(
+            {
+                "workers": workers,
+                "throughput_rps": report["throughput_rps"],
+                "speedup": round(report["throughput_rps"] / baseline, 2),
+                "p50_ms": report["latency_ms"]["p50"],
+                "p99_ms": report["latency_ms"]["p99"],
+                "errors": report["requests"] - ok,
+                "directions_calls": report.get("upstream_calls", {}).get("directions", 0),
+            }
+        )
+    return rows
+
+
+def format_rows(rows: list[dict]) -> str:
+    lines = [
+        f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'errors':>8}{'directions':>12}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['workers']:>8}{row['throughput_rps']:>10}{row['speedup']:>9}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}{row['directions_calls']:>12}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    load_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, load_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="Arguments after -- are passed to bench.load for every run.",
+    )
+    parser.add_argument("--workers", type=lambda v: [int(n) for n in v.split(",")],
+                        default=None, help="comma-separated worker counts (default: up to the CPU count)")
+    parser.add_argument("--json", type=Path, help="write the rows to this file")
+    args, extra = parser.parse_known_args(argv)
+    load_args = extra + load_args
+
+    reports = {}
+    for workers in args.workers or default_worker_counts():
+        print(f"--- {workers} worker(s)")
+        reports[workers] = load.main([*load_args, "--workers", str(workers)])
+    rows = scale_rows(reports)
+    print(format_rows(rows))
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
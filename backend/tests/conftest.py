@@ -9,12 +9,24 @@ os.environ.setdefault("FRONTEND_ORIGINS", "http://localhost:5173")
 
 from datetime import datetime, timezone
 
+import pytest
+
 from app.models import (
     LatLng,
+    MultiRouteResponse,
     RouteWithWeather,
     Waypoint,
     WeatherData,
 )
+from app.services.http_client import reset_resilience_state
+
+
+@pytest.fixture(autouse=True)
+def _reset_upstream_resilience():
+    """Circuit breakers and the retry budget are process-wide; isolate tests."""
+    reset_resilience_state()
+    yield
+    reset_resilience_state()
 
 
 # ---------------------------------------------------------------------------
@@ -82,3 +94,7 @@ def make_route(
         total_distance_km=total_distance_km,
         waypoints=waypoints,
     )
+
+
+def make_response(origin: str = "A") -> MultiRouteResponse:
+    return MultiRouteResponse(origin_address=origin, destination_address="B", routes=[make_route()])
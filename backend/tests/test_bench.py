@@ -0,0 +1,250 @@
+"""Tests for the bench package — stand-in upstreams and the load driver."""
+
+import json
+import random
+
+import httpx
+import polyline
+import pytest
+import respx
+from fastapi import FastAPI, Response
+
+from bench import micro
+from bench.load import drive, parse_server_timing, percentile
+from bench.micro import DEPARTURE, compare, run_case
+from bench.peers import hit_ratio, replica_env
+from bench.scaling import measure_size
+from bench.startup import parse_importtime
+from bench.standins import (
+    LatencyProfile,
+    ServiceProfile,
+    StandInConfig,
+    create_standin_app,
+    default_directions_payload,
+)
+from bench.synthetic import RouteSpec, generate_directions
+from bench.workers import default_worker_counts, scale_rows
+from app.services.directions import DIRECTIONS_URL, get_routes, parse_directions
+from app.services.sampling import sample_route_points
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://standin")
+
+
+class TestLatencyProfile:
+    def test_zero_median_means_no_delay(self):
+        assert LatencyProfile().sample(random.Random(1)) == 0.0
+
+    def test_samples_center_on_median(self):
+        rng = random.Random(1)
+        samples = sorted(LatencyProfile(100, 400).sample(rng) for _ in range(2001))
+        assert 0.09 < samples[1000] < 0.11
+        assert samples[1980] > samples[1000] * 2
+
+
+class TestStandIns:
+    async def test_serves_directions_weather_and_geocode(self):
+        app = create_standin_app()
+        async with _client(app) as client:
+            directions = (await client.get("/maps/api/directions/json")).json()
+            forecast = (await client.get("/v1/forecast", params={"latitude": 34, "longitude": -118})).json()
+            geocode = (await client.get("/maps/api/geocode/json", params={"latlng": "34.0,-118.0"})).json()
+
+        assert directions["status"] == "OK"
+        assert len(directions["routes"]) == 3
+        assert len(forecast["hourly"]["time"]) == 24
+        assert geocode["results"][0]["address_components"][0]["types"] == ["locality"]
+        assert app.state.calls == {"directions": 1, "geocode": 1, "weather": 1}
+
+    async def test_error_rate_returns_503(self):
+        config = StandInConfig(weather=ServiceProfile(error_rate=1.0), seed=1)
+        async with _client(create_standin_app(config)) as client:
+            response = await client.get("/v1/forecast", params={"latitude": 34, "longitude": -118})
+        assert response.status_code == 503
+
+    async def test_default_payload_parses_as_directions_response(self):
+        payload = default_directions_payload()
+        steps = payload["routes"][0]["legs"][0]["steps"]
+        assert polyline.decode(steps[0]["polyline"]["points"])[0] == (34.05, -118.24)
+
+        with respx.mock:
+            respx.get(DIRECTIONS_URL).mock(return_value=httpx.Response(200, json=payload))
+            result = await get_routes("A", "B")
+        assert [len(r["steps"]) for r in result["routes"]] == [40, 50, 60]
+
+
+class TestLoadDriver:
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0.0
+
+    def test_parse_server_timing(self):
+        header = "directions;dur=12.5, weather;dur=80.0, scoring;desc=x;dur=1.2"
+        assert parse_server_timing(header) == {"directions": 12.5, "weather": 80.0, "scoring": 1.2}
+        assert parse_server_timing(None) == {}
+
+    async def test_drive_reports_stage_percentiles(self):
+        app = FastAPI()
+        seen = []
+
+        @app.post("/api/route-weather")
+        async def route_weather(body: dict):
+            seen.append(body["origin"])
+            return Response(headers={"Server-Timing": "weather;dur=10.0"})
+
+        report = await drive(
+            "http://app",
+            concurrency=4,
+            total_requests=10,
+            distinct_routes=3,
+            transport=httpx.ASGITransport(app=app),
+        )
+
+        assert report["requests"] == 10
+        assert report["statuses"] == {"200": 10}
+        assert report["stages_ms"]["weather"]["p95"] == 10.0
+        assert len(set(seen)) == 3
+
+
+class TestMicrobenchmarks:
+    def test_compare_flags_slowdowns_past_threshold(self):
+        baseline = {"results": {"a": {"median_seconds": 1.0}, "b": {"median_seconds": 1.0}}}
+        current = {
+            "results": {
+                "a": {"median_seconds": 1.2},
+                "b": {"median_seconds": 1.5},
+                "new": {"median_seconds": 9.0},
+            }
+        }
+        assert compare(current, baseline, threshold=0.25) == [{"case": "b", "ratio": 1.5}]
+
+    def test_run_case_reports_per_call_seconds(self):
+        result = run_case(lambda: None, repeat=2, min_seconds=0.001)
+        assert result["number"] >= 1
+        assert 0 < result["min_seconds"] <= result["median_seconds"]
+
+    def test_every_case_sets_up(self):
+        for name, setup in micro.CASES.items():
+            if "cross_country" not in name:
+                setup()()
+
+    def test_main_fails_on_regression(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(
+            json.dumps({"results": {"cache.make_key": {"median_seconds": 1e-12}}})
+        )
+        argv = ["-k", "cache.make_key", "--repeat", "1", "--min-seconds", "0.001"]
+
+        assert micro.main(argv + ["--json", str(tmp_path / "out.json")]) == 0
+        assert "cache.make_key" in json.loads((tmp_path / "out.json").read_text())["results"]
+        assert micro.main(argv + ["--baseline", str(baseline)]) == 1
+
+
+class TestSyntheticRoutes:
+    def test_matches_requested_scale(self):
+        spec = RouteSpec(hours=10, steps=400, alternatives=4, seed=3)
+        routes = parse_directions(generate_directions(spec))["routes"]
+
+        assert len(routes) == 4
+        assert all(len(r["steps"]) == 400 for r in routes)
+        assert routes[0]["total_duration_seconds"] == pytest.approx(10 * 3600, rel=0.01)
+        assert all(r["total_duration_seconds"] > routes[0]["total_duration_seconds"] for r in routes[1:])
+
+    def test_alternatives_share_head_and_tail_and_stay_connected(self):
+        spec = RouteSpec(hours=4, steps=100, alternatives=3, overlap=0.5)
+        routes = parse_directions(generate_directions(spec))["routes"]
+        primary, alt = routes[0]["steps"], routes[1]["steps"]
+
+        assert alt[:25] == primary[:25]
+        assert alt[75:] == primary[75:]
+        assert alt[50] != primary[50]
+        for a, b in zip(alt, alt[1:]):
+            assert a["end_location"] == b["start_location"]
+
+    @pytest.mark.parametrize("overlap", [1.0, 1.5, -0.1])
+    def test_rejects_overlap_outside_unit_interval(self, overlap):
+        with pytest.raises(ValueError, match="overlap"):
+            RouteSpec(overlap=overlap)
+
+    def test_is_deterministic_per_seed(self):
+        spec = RouteSpec(hours=2, steps=50, seed=7)
+        assert generate_directions(spec) == generate_directions(spec)
+        assert generate_directions(spec) != generate_directions(RouteSpec(hours=2, steps=50, seed=8))
+
+    def test_sampler_covers_whole_route(self):
+        routes = parse_directions(generate_directions(RouteSpec(hours=6, steps=300)))["routes"]
+        waypoints = sample_route_points(routes[0]["steps"], DEPARTURE)
+        assert len(waypoints) == pytest.approx(6 * 4 + 1, abs=1)
+
+    def test_scaling_reports_each_stage(self):
+        row = measure_size(hours=1, steps=40, alternatives=2)
+        assert set(row["stages"]) == {"sampling", "dedup", "dedup_assign", "scoring", "serialize"}
+        assert row["weather_points"] <= row["waypoints"]
+
+
+class TestWorkerScaling:
+    def test_default_counts_end_at_cpu_count(self):
+        assert default_worker_counts(1) == [1]
+        assert default_worker_counts(6) == [1, 2, 4, 6]
+        assert default_worker_counts(8) == [1, 2, 4, 8]
+
+    def test_rows_report_speedup_against_fewest_workers(self):
+        def report(rps, ok, calls):
+            return {
+                "requests": 100,
+                "throughput_rps": rps,
+                "statuses": {"200": ok},
+                "latency_ms": {"p50": 10.0, "p99": 50.0},
+                "upstream_calls": {"directions": calls},
+            }
+
+        rows = scale_rows({4: report(180.0, 99, 20), 1: report(60.0, 100, 20)})
+        assert [(r["workers"], r["speedup"], r["errors"]) for r in rows] == [(1, 1.0, 0), (4, 3.0, 1)]
+        assert rows[1]["directions_calls"] == 20
+
+
+class TestPeerFleet:
+    def test_sharded_replicas_list_every_peer_and_themselves(self):
+        env = replica_env([8001, 8002, 8003], 1, sharded=True)
+        assert env["CACHE_PEERS"] == "http://127.0.0.1:8001,http://127.0.0.1:8002,http://127.0.0.1:8003"
+        assert env["CACHE_SELF_URL"] == "http://127.0.0.1:8002"
+        assert replica_env([8001, 8002], 0, sharded=False) == {}
+
+    def test_hit_ratio_counts_requests_without_directions_calls(self):
+        assert hit_ratio(300, 100) == 0.667
+        assert hit_ratio(0, 0) == 0.0
+
+    async def test_drive_spreads_requests_across_replicas(self):
+        hosts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            hosts.append(request.url.host)
+            return httpx.Response(200, json={})
+
+        await drive(
+            "http://a",
+            concurrency=2,
+            total_requests=40,
+            transport=httpx.MockTransport(handler),
+            replicas=["http://a", "http://b"],
+        )
+        assert set(hosts) == {"a", "b"}
+        assert len(hosts) == 40
+
+
+class TestStartupProfile:
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     numpy._core\n"
+            "import time:       300 |        420 |   numpy\n"
+            "import time:        50 |        470 | app.main\n"
+        )
+        assert parse_importtime(stderr) == [
+            ("numpy._core", 120, 120, 2),
+            ("numpy", 300, 420, 1),
+            ("app.main", 50, 470, 0),
+        ]
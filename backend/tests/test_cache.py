@@ -1,8 +1,13 @@
 """Tests for app.services.cache — TTLCache with OrderedDict."""
 
+import json
+import time
 from unittest.mock import patch
 
-from app.services.cache import RouteCacheManager, TTLCache
+from app.services.cache import CacheSnapshotter, RouteCacheManager, TTLCache
+from app.services.cache.snapshot import read_snapshot
+
+from tests.conftest import make_response
 
 
 # ---------------------------------------------------------------------------
@@ -127,6 +132,107 @@ class TestSet:
         assert keys[0] == "b"
 
 
+class TestRestore:
+    def test_keeps_original_expiry(self):
+        cache = TTLCache(ttl=600)
+        expires_at = time.time() + 30
+        cache.restore("k", "v", expires_at, hits=4)
+
+        assert cache.get("k") == "v"
+        [(key, value, restored_expiry, hits)] = cache.entries()
+        assert (key, value, hits) == ("k", "v", 5)
+        assert abs(restored_expiry - expires_at) < 1e-6
+
+    def test_skips_expired_entries(self):
+        cache = TTLCache(ttl=600)
+        cache.restore("k", "v", time.time() - 1)
+        assert cache.get("k") is None
+
+    def test_entries_count_hits_and_drop_expired(self):
+        cache = TTLCache(ttl=600)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.get("a")
+        cache._store["b"] = (time.time() - 601, 2)
+
+        assert [(key, hits) for key, _, _, hits in cache.entries()] == [("a", 2)]
+
+
+# ---------------------------------------------------------------------------
+# CacheSnapshotter
+# ---------------------------------------------------------------------------
+
+
+class TestCacheSnapshotter:
+    async def test_round_trip_preserves_expiry_and_hits(self, tmp_path):
+        path = tmp_path / "routes.jsonl"
+        source = TTLCache(ttl=600)
+        writer = CacheSnapshotter(source, path, interval_seconds=0)
+        await writer.restore()
+        source.set("popular", make_response("P"))
+        source.set("rare", make_response("R"))
+        for _ in range(3):
+            source.get("popular")
+
+        assert await writer.save() == 2
+        expiries = {key: expires_at for key, _, expires_at, _ in source.entries()}
+
+        target = TTLCache(ttl=600)
+        assert await CacheSnapshotter(target, path, interval_seconds=0).restore() == 2
+        assert target.get("popular") == make_response("P")
+        restored = {key: (expires_at, hits) for key, _, expires_at, hits in target.entries()}
+        assert abs(restored["popular"][0] - expiries["popular"]) < 0.01
+        assert restored["popular"][1] == 4
+
+    async def test_restore_keeps_most_hit_entries_at_capacity(self, tmp_path):
+        path = tmp_path / "routes.jsonl"
+        now = time.time()
+        value = make_response().model_dump(mode="json")
+        path.write_text(
+            "".join(
+                json.dumps({"key": key, "hits": hits, "expires_at": now + 600, "value": value}) + "\n"
+                for key, hits in [("a", 1), ("b", 9), ("c", 5)]
+            )
+        )
+        cache = TTLCache(ttl=600, max_entries=2)
+        await CacheSnapshotter(cache, path, interval_seconds=0).restore()
+
+        cache.set("d", 0)  # evicts the least-hit restored entry
+        assert cache.get("b") is not None
+        assert cache.get("c") is None
+
+    async def test_does_not_write_before_restore(self, tmp_path):
+        path = tmp_path / "routes.jsonl"
+        path.write_text("previous\n")
+        cache = TTLCache(ttl=600)
+        cache.set("k", make_response())
+        writer = CacheSnapshotter(cache, path, interval_seconds=0)
+
+        assert await writer.save() is None
+        await writer.stop()
+        assert path.read_text() == "previous\n"
+
+    async def test_unreadable_snapshot_is_replaced(self, tmp_path):
+        path = tmp_path / "routes.jsonl"
+        path.write_bytes(b"\xff\xfe not utf-8\n")
+        cache = TTLCache(ttl=600)
+        writer = CacheSnapshotter(cache, path, interval_seconds=0)
+
+        assert await writer.restore() == 0
+        cache.set("k", make_response())
+        await writer.stop()
+        assert [entry.key for entry in read_snapshot(path)] == ["k"]
+
+    async def test_redis_style_backend_has_nothing_to_write(self, tmp_path):
+        manager = RouteCacheManager()
+        writer = CacheSnapshotter(manager, tmp_path / "routes.jsonl", interval_seconds=0)
+        await writer.restore()
+        with patch.object(manager, "entries", return_value=[]):
+            assert await writer.save() is None
+        assert not (tmp_path / "routes.jsonl").exists()
+
+
 class TestRouteCacheManager:
     def test_defaults_to_memory_backend(self, monkeypatch):
         monkeypatch.setattr("app.services.cache.settings.cache_backend", "memory")
@@ -62,3 +62,29 @@ class TestSettings:
             with patch.object(Settings, "model_config", {"env_file": None}):
                 with pytest.raises(ValidationError):
                     Settings()
+
+    def test_peer_mode_requires_secret(self):
+        peers = {
+            "GOOGLE_MAPS_API_KEY": "k",
+            "CACHE_PEERS": "http://a:8000,http://b:8000",
+            "CACHE_SELF_URL": "http://a:8000",
+        }
+        with patch.dict(os.environ, peers):
+            with pytest.raises(ValidationError, match="CACHE_PEER_SECRET"):
+                Settings()
+        with patch.dict(os.environ, {**peers, "CACHE_PEER_SECRET": "s3cret"}):
+            assert Settings().cache_peer_secret == "s3cret"
+
+    def test_deferred_advisories_with_shared_cache_require_token_secret(self):
+        deferred = {
+            "GOOGLE_MAPS_API_KEY": "k",
+            "ADVISORY_LOCATION_MODE": "deferred",
+            "CACHE_BACKEND": "sqlite",
+        }
+        with patch.dict(os.environ, deferred):
+            with pytest.raises(ValidationError, match="ADVISORY_TOKEN_SECRET"):
+                Settings()
+        with patch.dict(os.environ, {**deferred, "ADVISORY_TOKEN_SECRET": "s3cret"}):
+            assert Settings().advisory_token_secret == "s3cret"
+        with patch.dict(os.environ, {**deferred, "CACHE_BACKEND": "memory"}):
+            assert Settings().advisory_location_mode == "deferred"
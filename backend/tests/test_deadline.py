@@ -0,0 +1,39 @@
+"""Tests for app.deadline — per-request time budgets."""
+
+from app import deadline
+
+
+class TestRequestBudget:
+    def test_unbounded_without_budget(self):
+        assert deadline.time_left() is None
+        assert deadline.clamp_timeout(30.0) == 30.0
+        deadline.mark_degraded("ignored")
+        assert deadline.degraded_reasons() == []
+
+    def test_zero_seconds_disables_budget(self):
+        token = deadline.start_budget(0)
+        try:
+            assert deadline.current_budget() is None
+        finally:
+            deadline.reset_budget(token)
+
+    def test_time_left_and_clamp(self):
+        token = deadline.start_budget(5.0)
+        try:
+            assert 4.0 < deadline.time_left() <= 5.0
+            assert 3.0 < deadline.time_left(reserve=1.0) <= 4.0
+            assert deadline.clamp_timeout(30.0) <= 5.0
+            assert deadline.clamp_timeout(1.0) == 1.0
+        finally:
+            deadline.reset_budget(token)
+
+    def test_degraded_reasons_are_deduplicated(self):
+        token = deadline.start_budget(5.0)
+        try:
+            deadline.mark_degraded("weather_partial")
+            deadline.mark_degraded("weather_partial")
+            deadline.mark_degraded("geocoding_skipped")
+            assert deadline.degraded_reasons() == ["weather_partial", "geocoding_skipped"]
+        finally:
+            deadline.reset_budget(token)
+        assert deadline.current_budget() is None
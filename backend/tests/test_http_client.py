@@ -1,11 +1,22 @@
 """Tests for retry behavior in app.services.http_client."""
 
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import httpx
 import pytest
 
-from app.services.http_client import request_with_retry
+from app import deadline
+from app.services import http_client
+from app.services.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgeBudget,
+    RetryBudget,
+    get_breaker,
+    get_latency_tracker,
+    request_with_retry,
+)
 
 
 @pytest.mark.asyncio
@@ -70,3 +81,233 @@ async def test_raises_after_retry_budget_exhausted():
 
     assert client.request.call_count == 3
     assert sleep_mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_honors_short_retry_after():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(
+        side_effect=[httpx.Response(503, headers={"Retry-After": "1"}), httpx.Response(200)]
+    )
+
+    with patch("app.services.http_client.asyncio.sleep", new_callable=AsyncMock) as sleep_mock:
+        response = await request_with_retry(client, "GET", "http://example.com")
+
+    assert response.status_code == 200
+    assert sleep_mock.await_args.args[0] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_long_retry_after_returns_response_without_retry():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(return_value=httpx.Response(429, headers={"Retry-After": "120"}))
+
+    with patch("app.services.http_client.asyncio.sleep", new_callable=AsyncMock) as sleep_mock:
+        response = await request_with_retry(client, "GET", "http://example.com")
+
+    assert response.status_code == 429
+    assert client.request.call_count == 1
+    assert sleep_mock.await_count == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retry_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr(http_client, "retry_budget", RetryBudget(capacity=1, refill_per_second=0))
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(return_value=httpx.Response(503))
+
+    with patch("app.services.http_client.asyncio.sleep", new_callable=AsyncMock):
+        await request_with_retry(client, "GET", "http://example.com")
+        await request_with_retry(client, "GET", "http://example.com")
+
+    # First call: attempt + one budgeted retry. Second call: attempt only.
+    assert client.request.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_rejects_without_calling_upstream():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(side_effect=httpx.ConnectError("connection failed"))
+
+    with patch("app.services.http_client.asyncio.sleep", new_callable=AsyncMock):
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await request_with_retry(client, "GET", "http://down.example.com")
+        calls = client.request.call_count
+
+        with pytest.raises(CircuitOpenError):
+            await request_with_retry(client, "GET", "http://down.example.com")
+
+    assert get_breaker("down.example.com").state == "open"
+    assert client.request.call_count == calls
+
+
+@pytest.mark.asyncio
+async def test_spent_deadline_raises_timeout_without_calling():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    token = deadline.start_budget(0.001)
+    try:
+        await asyncio.sleep(0.01)
+        with pytest.raises(httpx.TimeoutException):
+            await request_with_retry(client, "GET", "http://example.com")
+    finally:
+        deadline.reset_budget(token)
+
+    client.request.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_deadline_caps_timeout_and_skips_late_retries():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(return_value=httpx.Response(503))
+    token = deadline.start_budget(0.05)
+    try:
+        response = await request_with_retry(client, "GET", "http://example.com", timeout=30.0)
+    finally:
+        deadline.reset_budget(token)
+
+    assert response.status_code == 503
+    assert client.request.call_count == 1
+    assert client.request.call_args.kwargs["timeout"] <= 0.05
+
+
+@pytest.mark.asyncio
+async def test_deadline_caps_every_field_of_an_httpx_timeout():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.request = AsyncMock(return_value=httpx.Response(200))
+    token = deadline.start_budget(0.5)
+    try:
+        await request_with_retry(
+            client, "GET", "http://example.com",
+            timeout=httpx.Timeout(10.0, connect=0.2, pool=None),
+        )
+    finally:
+        deadline.reset_budget(token)
+
+    timeout = client.request.call_args.kwargs["timeout"]
+    assert isinstance(timeout, httpx.Timeout)
+    assert timeout.connect == 0.2
+    assert timeout.read <= 0.5 and timeout.write <= 0.5 and timeout.pool <= 0.5
+
+
+@pytest.mark.asyncio
+async def test_deadline_caps_the_client_default_timeout():
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.timeout = httpx.Timeout(30.0)
+    client.request = AsyncMock(return_value=httpx.Response(200))
+    token = deadline.start_budget(0.5)
+    try:
+        await request_with_retry(client, "GET", "http://example.com")
+    finally:
+        deadline.reset_budget(token)
+
+    assert client.request.call_args.kwargs["timeout"].read <= 0.5
+
+
+class TestCircuitBreaker:
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker("h", failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        assert breaker.allow() is True
+        assert breaker.state == "half_open"
+        assert breaker.allow() is False
+
+    def test_probe_success_closes_circuit(self):
+        breaker = CircuitBreaker("h", failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow() is True
+
+    def test_probe_failure_reopens_circuit(self):
+        breaker = CircuitBreaker("h", failure_threshold=3, reset_seconds=0)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_stays_open_until_reset_timeout(self):
+        breaker = CircuitBreaker("h", failure_threshold=1, reset_seconds=60)
+        breaker.record_failure()
+        assert breaker.allow() is False
+
+
+class TestHedging:
+    @staticmethod
+    def _client_with_delays(*delays: float) -> tuple[AsyncMock, list[str]]:
+        """Client whose n-th call answers after delays[n] with body 'call-n'."""
+        calls: list[str] = []
+
+        async def respond(method, url, **kwargs):
+            n = len(calls)
+            calls.append(url)
+            await asyncio.sleep(delays[n])
+            return httpx.Response(200, text=f"call-{n}")
+
+        client = AsyncMock(spec=httpx.AsyncClient)
+        client.request = AsyncMock(side_effect=respond)
+        return client, calls
+
+    @staticmethod
+    def _warm(host: str, latency: float = 0.01, samples: int = 20) -> None:
+        tracker = get_latency_tracker(host)
+        for _ in range(samples):
+            tracker.record(latency)
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_fast_hedge_wins(self, monkeypatch):
+        monkeypatch.setattr(http_client, "hedge_budget", HedgeBudget(ratio=1.0))
+        self._warm("slow.example.com")
+        client, calls = self._client_with_delays(1.0, 0.0)
+
+        response = await asyncio.wait_for(
+            request_with_retry(client, "GET", "http://slow.example.com", hedge=True), timeout=0.5
+        )
+
+        assert response.text == "call-1"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, monkeypatch):
+        monkeypatch.setattr(http_client, "hedge_budget", HedgeBudget(ratio=1.0))
+        self._warm("fast.example.com", latency=0.5)
+        client, calls = self._client_with_delays(0.0)
+
+        response = await request_with_retry(client, "GET", "http://fast.example.com", hedge=True)
+
+        assert response.text == "call-0"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_latency_history(self, monkeypatch):
+        monkeypatch.setattr(http_client, "hedge_budget", HedgeBudget(ratio=1.0))
+        client, calls = self._client_with_delays(0.05)
+
+        await request_with_retry(client, "GET", "http://new.example.com", hedge=True)
+
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_hedge_budget_waits_for_primary(self, monkeypatch):
+        monkeypatch.setattr(http_client, "hedge_budget", HedgeBudget(ratio=0.0))
+        self._warm("slow.example.com")
+        client, calls = self._client_with_delays(0.05)
+
+        response = await request_with_retry(client, "GET", "http://slow.example.com", hedge=True)
+
+        assert response.text == "call-0"
+        assert len(calls) == 1
+
+
+class TestHedgeBudget:
+    def test_allows_ratio_of_requests(self):
+        budget = HedgeBudget(ratio=0.25)
+        granted = 0
+        for _ in range(8):
+            budget.record_request()
+            granted += budget.try_acquire()
+        assert granted == 2
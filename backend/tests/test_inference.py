@@ -0,0 +1,93 @@
+"""Tests for app.services.inference — cross-request prediction batching."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.services.inference import InferenceBatcher
+from app.services.offload import OffloadPools
+
+
+def _sum_rows(model, matrix: np.ndarray) -> np.ndarray:
+    return matrix.sum(axis=1) * model
+
+
+class TestInferenceBatcher:
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_prediction(self):
+        predict = MagicMock(side_effect=_sum_rows)
+        batcher = InferenceBatcher(predict, window_seconds=0.01)
+
+        first, second = await asyncio.gather(
+            batcher.predict(1, np.array([[1.0, 2.0], [3.0, 4.0]])),
+            batcher.predict(1, np.array([[10.0, 20.0]])),
+        )
+
+        assert predict.call_count == 1
+        assert predict.call_args.args[1].shape == (3, 2)
+        np.testing.assert_array_equal(first, [3.0, 7.0])
+        np.testing.assert_array_equal(second, [30.0])
+
+    @pytest.mark.asyncio
+    async def test_flushes_early_at_max_rows(self):
+        predict = MagicMock(side_effect=_sum_rows)
+        batcher = InferenceBatcher(predict, window_seconds=60, max_rows=2)
+
+        result = await asyncio.wait_for(
+            batcher.predict(1, np.array([[1.0], [2.0]])), timeout=1
+        )
+
+        np.testing.assert_array_equal(result, [1.0, 2.0])
+        assert predict.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_prediction_error_reaches_every_caller(self):
+        predict = MagicMock(side_effect=ValueError("bad features"))
+        batcher = InferenceBatcher(predict, window_seconds=0.001)
+
+        results = await asyncio.gather(
+            batcher.predict(1, np.array([[1.0]])),
+            batcher.predict(1, np.array([[2.0]])),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert predict.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rows_are_predicted_by_the_model_their_caller_chose(self):
+        predict = MagicMock(side_effect=_sum_rows)
+        batcher = InferenceBatcher(predict, window_seconds=0.01)
+
+        old, new, old_again = await asyncio.gather(
+            batcher.predict(1, np.array([[1.0]])),
+            batcher.predict(10, np.array([[2.0]])),
+            batcher.predict(1, np.array([[3.0]])),
+        )
+
+        assert predict.call_count == 2
+        np.testing.assert_array_equal(old, [1.0])
+        np.testing.assert_array_equal(new, [20.0])
+        np.testing.assert_array_equal(old_again, [3.0])
+
+    @pytest.mark.asyncio
+    async def test_flush_predicts_off_the_event_loop(self, monkeypatch):
+        pools = OffloadPools(threads=1, processes=0, queue_size=4)
+        monkeypatch.setattr("app.services.inference.offload", pools)
+        predict_threads = []
+
+        def predict(model, matrix):
+            predict_threads.append(threading.get_ident())
+            return _sum_rows(model, matrix)
+
+        batcher = InferenceBatcher(predict, window_seconds=0.001)
+        try:
+            result = await batcher.predict(1, np.array([[1.0, 2.0]]))
+        finally:
+            pools.shutdown()
+
+        np.testing.assert_array_equal(result, [3.0])
+        assert predict_threads and predict_threads[0] != threading.get_ident()
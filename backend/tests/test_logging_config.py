@@ -0,0 +1,71 @@
+"""Tests for app.logging_config — formatters, sampling and the log queue."""
+
+import json
+import logging
+import queue
+from unittest.mock import patch
+
+from app.logging_config import (
+    JsonLogFormatter,
+    LevelSamplingFilter,
+    NonBlockingQueueHandler,
+    PlainLogFormatter,
+)
+
+
+def _record(level=logging.INFO, msg="Request completed", **extra):
+    record = logging.LogRecord("app.main", level, __file__, 1, msg, None, None)
+    record.created = 0.0
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestFormatters:
+    def test_json_uses_record_time_and_extras(self):
+        record = _record(request_id="abc", status_code=200, stages_ms={"weather": 12.5})
+        payload = json.loads(JsonLogFormatter().format(record))
+
+        assert payload["timestamp"] == "1970-01-01T00:00:00+00:00"
+        assert payload["request_id"] == "abc"
+        assert payload["status_code"] == 200
+        assert payload["stages_ms"] == {"weather": 12.5}
+
+    def test_plain_uses_record_time(self):
+        line = PlainLogFormatter().format(_record(request_id="abc"))
+        assert line.startswith("1970-01-01T00:00:00+00:00 INFO [app.main] request_id=abc")
+
+
+class TestLevelSamplingFilter:
+    def test_drops_sampled_info_records_above_rate(self):
+        sampler = LevelSamplingFilter(0.1)
+        with patch("app.logging_config.random.random", return_value=0.5):
+            assert sampler.filter(_record(sampled=True)) is False
+            assert sampler.filter(_record()) is True
+            assert sampler.filter(_record(logging.WARNING, sampled=True)) is True
+        with patch("app.logging_config.random.random", return_value=0.05):
+            assert sampler.filter(_record(sampled=True)) is True
+
+    def test_full_rate_keeps_everything(self):
+        assert LevelSamplingFilter(1.0).filter(_record(sampled=True)) is True
+
+
+class TestNonBlockingQueueHandler:
+    def test_enqueues_unformatted_record(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+        record = _record(msg="hello %s")
+        record.args = ("world",)
+        handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+        assert queued is record
+        assert queued.args == ("world",)
+
+    def test_drops_records_when_queue_full(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        with patch("app.logging_config.LOG_RECORDS_DROPPED") as dropped:
+            handler.handle(_record())
+            handler.handle(_record())
+
+        assert handler.queue.qsize() == 1
+        dropped.inc.assert_called_once()
@@ -0,0 +1,51 @@
+"""Tests for app.loop_monitor — event-loop lag and blocking detection."""
+
+import asyncio
+import logging
+import time
+
+from app.logging_config import reset_request_id, set_request_id
+from app.loop_monitor import LoopMonitor
+
+
+def _block_loop(seconds):
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    async def test_logs_blocking_stack_with_request_id(self, caplog):
+        monitor = LoopMonitor(interval_seconds=0.01, block_threshold_seconds=0.05)
+        monitor.start()
+
+        async def handler():
+            token = set_request_id("req-blocked")
+            try:
+                await asyncio.sleep(0.03)
+                _block_loop(0.2)
+            finally:
+                reset_request_id(token)
+
+        with caplog.at_level(logging.WARNING, logger="app.loop_monitor"):
+            await asyncio.create_task(handler())
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+
+        records = [r for r in caplog.records if "Event loop blocked" in r.getMessage()]
+        assert len(records) == 1
+        assert records[0].request_id == "req-blocked"
+        assert "_block_loop" in records[0].getMessage()
+
+    async def test_idle_loop_is_not_reported(self, caplog):
+        monitor = LoopMonitor(interval_seconds=0.01, block_threshold_seconds=0.1)
+        monitor.start()
+        with caplog.at_level(logging.WARNING, logger="app.loop_monitor"):
+            await asyncio.sleep(0.15)
+            await monitor.stop()
+
+        assert not [r for r in caplog.records if "Event loop blocked" in r.getMessage()]
+
+    async def test_zero_interval_disables_monitor(self):
+        monitor = LoopMonitor(interval_seconds=0, block_threshold_seconds=0.1)
+        monitor.start()
+        assert monitor._heartbeat_task is None
+        await monitor.stop()
@@ -6,6 +6,8 @@ import httpx
 import pytest
 
 from app.main import app
+from app.readiness import Readiness
+from app.slow_requests import slow_requests
 
 
 @pytest.mark.asyncio
@@ -45,3 +47,112 @@ async def test_metrics_endpoint_exposed():
 
     assert resp.status_code == 200
     assert "http_requests_total" in resp.text or "http_request_duration_seconds" in resp.text
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_hidden_without_token(monkeypatch):
+    monkeypatch.setattr("app.admin.settings.admin_token", None)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        resp = await client.get("/admin/model", headers={"X-Admin-Token": "anything"})
+
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_admin_model_status_requires_token(monkeypatch):
+    monkeypatch.setattr("app.admin.settings.admin_token", "s3cret")
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        denied = await client.get("/admin/model", headers={"X-Admin-Token": "wrong"})
+        allowed = await client.get("/admin/model", headers={"X-Admin-Token": "s3cret"})
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()["version"].startswith("route_model-")
+
+
+@pytest.mark.asyncio
+async def test_debug_slow_lists_recorded_requests(monkeypatch):
+    monkeypatch.setattr("app.admin.settings.admin_token", "s3cret")
+    monkeypatch.setattr(slow_requests, "threshold_ms", 0.0)
+    slow_requests.clear()
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            await client.get("/health", headers={"X-Request-ID": "slow-1"})
+            denied = await client.get("/debug/slow")
+            resp = await client.get("/debug/slow", headers={"X-Admin-Token": "s3cret"})
+    finally:
+        slow_requests.clear()
+
+    assert denied.status_code == 403
+    assert resp.status_code == 200
+    entries = resp.json()["requests"]
+    assert any(e["request_id"] == "slow-1" and e["path"] == "/health" for e in entries)
+
+
+@pytest.mark.asyncio
+async def test_debug_profile_returns_collapsed_stacks(monkeypatch):
+    monkeypatch.setattr("app.admin.settings.admin_token", "s3cret")
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        too_long = await client.get(
+            "/debug/profile", params={"seconds": 600}, headers={"X-Admin-Token": "s3cret"}
+        )
+        resp = await client.get(
+            "/debug/profile",
+            params={"seconds": 0.05, "interval_ms": 5},
+            headers={"X-Admin-Token": "s3cret"},
+        )
+
+    assert too_long.status_code == 422
+    assert resp.status_code == 200
+    assert int(resp.headers["X-Profile-Samples"]) > 0
+    assert resp.text.strip().rsplit(" ", 1)[-1].isdigit()
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_record_memory_in_slow_log(monkeypatch):
+    monkeypatch.setattr("app.main.settings.memory_trace_sample_rate", 1.0)
+    monkeypatch.setattr(slow_requests, "threshold_ms", 0.0)
+    slow_requests.clear()
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            await client.get("/health", headers={"X-Request-ID": "mem-1"})
+        entries = slow_requests.snapshot()
+    finally:
+        slow_requests.clear()
+
+    entry = next(e for e in entries if e["request_id"] == "mem-1")
+    assert entry["memory"]["peak_bytes"] >= 0
+    assert entry["memory"]["stages"] == {}
+
+
+@pytest.mark.asyncio
+async def test_ready_is_503_until_warm_up_finishes(monkeypatch):
+    state = Readiness()
+    monkeypatch.setattr("app.main.readiness", state)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        starting = await client.get("/ready")
+        state.mark_ready()
+        ready = await client.get("/ready")
+
+    assert starting.status_code == 503
+    assert starting.json()["status"] == "starting"
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
@@ -0,0 +1,143 @@
+"""Tests for app.memory_trace — sampled per-request allocation accounting."""
+
+import tracemalloc
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from app import memory_trace, timing
+from app.main import app
+from app.models import RouteRecommendation
+from app.services.cache import route_cache
+from app.slow_requests import SlowRequestRecorder
+
+from tests.conftest import make_waypoint
+
+
+def _traced_request():
+    token = timing.start_trace()
+    trace = timing.current_trace()
+    trace.memory = memory_trace.maybe_start(1.0)
+    return token, trace
+
+
+class TestMemoryTrace:
+    def test_not_sampled_at_zero_rate(self):
+        assert memory_trace.maybe_start(0.0) is None
+        assert not tracemalloc.is_tracing()
+
+    def test_records_stage_peaks_and_retained_blocks(self):
+        token, trace = _traced_request()
+        kept = []
+        try:
+            with timing.stage("scoring"):
+                with timing.stage("inference"):
+                    scratch = [bytearray(1024) for _ in range(1000)]
+                    del scratch
+                kept.extend(object() for _ in range(500))
+            summary = trace.memory.finish()
+        finally:
+            timing.reset_trace(token)
+
+        inference, scoring = summary["stages"]["inference"], summary["stages"]["scoring"]
+        assert inference["peak_bytes"] > 1_000_000
+        assert inference["net_bytes"] < 100_000
+        assert scoring["peak_bytes"] >= inference["peak_bytes"]
+        assert scoring["net_bytes"] >= 500 * 16
+        assert "net_blocks" not in scoring
+        assert summary["peak_bytes"] >= scoring["peak_bytes"]
+        assert summary["net_blocks"] >= 500
+        assert not tracemalloc.is_tracing()
+
+    def test_stages_do_not_take_snapshots(self, monkeypatch):
+        token, trace = _traced_request()
+        snapshots = []
+        take_snapshot = tracemalloc.take_snapshot
+        monkeypatch.setattr(
+            memory_trace.tracemalloc, "take_snapshot", lambda: snapshots.append(1) or take_snapshot()
+        )
+        try:
+            for name in ("directions", "sampling", "weather", "scoring"):
+                with timing.stage(name):
+                    pass
+            trace.memory.finish()
+        finally:
+            timing.reset_trace(token)
+
+        # Only the end of the request; the start was taken before patching.
+        assert len(snapshots) == 1
+
+    def test_stages_after_finish_are_ignored(self):
+        token, trace = _traced_request()
+        try:
+            with timing.stage("directions"):
+                summary = trace.memory.finish()
+            with timing.stage("scoring"):
+                pass
+        finally:
+            timing.reset_trace(token)
+
+        assert "scoring" not in summary["stages"]
+        assert not tracemalloc.is_tracing()
+
+    def test_one_request_traced_at_a_time(self):
+        first = memory_trace.maybe_start(1.0)
+        try:
+            assert memory_trace.maybe_start(1.0) is None
+        finally:
+            first.finish()
+
+        second = memory_trace.maybe_start(1.0)
+        assert second is not None
+        second.finish()
+
+    def test_leaves_external_tracing_running(self):
+        tracemalloc.start()
+        try:
+            memory_trace.maybe_start(1.0).finish()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+
+class TestSampledRequest:
+    async def test_pipeline_stages_are_recorded(self, monkeypatch):
+        monkeypatch.setattr("app.main.settings.memory_trace_sample_rate", 1.0)
+        recorder = SlowRequestRecorder(capacity=5, threshold_ms=0, window_seconds=60)
+        monkeypatch.setattr("app.main.slow_requests", recorder)
+        route_cache.clear()
+        route = {
+            "overview_polyline": "abc",
+            "summary": "via I-5 S",
+            "total_duration_seconds": 600,
+            "total_distance_meters": 10000,
+            "steps": [],
+        }
+
+        with (
+            patch(
+                "app.routes.get_routes",
+                new_callable=AsyncMock,
+                return_value={"origin_address": "A", "destination_address": "B", "routes": [route]},
+            ),
+            patch("app.routes.sample_route_points", return_value=[make_waypoint()]),
+            patch("app.routes.get_weather_for_waypoints", new_callable=AsyncMock),
+            patch(
+                "app.routes.score_routes",
+                new_callable=AsyncMock,
+                return_value=RouteRecommendation(recommended_route_index=0, scores=[], advisories=[[]]),
+            ),
+        ):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                resp = await client.post(
+                    "/api/route-weather", json={"origin": "Memory", "destination": "Traced"}
+                )
+        route_cache.clear()
+
+        assert resp.status_code == 200
+        [entry] = recorder.snapshot()
+        stages = entry["memory"]["stages"]
+        for stage in ("directions", "sampling", "weather", "scoring"):
+            assert stage in stages, stage
@@ -0,0 +1,42 @@
+"""Tests for app.metrics — merging worker metrics in multiprocess mode."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _run_worker(multiproc_dir: Path, code: str) -> None:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    subprocess.run(
+        [sys.executable, "-c", f"from app import metrics\n{code}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+    )
+
+
+def test_workers_share_one_metrics_view(tmp_path):
+    _run_worker(
+        tmp_path,
+        "metrics.MODEL_RELOADS.labels(result='success').inc()\n"
+        "metrics.CACHE_SNAPSHOT_ENTRIES.set(5)",
+    )
+    _run_worker(
+        tmp_path,
+        "metrics.MODEL_RELOADS.labels(result='success').inc()\n"
+        "metrics.CACHE_SNAPSHOT_ENTRIES.set(7)",
+    )
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(tmp_path))
+
+    assert registry.get_sample_value(
+        "route_weather_model_reloads_total", {"result": "success"}
+    ) == 2
+    assert registry.get_sample_value("route_weather_cache_snapshot_entries") == 7
@@ -0,0 +1,158 @@
+"""Tests for app.services.model_registry — versioned model hot reload."""
+
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+from app.services import model_registry as registry_module
+from app.services.model_registry import ModelRegistry, ModelUnavailableError, load_artifact
+
+BUNDLED_MODEL = Path(__file__).resolve().parent.parent / "app" / "ml" / "route_model.joblib"
+
+
+class ConstantModel:
+    n_features_in_ = 9
+
+    def __init__(self, value: float):
+        self.value = value
+
+    def predict(self, matrix):
+        return np.full(len(matrix), self.value)
+
+
+class WrongShapeModel:
+    n_features_in_ = 4
+
+    def predict(self, matrix):
+        return np.zeros(len(matrix))
+
+
+class TestLoadArtifact:
+    def test_bundled_model_is_valid(self):
+        loaded = load_artifact(BUNDLED_MODEL)
+        assert loaded.version.startswith("route_model-")
+
+    def test_rejects_wrong_feature_count(self, tmp_path):
+        path = tmp_path / "bad.joblib"
+        joblib.dump(WrongShapeModel(), path)
+        with pytest.raises(ValueError, match="features"):
+            load_artifact(path)
+
+    def test_rejects_non_finite_predictions(self, tmp_path):
+        path = tmp_path / "nan.joblib"
+        joblib.dump(ConstantModel(float("nan")), path)
+        with pytest.raises(ValueError, match="probe"):
+            load_artifact(path)
+
+
+class TestModelRegistry:
+    def test_loads_lazily_on_first_use(self, tmp_path):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+
+        assert not registry.loaded
+        assert registry.predict(np.zeros((2, 9))).tolist() == [10.0, 10.0]
+        assert registry.loaded
+
+    def test_load_keeps_an_already_active_model(self, tmp_path):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+        version = registry.version
+
+        time.sleep(0.01)
+        joblib.dump(ConstantModel(20.0), tmp_path / "v2.joblib")
+        registry.load()
+
+        assert registry.version == version
+
+    def test_loads_newest_artifact_from_directory(self, tmp_path):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        time.sleep(0.01)
+        joblib.dump(ConstantModel(20.0), tmp_path / "v2.joblib")
+
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+
+        assert registry.version.startswith("v2-")
+        assert registry.predict(np.zeros((2, 9))).tolist() == [20.0, 20.0]
+
+    async def test_ensure_loaded_loads_in_a_thread(self, tmp_path, monkeypatch):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        load = registry.load
+        threads = []
+        monkeypatch.setattr(registry, "load", lambda: threads.append(threading.get_ident()) or load())
+
+        loaded = await registry.ensure_loaded()
+
+        assert loaded.version.startswith("v1-")
+        assert len(threads) == 1 and threads[0] != threading.get_ident()
+
+    async def test_failed_load_fails_fast_until_a_reload_succeeds(self, tmp_path, monkeypatch):
+        bad = tmp_path / "bad.joblib"
+        joblib.dump(WrongShapeModel(), bad)
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        attempts = []
+        monkeypatch.setattr(
+            registry_module, "load_artifact", lambda path: attempts.append(path) or load_artifact(path)
+        )
+
+        with pytest.raises(ModelUnavailableError):
+            await registry.ensure_loaded()
+        with pytest.raises(ModelUnavailableError):
+            await registry.ensure_loaded()
+        assert attempts == [bad]
+
+        assert registry.reload_now(BUNDLED_MODEL)
+        assert (await registry.ensure_loaded()).path == BUNDLED_MODEL
+
+    def test_falls_back_to_default_path(self, tmp_path):
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+        assert registry.active.path == BUNDLED_MODEL
+
+    def test_invalid_reload_keeps_active_model(self, tmp_path):
+        shutil.copy(BUNDLED_MODEL, tmp_path / "good.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+        before = registry.version
+
+        bad = tmp_path / "bad.joblib"
+        joblib.dump(WrongShapeModel(), bad)
+
+        assert registry.reload_now(bad) is False
+        assert registry.version == before
+
+    def test_background_reload_swaps_model(self, tmp_path):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+
+        time.sleep(0.01)
+        joblib.dump(ConstantModel(30.0), tmp_path / "v2.joblib")
+        registry.reload_in_background().join(timeout=5)
+
+        assert registry.version.startswith("v2-")
+        assert registry.predict(np.zeros((1, 9))).tolist() == [30.0]
+
+    def test_watcher_picks_up_new_artifact(self, tmp_path):
+        joblib.dump(ConstantModel(10.0), tmp_path / "v1.joblib")
+        registry = ModelRegistry(BUNDLED_MODEL, tmp_path)
+        registry.load()
+        registry.start_watching(0.01)
+        try:
+            time.sleep(0.02)
+            joblib.dump(ConstantModel(40.0), tmp_path / "v2.joblib")
+            deadline = time.monotonic() + 5
+            while not registry.version.startswith("v2-") and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            registry.stop_watching()
+
+        assert registry.version.startswith("v2-")
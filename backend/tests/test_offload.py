@@ -0,0 +1,95 @@
+"""Tests for app.services.offload — running CPU-bound stages off the loop."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.logging_config import get_request_id, reset_request_id, set_request_id
+from app.routes import sample_all_routes
+from app.services import offload as offload_module
+from app.services.directions import parse_directions
+from app.services.offload import OffloadPools
+from app.services.sampling import sample_route_points, sample_routes_offsets
+from bench.standins import default_directions_payload
+
+DEPARTURE = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+
+
+class TestOffloadPools:
+    async def test_runs_inline_without_pools(self):
+        pools = OffloadPools(threads=0, processes=0, queue_size=4)
+        assert await pools.run_in_thread("dedup", threading.get_ident) == threading.get_ident()
+        assert await pools.run_in_process("sampling", threading.get_ident) == threading.get_ident()
+
+    async def test_thread_pool_keeps_request_context(self):
+        pools = OffloadPools(threads=2, processes=0, queue_size=4)
+        token = set_request_id("req-offload")
+        try:
+            worker_thread, request_id = await pools.run_in_thread(
+                "dedup", lambda: (threading.get_ident(), get_request_id())
+            )
+        finally:
+            reset_request_id(token)
+            pools.shutdown()
+
+        assert worker_thread != threading.get_ident()
+        assert request_id == "req-offload"
+
+    async def test_queue_bounds_in_flight_calls(self):
+        pools = OffloadPools(threads=4, processes=0, queue_size=1)
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        try:
+            await asyncio.gather(*(pools.run_in_thread("dedup", work) for _ in range(4)))
+        finally:
+            pools.shutdown()
+        assert peak == 1
+
+    async def test_counts_loop_time_saved(self, monkeypatch):
+        saved = []
+
+        class _Counter:
+            def labels(self, **labels):
+                return self
+
+            def inc(self, seconds):
+                saved.append(seconds)
+
+        monkeypatch.setattr(offload_module, "OFFLOAD_SAVED_SECONDS", _Counter())
+        pools = OffloadPools(threads=1, processes=0, queue_size=4)
+        try:
+            await pools.run_in_thread("scoring", time.sleep, 0.02)
+        finally:
+            pools.shutdown()
+        assert saved and saved[0] >= 0.02
+
+    async def test_process_pool_samples_routes(self):
+        steps = [r["steps"] for r in parse_directions(default_directions_payload())["routes"]]
+        pools = OffloadPools(threads=0, processes=1, queue_size=4)
+        try:
+            offsets = await pools.run_in_process("sampling", sample_routes_offsets, steps)
+        finally:
+            pools.shutdown()
+        assert offsets == sample_routes_offsets(steps)
+
+
+async def test_sample_all_routes_in_process_matches_inline_sampling(monkeypatch):
+    routes = parse_directions(default_directions_payload())["routes"]
+    pools = OffloadPools(threads=0, processes=1, queue_size=4)
+    monkeypatch.setattr("app.routes.offload", pools)
+    try:
+        sampled = await sample_all_routes(routes, DEPARTURE)
+    finally:
+        pools.shutdown()
+    assert sampled == [sample_route_points(r["steps"], DEPARTURE) for r in routes]
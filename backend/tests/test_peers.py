@@ -0,0 +1,326 @@
+"""Tests for app.services.cache.peers and .singleflight — sharding the route cache across replicas."""
+
+import asyncio
+import contextvars
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+import respx
+from fastapi import HTTPException
+
+from app import timing
+from app.main import app
+from app.models import RouteRequest
+from app.rate_limit import limiter
+from app.services.cache import PeerGroup, SingleFlight, route_cache
+from app.services.cache.peers import (
+    PEER_ANSWER_HEADER,
+    PEER_PATH,
+    PEER_SECRET_HEADER,
+    HashRing,
+    PeerError,
+)
+from app.slow_requests import SlowRequestRecorder
+
+from tests.conftest import make_response
+
+PEERS = ["http://a:8000", "http://b:8000", "http://c:8000"]
+
+
+def _payload_owned_by(group: PeerGroup, owner: str) -> dict:
+    for i in range(1000):
+        body = {"origin": f"Origin {i}", "destination": "Destination"}
+        if group.owner(route_cache.make_key(body["origin"], body["destination"], None)) == owner:
+            return body
+    raise AssertionError(f"no key owned by {owner}")
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestHashRing:
+    def test_spreads_keys_across_nodes(self):
+        ring = HashRing(PEERS)
+        owners = [ring.owner(f"key-{i}") for i in range(3000)]
+        for node in PEERS:
+            assert 0.2 < owners.count(node) / len(owners) < 0.47
+
+    def test_adding_a_node_moves_only_its_share(self):
+        before = HashRing(PEERS)
+        after = HashRing([*PEERS, "http://d:8000"])
+        keys = [f"key-{i}" for i in range(3000)]
+        moved = [k for k in keys if before.owner(k) != after.owner(k)]
+
+        assert all(after.owner(k) == "http://d:8000" for k in moved)
+        assert len(moved) / len(keys) < 0.4
+
+    def test_same_owner_regardless_of_list_order(self):
+        assert HashRing(PEERS).owner("k") == HashRing(list(reversed(PEERS))).owner("k")
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_run(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        assert calls == 1
+        assert [r for r, _ in results] == ["done"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert len(flights) == 0
+
+    async def test_errors_reach_every_caller(self):
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+    async def test_cancelled_caller_does_not_cancel_the_work(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == ("done", True)
+
+    async def test_work_runs_outside_the_callers_context(self):
+        flights = SingleFlight()
+        var = contextvars.ContextVar("var", default="unset")
+        var.set("caller")
+
+        async def work():
+            seen = var.get()
+            var.set("work")
+            return seen
+
+        assert await flights.do("k", work) == ("unset", False)
+        assert var.get() == "caller"
+
+
+class TestPeerGroup:
+    def test_disabled_without_self_url_or_peers(self):
+        assert not PeerGroup(None, PEERS).enabled
+        assert not PeerGroup("http://a:8000", []).enabled
+        assert PeerGroup("http://a:8000/", PEERS).enabled
+
+    def test_own_keys_are_handled_locally(self):
+        group = PeerGroup("http://a:8000", PEERS)
+        key = next(f"k{i}" for i in range(100) if group.owner(f"k{i}") == "http://a:8000")
+        assert group.remote_owner(key) is None
+
+    @respx.mock
+    async def test_fetches_from_owner_then_serves_hot_copy(self):
+        group = PeerGroup("http://a:8000", PEERS, secret="s3cret")
+        route = respx.post(f"http://b:8000{PEER_PATH}").mock(
+            return_value=httpx.Response(200, content=make_response("owned").model_dump_json())
+        )
+        payload = RouteRequest(origin="X", destination="Y")
+
+        first = await group.fetch("http://b:8000", "k", payload)
+        second = await group.fetch("http://b:8000", "k", payload)
+        await group.aclose()
+
+        assert first.origin_address == second.origin_address == "owned"
+        assert route.call_count == 1
+        assert route.calls[0].request.headers[PEER_SECRET_HEADER] == "s3cret"
+
+    @respx.mock
+    async def test_unreachable_owner_is_skipped_for_a_cooldown(self):
+        group = PeerGroup("http://a:8000", PEERS)
+        respx.post(f"http://b:8000{PEER_PATH}").mock(side_effect=httpx.ConnectError("refused"))
+        key = next(f"k{i}" for i in range(100) if group.owner(f"k{i}") == "http://b:8000")
+
+        assert await group.fetch("http://b:8000", key, RouteRequest(origin="X", destination="Y")) is None
+        assert group.remote_owner(key) is None
+        await group.aclose()
+
+    @respx.mock
+    async def test_owner_errors_are_passed_on(self):
+        group = PeerGroup("http://a:8000", PEERS)
+        respx.post(f"http://b:8000{PEER_PATH}").mock(
+            return_value=httpx.Response(503, json={"detail": "Upstream API temporarily unavailable"})
+        )
+        with pytest.raises(PeerError) as exc_info:
+            await group.fetch("http://b:8000", "k", RouteRequest(origin="X", destination="Y"))
+        await group.aclose()
+        assert exc_info.value.status_code == 503
+
+    @respx.mock
+    async def test_route_not_found_on_owner_is_passed_on(self):
+        group = PeerGroup("http://a:8000", PEERS)
+        respx.post(f"http://b:8000{PEER_PATH}").mock(
+            return_value=httpx.Response(
+                404, json={"detail": "No routes found"}, headers={PEER_ANSWER_HEADER: "1"}
+            )
+        )
+        key = next(f"k{i}" for i in range(100) if group.owner(f"k{i}") == "http://b:8000")
+
+        with pytest.raises(PeerError) as exc_info:
+            await group.fetch("http://b:8000", key, RouteRequest(origin="X", destination="Y"))
+        await group.aclose()
+        assert (exc_info.value.status_code, exc_info.value.detail) == (404, "No routes found")
+        # The owner is healthy, so it stays in the ring.
+        assert group.remote_owner(key) == "http://b:8000"
+
+    @respx.mock
+    async def test_missing_peer_endpoint_is_skipped_for_a_cooldown(self):
+        group = PeerGroup("http://a:8000", PEERS)
+        respx.post(f"http://b:8000{PEER_PATH}").mock(
+            return_value=httpx.Response(404, json={"detail": "Not Found"})
+        )
+        key = next(f"k{i}" for i in range(100) if group.owner(f"k{i}") == "http://b:8000")
+
+        assert await group.fetch("http://b:8000", key, RouteRequest(origin="X", destination="Y")) is None
+        assert group.remote_owner(key) is None
+        await group.aclose()
+
+
+class TestPeerRouting:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        route_cache.clear()
+        storage = getattr(limiter, "_storage", None)
+        if storage and hasattr(storage, "reset"):
+            storage.reset()
+        yield
+        route_cache.clear()
+
+    @respx.mock
+    async def test_miss_on_non_owner_is_served_by_owner(self, monkeypatch):
+        group = PeerGroup("http://a:8000", PEERS)
+        monkeypatch.setattr("app.routes.peer_group", group)
+        body = _payload_owned_by(group, "http://b:8000")
+        respx.post(f"http://b:8000{PEER_PATH}").mock(
+            return_value=httpx.Response(200, content=make_response("from b").model_dump_json())
+        )
+
+        with patch("app.routes._build_route_weather", new_callable=AsyncMock) as build:
+            async with _client() as client:
+                resp = await client.post("/api/route-weather", json=body)
+        await group.aclose()
+
+        assert resp.status_code == 200
+        assert resp.json()["origin_address"] == "from b"
+        assert "peer;dur=" in resp.headers["Server-Timing"]
+        build.assert_not_called()
+        # Owned by b, so not stored in this replica's cache.
+        assert route_cache.get(route_cache.make_key(body["origin"], body["destination"], None)) is None
+
+    async def test_peer_endpoint_computes_locally(self, monkeypatch):
+        group = PeerGroup("http://b:8000", PEERS, secret="s3cret")
+        monkeypatch.setattr("app.routes.peer_group", group)
+        body = _payload_owned_by(group, "http://a:8000")
+
+        with patch(
+            "app.routes._build_route_weather", new_callable=AsyncMock, return_value=make_response()
+        ) as build:
+            async with _client() as client:
+                denied = await client.post(PEER_PATH, json=body)
+                resp = await client.post(PEER_PATH, json=body, headers={PEER_SECRET_HEADER: "s3cret"})
+
+        assert denied.status_code == 403
+        assert PEER_ANSWER_HEADER not in denied.headers
+        assert resp.status_code == 200
+        assert resp.headers[PEER_ANSWER_HEADER] == "1"
+        build.assert_awaited_once()
+
+    async def test_peer_endpoint_marks_route_errors(self, monkeypatch):
+        monkeypatch.setattr("app.routes.peer_group", PeerGroup("http://b:8000", PEERS, secret="s3cret"))
+        not_found = HTTPException(status_code=404, detail="No routes found")
+
+        with patch("app.routes._build_route_weather", new_callable=AsyncMock, side_effect=not_found):
+            async with _client() as client:
+                resp = await client.post(
+                    PEER_PATH,
+                    json={"origin": "Nowhere", "destination": "Y"},
+                    headers={PEER_SECRET_HEADER: "s3cret"},
+                )
+
+        assert resp.status_code == 404
+        assert resp.headers[PEER_ANSWER_HEADER] == "1"
+
+    async def test_unauthenticated_public_call_is_rejected_by_default(self, monkeypatch):
+        group = PeerGroup("http://b:8000", PEERS)
+        monkeypatch.setattr("app.routes.peer_group", group)
+        body = _payload_owned_by(group, "http://b:8000")
+
+        with patch("app.routes._build_route_weather", new_callable=AsyncMock) as build:
+            async with _client() as client:
+                resp = await client.post(PEER_PATH, json=body)
+                guessed = await client.post(PEER_PATH, json=body, headers={PEER_SECRET_HEADER: ""})
+
+        assert resp.status_code == 403
+        assert guessed.status_code == 403
+        build.assert_not_called()
+
+    async def test_peer_endpoint_hidden_when_disabled(self, monkeypatch):
+        monkeypatch.setattr("app.routes.peer_group", PeerGroup(None, []))
+        async with _client() as client:
+            resp = await client.post(PEER_PATH, json={"origin": "X", "destination": "Y"})
+        assert resp.status_code == 404
+
+    async def test_concurrent_misses_build_once(self):
+        calls = 0
+
+        async def slow_build(payload, cache_key):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return make_response()
+
+        body = {"origin": "Same Origin", "destination": "Same Destination"}
+        with patch("app.routes._build_route_weather", side_effect=slow_build):
+            async with _client() as client:
+                responses = await asyncio.gather(
+                    *(client.post("/api/route-weather", json=body) for _ in range(3))
+                )
+
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert calls == 1
+
+    async def test_build_is_memory_traced_for_the_leading_request(self, monkeypatch):
+        monkeypatch.setattr("app.main.settings.memory_trace_sample_rate", 1.0)
+        recorder = SlowRequestRecorder(capacity=5, threshold_ms=0, window_seconds=60)
+        monkeypatch.setattr("app.main.slow_requests", recorder)
+        traces = []
+
+        async def build(payload, cache_key):
+            traces.append(timing.current_trace())
+            with timing.stage("directions"):
+                await asyncio.sleep(0.01)
+            return make_response()
+
+        with patch("app.routes._build_route_weather", side_effect=build):
+            async with _client() as client:
+                resp = await client.post(
+                    "/api/route-weather", json={"origin": "Traced", "destination": "Y"}
+                )
+
+        assert resp.status_code == 200
+        assert traces[0].memory is not None
+        # Stage timings are copied back to the request, allocations recorded on its tracer.
+        assert "directions;dur=" in resp.headers["Server-Timing"]
+        [entry] = recorder.snapshot()
+        assert set(entry["memory"]["stages"]) == {"cache_lookup", "directions"}
@@ -0,0 +1,39 @@
+"""Tests for app.profiler — stack sampling profiler."""
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from app.profiler import ProfilerBusyError, _profile_lock, format_collapsed, sample_stacks
+
+
+def _busy_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+class TestSampleStacks:
+    def test_samples_target_thread_only(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_worker, args=(stop,))
+        worker.start()
+        try:
+            stacks, samples = sample_stacks(0.05, 0.005, {worker.ident})
+        finally:
+            stop.set()
+            worker.join()
+
+        assert samples > 0
+        assert stacks
+        assert all("_busy_worker (test_profiler.py:" in stack for stack in stacks)
+
+    def test_rejects_concurrent_profiles(self):
+        with _profile_lock:
+            with pytest.raises(ProfilerBusyError):
+                sample_stacks(0.01, 0.005)
+
+    def test_format_collapsed_orders_by_count(self):
+        text = format_collapsed(Counter({"a;b": 1, "a;c": 3}))
+        assert text == "a;c 3\na;b 1\n"
@@ -7,6 +7,7 @@ import httpx
 import pytest
 from fastapi import HTTPException
 
+from app import deadline
 from app.main import app
 from app.models import (
     LatLng,
@@ -16,6 +17,8 @@ from app.models import (
 )
 from app.rate_limit import SLOWAPI_AVAILABLE, limiter
 from app.services.cache import route_cache
+from app.services.http_client import CircuitOpenError
+from app.services.model_registry import ModelUnavailableError
 
 
 # ---------------------------------------------------------------------------
@@ -129,6 +132,9 @@ class TestRouteWeatherEndpoint:
             data = resp.json()
             assert data["origin_address"] == "San Francisco, CA, USA"
             assert data["destination_address"] == "Los Angeles, CA, USA"
+            server_timing = resp.headers["Server-Timing"]
+            for stage in ("directions", "sampling", "dedup", "weather", "scoring"):
+                assert f"{stage};dur=" in server_timing
 
     @pytest.mark.asyncio
     async def test_response_includes_correct_fields(self):
@@ -199,6 +205,35 @@ class TestRouteWeatherEndpoint:
             # get_routes should only be called once (second time is cached)
             assert mock_routes.call_count == 1
 
+    @pytest.mark.asyncio
+    async def test_degraded_response_is_flagged_and_not_cached(self):
+        async def partial_weather(waypoints):
+            deadline.mark_degraded("weather_partial")
+            return waypoints
+
+        with (
+            patch("app.routes.get_routes", new_callable=AsyncMock) as mock_routes,
+            patch("app.routes.sample_route_points") as mock_sample,
+            patch("app.routes.get_weather_for_waypoints", side_effect=partial_weather),
+            patch("app.routes.score_routes", new_callable=AsyncMock) as mock_score,
+        ):
+            mock_routes.return_value = _sample_route_data()
+            mock_sample.return_value = _sample_waypoints()
+            mock_score.return_value = _sample_recommendation()
+
+            request_body = {"origin": "SF", "destination": "LA"}
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://test",
+            ) as client:
+                resp1 = await client.post("/api/route-weather", json=request_body)
+                resp2 = await client.post("/api/route-weather", json=request_body)
+
+            assert resp1.json()["degraded"] is True
+            assert resp1.json()["degraded_reasons"] == ["weather_partial"]
+            assert resp2.status_code == 200
+            assert mock_routes.call_count == 2
+
     @pytest.mark.asyncio
     async def test_http_exception_propagates(self):
         with patch("app.routes.get_routes", new_callable=AsyncMock) as mock_routes:
@@ -236,6 +271,47 @@ class TestRouteWeatherEndpoint:
             assert resp.status_code == 500
             assert resp.json()["detail"] == "Internal server error"
 
+    @pytest.mark.asyncio
+    async def test_open_circuit_returns_503(self):
+        with patch("app.routes.get_routes", new_callable=AsyncMock) as mock_routes:
+            mock_routes.side_effect = CircuitOpenError("Circuit open for maps.googleapis.com")
+
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://test",
+            ) as client:
+                resp = await client.post(
+                    "/api/route-weather",
+                    json={"origin": "SF", "destination": "LA"},
+                )
+
+            assert resp.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_unavailable_model_returns_503(self):
+        with (
+            patch("app.routes.get_routes", new_callable=AsyncMock) as mock_routes,
+            patch("app.routes.sample_route_points") as mock_sample,
+            patch("app.routes.get_weather_for_waypoints", new_callable=AsyncMock) as mock_weather,
+            patch("app.routes.score_routes", new_callable=AsyncMock) as mock_score,
+        ):
+            mock_routes.return_value = _sample_route_data()
+            mock_sample.return_value = _sample_waypoints()
+            mock_weather.return_value = []
+            mock_score.side_effect = ModelUnavailableError("Could not load route model")
+
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://test",
+            ) as client:
+                resp = await client.post(
+                    "/api/route-weather",
+                    json={"origin": "SF", "destination": "LA"},
+                )
+
+            assert resp.status_code == 503
+            assert resp.json()["detail"] == "Route model unavailable"
+
     @pytest.mark.asyncio
     async def test_naive_departure_time_returns_422(self):
         async with httpx.AsyncClient(
@@ -284,3 +360,30 @@ class TestRouteWeatherEndpoint:
 
             assert 429 in statuses
             assert "Rate limit exceeded" in details
+
+    @pytest.mark.asyncio
+    async def test_advisory_locations_resolves_token(self):
+        with patch(
+            "app.routes.resolve_advisory_locations", new_callable=AsyncMock
+        ) as mock_resolve:
+            mock_resolve.return_value = [[]]
+
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://test",
+            ) as client:
+                resp = await client.post("/api/advisory-locations", json={"token": "abc"})
+
+        assert resp.status_code == 200
+        assert resp.json() == {"advisories": [[]]}
+        mock_resolve.assert_awaited_once_with("abc")
+
+    @pytest.mark.asyncio
+    async def test_advisory_locations_unknown_token_returns_404(self):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as client:
+            resp = await client.post("/api/advisory-locations", json={"token": "missing"})
+
+        assert resp.status_code == 404
@@ -1,13 +1,26 @@
 """Tests for app.services.scoring — feature extraction, advisories, scoring."""
 
-from unittest.mock import AsyncMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
+from app import deadline
+from app.services import scoring
+from app.services.cache import TTLCache
+from app.services.model_registry import LoadedModel
 from app.services.scoring import (
-    _check_advisory_conditions,
+    _advisory_hits,
+    _decode_advisory_token,
+    _encode_advisory_token,
+    _evaluate_advisory_rules,
+    _evaluate_rules_by_column,
+    _evaluate_rules_by_row,
     _generate_reason,
     extract_features,
+    resolve_advisory_locations,
     score_routes,
+    warm_up,
 )
 from tests.conftest import make_route, make_waypoint, make_weather
 
@@ -77,109 +90,148 @@ class TestExtractFeatures:
 
 
 # ---------------------------------------------------------------------------
-# _check_advisory_conditions
+# Advisory rules for a single waypoint
 # ---------------------------------------------------------------------------
 
 
+def _rules_for(wp):
+    return [(r.type, r.severity, r.template) for r, _ in _evaluate_advisory_rules([[wp]])[0]]
+
+
 class TestCheckAdvisoryConditions:
     def test_no_weather_returns_empty(self):
         wp = make_waypoint(weather=None)
-        assert _check_advisory_conditions(wp) == []
+        assert _rules_for(wp) == []
 
     def test_clear_weather_returns_empty(self):
         wp = make_waypoint(weather=make_weather(weather_code=1, precipitation_mm=0, wind_speed_kmh=10))
-        assert _check_advisory_conditions(wp) == []
+        assert _rules_for(wp) == []
 
     def test_heavy_rain_code_65(self):
         wp = make_waypoint(weather=make_weather(weather_code=65))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("heavy_rain", "danger") in types
 
     def test_heavy_rain_code_82(self):
         wp = make_waypoint(weather=make_weather(weather_code=82))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("heavy_rain", "danger") in types
 
     def test_heavy_rain_by_precipitation(self):
         wp = make_waypoint(weather=make_weather(weather_code=0, precipitation_mm=8.0))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("heavy_rain", "danger") in types
 
     def test_moderate_rain_code_63(self):
         wp = make_waypoint(weather=make_weather(weather_code=63))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("moderate_rain", "warning") in types
 
     def test_moderate_rain_code_81(self):
         wp = make_waypoint(weather=make_weather(weather_code=81))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("moderate_rain", "warning") in types
 
     def test_moderate_rain_by_precipitation(self):
         wp = make_waypoint(weather=make_weather(weather_code=0, precipitation_mm=5.0))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("moderate_rain", "warning") in types
 
     def test_freezing_rain(self):
         for code in (56, 57, 66, 67):
             wp = make_waypoint(weather=make_weather(weather_code=code))
-            results = _check_advisory_conditions(wp)
+            results = _rules_for(wp)
             types = [(t, s) for t, s, _ in results]
             assert ("freezing_rain", "danger") in types, f"Failed for code {code}"
 
     def test_heavy_snow(self):
         for code in (73, 75, 86):
             wp = make_waypoint(weather=make_weather(weather_code=code))
-            results = _check_advisory_conditions(wp)
+            results = _rules_for(wp)
             types = [(t, s) for t, s, _ in results]
             assert ("heavy_snow", "danger") in types, f"Failed for code {code}"
 
     def test_snow_warning(self):
         for code in (71, 77, 85):
             wp = make_waypoint(weather=make_weather(weather_code=code))
-            results = _check_advisory_conditions(wp)
+            results = _rules_for(wp)
             types = [(t, s) for t, s, _ in results]
             assert ("snow", "warning") in types, f"Failed for code {code}"
 
     def test_high_wind_danger(self):
         wp = make_waypoint(weather=make_weather(wind_speed_kmh=80.0))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("high_wind", "danger") in types
 
     def test_high_wind_warning(self):
         wp = make_waypoint(weather=make_weather(wind_speed_kmh=60.0))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("high_wind", "warning") in types
 
     def test_thunderstorm(self):
         wp = make_waypoint(weather=make_weather(weather_code=95))
-        results = _check_advisory_conditions(wp)
+        results = _rules_for(wp)
         types = [(t, s) for t, s, _ in results]
         assert ("thunderstorm", "danger") in types
 
     def test_hail(self):
         for code in (96, 99):
             wp = make_waypoint(weather=make_weather(weather_code=code))
-            results = _check_advisory_conditions(wp)
+            results = _rules_for(wp)
             types = [(t, s) for t, s, _ in results]
             assert ("hail", "danger") in types, f"Failed for code {code}"
 
     def test_fog(self):
         for code in (45, 48):
             wp = make_waypoint(weather=make_weather(weather_code=code))
-            results = _check_advisory_conditions(wp)
+            results = _rules_for(wp)
             types = [(t, s) for t, s, _ in results]
             assert ("fog", "warning") in types, f"Failed for code {code}"
 
 
+class TestEvaluateAdvisoryRules:
+    def test_first_triggering_waypoint_per_route(self):
+        calm = make_waypoint(lat=1.0, weather=make_weather())
+        fog_a = make_waypoint(lat=2.0, weather=make_weather(weather_code=45))
+        fog_b = make_waypoint(lat=3.0, weather=make_weather(weather_code=48))
+        results = _evaluate_advisory_rules([[calm, fog_a, fog_b], [fog_b], [calm]])
+
+        assert [(r.type, wp.location.lat) for r, wp in results[0]] == [("fog", 2.0)]
+        assert [(r.type, wp.location.lat) for r, wp in results[1]] == [("fog", 3.0)]
+        assert results[2] == []
+
+    def test_waypoints_without_weather_are_skipped(self):
+        results = _evaluate_advisory_rules([[make_waypoint(weather=None)], []])
+        assert results == [[], []]
+
+    def test_row_and_column_evaluation_agree(self):
+        waypoints = [
+            make_waypoint(weather=make_weather(weather_code=code, precipitation_mm=mm, wind_speed_kmh=wind))
+            for code in (0, 45, 63, 65, 71, 95)
+            for mm in (0.0, 4.0, 7.5)
+            for wind in (10.0, 50.0, 75.0)
+        ]
+        routes = [waypoints[::3], waypoints[1::3], [make_waypoint(weather=None), *waypoints[2::3]], []]
+        assert _evaluate_rules_by_row(routes) == _evaluate_rules_by_column(routes)
+        for wp in waypoints:
+            assert _evaluate_rules_by_row([[wp]]) == _evaluate_rules_by_column([[wp]])
+
+    def test_dispatches_on_waypoint_count(self, monkeypatch):
+        calm = [make_waypoint(weather=make_weather())]
+        monkeypatch.setattr("app.services.scoring._evaluate_rules_by_column", lambda lists: "column")
+        monkeypatch.setattr("app.services.scoring._evaluate_rules_by_row", lambda lists: "row")
+        assert _evaluate_advisory_rules([calm * 10]) == "row"
+        assert _evaluate_advisory_rules([calm * 200]) == "column"
+
+
 # ---------------------------------------------------------------------------
 # _generate_reason
 # ---------------------------------------------------------------------------
@@ -303,3 +355,164 @@ class TestScoreRoutes:
         # The good route should score higher
         assert result.scores[0].overall_score >= result.scores[1].overall_score
         assert result.recommended_route_index == 0
+
+    @pytest.mark.asyncio
+    async def test_overlapping_routes_geocode_once(self):
+        """Advisory locations from all routes are geocoded in a single batch."""
+        w_storm = make_weather(weather_code=95)
+        shared = make_waypoint(lat=36.0, lng=-120.0, weather=w_storm)
+        route_a = make_route(route_index=0, waypoints=[shared])
+        route_b = make_route(
+            route_index=1,
+            waypoints=[make_waypoint(lat=36.0, lng=-120.0, weather=w_storm)],
+        )
+
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            mock_geo.return_value = {(36.0, -120.0): "Coalinga, CA"}
+            result = await score_routes([route_a, route_b])
+
+        assert mock_geo.await_count == 1
+        assert len(result.advisories) == 2
+        for advisories in result.advisories:
+            assert advisories[0].message == "Thunderstorm expected near Coalinga, CA"
+
+    @pytest.mark.asyncio
+    async def test_wind_advisory_message_includes_speed(self):
+        wp = make_waypoint(weather=make_weather(wind_speed_kmh=61.4))
+        route = make_route(route_index=0, waypoints=[wp])
+
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            mock_geo.return_value = {(wp.location.lat, wp.location.lng): "Tejon Pass, CA"}
+            result = await score_routes([route])
+
+        assert result.advisories[0][0].message == "Strong winds (61 km/h) near Tejon Pass, CA"
+
+    @pytest.mark.asyncio
+    async def test_reports_active_model_version(self):
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock):
+            result = await score_routes([make_route(route_index=0)])
+
+        assert result.model_version.startswith("route_model-")
+
+    @pytest.mark.asyncio
+    async def test_warm_up_scores_without_geocoding(self):
+        wp = make_waypoint(weather=make_weather(weather_code=95))
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            assert await warm_up([make_route(route_index=0, waypoints=[wp])]) is None
+
+        mock_geo.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prediction_uses_the_model_whose_version_is_reported(self):
+        registry = scoring.model_registry
+        original = await registry.ensure_loaded()
+        swapped = LoadedModel(
+            model=MagicMock(predict=MagicMock(return_value=np.array([0.0]))),
+            version="route_model-swapped",
+            path=original.path,
+            mtime=original.mtime,
+        )
+
+        async def swap_then_load():
+            loaded = registry._active
+            registry._active = swapped
+            return loaded
+
+        try:
+            with patch.object(registry, "ensure_loaded", side_effect=swap_then_load), \
+                    patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock):
+                result = await score_routes([make_route(route_index=0)])
+        finally:
+            registry._active = original
+
+        assert result.model_version == original.version
+        swapped.model.predict.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_geocoding_skipped_when_budget_is_short(self):
+        wp = make_waypoint(lat=35.1, lng=-117.2, weather=make_weather(weather_code=95))
+        token = deadline.start_budget(0.1)
+        try:
+            with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+                result = await score_routes([make_route(route_index=0, waypoints=[wp])])
+            reasons = deadline.degraded_reasons()
+        finally:
+            deadline.reset_budget(token)
+
+        mock_geo.assert_not_awaited()
+        assert reasons == ["geocoding_skipped"]
+        assert result.advisories[0][0].message.endswith("35.1\u00b0N, 117.2\u00b0W")
+
+
+class TestDeferredAdvisories:
+    @pytest.mark.asyncio
+    async def test_deferred_mode_skips_geocoding(self, monkeypatch):
+        monkeypatch.setattr("app.services.scoring.settings.advisory_location_mode", "deferred")
+        wp = make_waypoint(lat=35.1, lng=-117.2, weather=make_weather(weather_code=95))
+        route = make_route(route_index=0, waypoints=[wp])
+
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            result = await score_routes([route])
+
+        mock_geo.assert_not_awaited()
+        assert result.advisory_token
+        advisory = result.advisories[0][0]
+        assert advisory.message == "Thunderstorm expected near 35.1\u00b0N, 117.2\u00b0W"
+        assert advisory.location.lat == 35.1
+
+    @pytest.mark.asyncio
+    async def test_token_resolves_location_names_once(self, monkeypatch):
+        monkeypatch.setattr("app.services.scoring.settings.advisory_location_mode", "deferred")
+        wp = make_waypoint(lat=35.1, lng=-117.2, weather=make_weather(weather_code=95))
+        result = await score_routes([make_route(route_index=0, waypoints=[wp])])
+
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            mock_geo.return_value = {(35.1, -117.2): "Barstow, CA"}
+            first = await resolve_advisory_locations(result.advisory_token)
+            second = await resolve_advisory_locations(result.advisory_token)
+
+        assert mock_geo.await_count == 1
+        assert first[0][0].message == "Thunderstorm expected near Barstow, CA"
+        assert second == first
+
+    @pytest.mark.asyncio
+    async def test_no_token_without_advisories(self, monkeypatch):
+        monkeypatch.setattr("app.services.scoring.settings.advisory_location_mode", "deferred")
+        result = await score_routes([make_route(route_index=0)])
+        assert result.advisory_token is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_token_returns_none(self):
+        assert await resolve_advisory_locations("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_token_resolves_in_another_process_with_the_shared_secret(self, monkeypatch):
+        monkeypatch.setattr("app.services.scoring.settings.advisory_location_mode", "deferred")
+        monkeypatch.setattr("app.services.scoring.settings.advisory_token_secret", "s3cret")
+        wp = make_waypoint(lat=35.1, lng=-117.2, weather=make_weather(weather_code=95))
+        result = await score_routes([make_route(route_index=0, waypoints=[wp])])
+        # Another worker: no in-process state, only the secret.
+        monkeypatch.setattr("app.services.scoring._process_token_key", b"other process")
+        monkeypatch.setattr("app.services.scoring._resolved_advisories", TTLCache())
+
+        with patch("app.services.scoring._reverse_geocode_batch", new_callable=AsyncMock) as mock_geo:
+            mock_geo.return_value = {(35.1, -117.2): "Barstow, CA"}
+            resolved = await resolve_advisory_locations(result.advisory_token)
+
+        assert resolved[0][0].message == "Thunderstorm expected near Barstow, CA"
+        assert resolved[0][0].location.lat == 35.1
+
+    @pytest.mark.asyncio
+    async def test_forged_or_expired_token_is_rejected(self, monkeypatch):
+        monkeypatch.setattr("app.services.scoring.settings.advisory_token_secret", "s3cret")
+        wp = make_waypoint(lat=35.1, lng=-117.2, weather=make_weather(weather_code=95, wind_speed_kmh=61))
+        hits = _advisory_hits(_evaluate_advisory_rules([[wp]]))
+        token = _encode_advisory_token(hits, time.time() + 60)
+        payload, _, signature = token.partition(".")
+
+        assert _decode_advisory_token(token)[0][0][2] == 61.0
+        assert _decode_advisory_token(f"{payload}x.{signature}") is None
+        assert _decode_advisory_token(payload) is None
+        assert _decode_advisory_token(token, now=time.time() + 120) is None
+        monkeypatch.setattr("app.services.scoring.settings.advisory_token_secret", "other")
+        assert _decode_advisory_token(token) is None
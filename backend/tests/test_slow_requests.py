@@ -0,0 +1,33 @@
+"""Tests for app.slow_requests — slowest-request recorder."""
+
+from unittest.mock import MagicMock, patch
+
+from app.slow_requests import SlowRequestRecorder
+
+
+class TestSlowRequestRecorder:
+    def test_fast_requests_skip_build(self):
+        recorder = SlowRequestRecorder(capacity=3, threshold_ms=100, window_seconds=60)
+        build = MagicMock(return_value={})
+
+        assert recorder.maybe_record(50.0, build) is False
+        build.assert_not_called()
+        assert recorder.snapshot() == []
+
+    def test_keeps_slowest_up_to_capacity(self):
+        recorder = SlowRequestRecorder(capacity=2, threshold_ms=100, window_seconds=60)
+        for duration in (150.0, 400.0, 200.0, 120.0):
+            recorder.maybe_record(duration, lambda d=duration: {"request_id": str(d)})
+
+        assert [e["duration_ms"] for e in recorder.snapshot()] == [400.0, 200.0]
+
+    def test_entries_expire_after_window(self):
+        recorder = SlowRequestRecorder(capacity=2, threshold_ms=100, window_seconds=60)
+        with patch("app.slow_requests.time") as mock_time:
+            mock_time.time.return_value = 1000.0
+            recorder.maybe_record(500.0, dict)
+            mock_time.time.return_value = 1061.0
+            recorder.maybe_record(150.0, dict)
+            snapshot = recorder.snapshot()
+
+        assert [e["duration_ms"] for e in snapshot] == [150.0]
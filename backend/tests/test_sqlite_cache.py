@@ -0,0 +1,203 @@
+"""Tests for app.services.cache.sqlite and .tiered — the host-shared route cache."""
+
+import multiprocessing
+import sqlite3
+import time
+
+from app.services.cache import sqlite as sqlite_module
+from app.services.cache import RouteCacheManager, SQLiteRouteCache, TieredRouteCache, TTLCache
+
+from tests.conftest import make_response
+
+
+def _read_in_child(path: str, key: str, queue) -> None:
+    cache = SQLiteRouteCache(path, compaction_interval_seconds=0)
+    value = cache.get(key)
+    queue.put(value.origin_address if value is not None else None)
+    cache.set(f"{key}-child", make_response("child"))
+    cache.close()
+
+
+class TestSQLiteRouteCache:
+    def test_round_trip(self, tmp_path):
+        cache = SQLiteRouteCache(tmp_path / "cache.db", compaction_interval_seconds=0)
+        cache.set("k", make_response())
+        assert cache.get("k") == make_response()
+        assert cache.get("missing") is None
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache.db"
+        first = SQLiteRouteCache(path, compaction_interval_seconds=0)
+        first.set("k", make_response())
+        first.close()
+
+        second = SQLiteRouteCache(path, compaction_interval_seconds=0)
+        assert second.get("k") == make_response()
+        second.close()
+
+    def test_uses_wal_journal(self, tmp_path):
+        cache = SQLiteRouteCache(tmp_path / "cache.db", compaction_interval_seconds=0)
+        mode = cache._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+        cache.close()
+
+    def test_expired_entries_are_not_served(self, tmp_path):
+        cache = SQLiteRouteCache(tmp_path / "cache.db", ttl=60, compaction_interval_seconds=0)
+        cache.restore("old", make_response(), time.time() + 0.05)
+        cache.restore("gone", make_response(), time.time() - 1)
+        time.sleep(0.1)
+        assert cache.get("old") is None
+        assert cache.get("gone") is None
+        cache.close()
+
+    def test_compaction_drops_expired_and_trims_to_capacity(self, tmp_path):
+        cache = SQLiteRouteCache(tmp_path / "cache.db", max_entries=2, compaction_interval_seconds=0)
+        now = time.time()
+        for key, ttl in [("k1", 100), ("k2", 200), ("k3", 300)]:
+            cache.restore(key, make_response(), now + ttl)
+        cache._write("k0", make_response(), now - 10)
+
+        assert cache.compact(now=now) == 2
+        assert len(cache) == 2
+        assert cache.get("k1") is None
+        assert cache.get("k3") is not None
+        cache.close()
+
+    def test_compaction_deletes_in_batches(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sqlite_module, "COMPACTION_BATCH", 2)
+        cache = SQLiteRouteCache(tmp_path / "cache.db", max_entries=3, compaction_interval_seconds=0)
+        now = time.time()
+        for i in range(5):
+            cache._write(f"old{i}", make_response(), now - 10)
+        for i in range(5):
+            cache.restore(f"new{i}", make_response(), now + 100 + i)
+
+        assert cache.compact(now=now) == 7
+        assert [cache.get(f"new{i}") is not None for i in range(5)] == [False, False, True, True, True]
+        cache.close()
+
+    def test_locked_database_skips_the_write_quickly(self, tmp_path):
+        path = tmp_path / "cache.db"
+        cache = SQLiteRouteCache(path, compaction_interval_seconds=0, busy_timeout_ms=20)
+        cache.set("k", make_response())
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            started = time.perf_counter()
+            cache.set("skipped", make_response())
+            elapsed = time.perf_counter() - started
+            # Readers are not blocked by the writer in WAL mode.
+            assert cache.get("k") == make_response()
+        finally:
+            writer.rollback()
+            writer.close()
+
+        assert elapsed < 1
+        assert cache.get("skipped") is None
+        cache.close()
+
+    def test_only_one_instance_compacts_a_file(self, tmp_path):
+        path = tmp_path / "cache.db"
+        first = SQLiteRouteCache(path, compaction_interval_seconds=0)
+        second = SQLiteRouteCache(path, compaction_interval_seconds=0)
+
+        assert first._acquire_compaction_lock()
+        assert not second._acquire_compaction_lock()
+        first.close()
+        assert second._acquire_compaction_lock()
+        second.close()
+
+    def test_background_compaction(self, tmp_path):
+        cache = SQLiteRouteCache(tmp_path / "cache.db", compaction_interval_seconds=0.02)
+        cache._write("k", make_response(), time.time() - 1)
+        deadline = time.time() + 2
+        while len(cache) and time.time() < deadline:
+            time.sleep(0.02)
+        assert len(cache) == 0
+        cache.close()
+
+    def test_shared_between_processes(self, tmp_path):
+        path = tmp_path / "cache.db"
+        cache = SQLiteRouteCache(path, compaction_interval_seconds=0)
+        cache.set("k", make_response("parent"))
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        child = ctx.Process(target=_read_in_child, args=(str(path), "k", queue))
+        child.start()
+        child.join(timeout=30)
+
+        assert child.exitcode == 0
+        assert queue.get(timeout=1) == "parent"
+        assert cache.get("k-child").origin_address == "child"
+        cache.close()
+
+
+class TestSQLiteBackendSelection:
+    def test_manager_builds_sqlite_backend(self, monkeypatch, tmp_path):
+        monkeypatch.setattr("app.services.cache.settings.cache_backend", "sqlite")
+        monkeypatch.setattr("app.services.cache.settings.cache_sqlite_path", str(tmp_path / "c.db"))
+        manager = RouteCacheManager()
+        manager.configure()
+        assert manager.backend_name == "TieredRouteCache"
+        assert isinstance(manager.backend.shared, SQLiteRouteCache)
+        manager.close()
+
+    def test_local_tier_can_be_disabled(self, monkeypatch, tmp_path):
+        monkeypatch.setattr("app.services.cache.settings.cache_backend", "sqlite")
+        monkeypatch.setattr("app.services.cache.settings.cache_sqlite_path", str(tmp_path / "c.db"))
+        monkeypatch.setattr("app.services.cache.settings.cache_local_entries", 0)
+        manager = RouteCacheManager()
+        manager.configure()
+        assert manager.backend_name == "SQLiteRouteCache"
+        manager.close()
+
+    def test_memory_cache_is_shared_with_several_workers(self, monkeypatch, tmp_path):
+        monkeypatch.setattr("app.services.cache.settings.cache_backend", "memory")
+        monkeypatch.setattr("app.services.cache.settings.web_concurrency", 4)
+        monkeypatch.setattr("app.services.cache.settings.cache_sqlite_path", str(tmp_path / "c.db"))
+        manager = RouteCacheManager()
+        manager.configure()
+        assert manager.backend_name == "TieredRouteCache"
+        manager.close()
+
+    def test_unopenable_path_falls_back_to_memory(self, monkeypatch, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        monkeypatch.setattr("app.services.cache.settings.cache_backend", "sqlite")
+        monkeypatch.setattr("app.services.cache.settings.cache_sqlite_path", str(blocker / "c.db"))
+        manager = RouteCacheManager()
+        manager.configure()
+        assert manager.backend_name == "TTLCache"
+
+
+class TestTieredRouteCache:
+    def test_shared_hit_fills_local_tier(self, tmp_path):
+        shared = SQLiteRouteCache(tmp_path / "cache.db", compaction_interval_seconds=0)
+        shared.set("k", make_response())
+        local = TTLCache(ttl=60)
+        cache = TieredRouteCache(local, shared)
+
+        assert cache.get("k") == make_response()
+        assert local.get("k") == make_response()
+        shared.close()
+
+    def test_writes_reach_other_workers_through_shared_tier(self, tmp_path):
+        path = tmp_path / "cache.db"
+        worker_a = TieredRouteCache(TTLCache(ttl=60), SQLiteRouteCache(path, compaction_interval_seconds=0))
+        worker_b = TieredRouteCache(TTLCache(ttl=60), SQLiteRouteCache(path, compaction_interval_seconds=0))
+
+        worker_a.set("k", make_response("from a"))
+        assert worker_b.get("k").origin_address == "from a"
+        worker_a.close()
+        worker_b.close()
+
+    def test_restore_and_entries_go_to_shared_tier(self, tmp_path):
+        shared = SQLiteRouteCache(tmp_path / "cache.db", compaction_interval_seconds=0)
+        cache = TieredRouteCache(TTLCache(ttl=60), shared)
+        cache.restore("k", make_response(), time.time() + 60)
+
+        assert shared.get("k") == make_response()
+        assert cache.entries() == []
+        cache.close()
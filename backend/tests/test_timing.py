@@ -0,0 +1,39 @@
+"""Tests for app.timing — per-request stage timings."""
+
+from app import timing
+
+
+class TestRequestTrace:
+    def test_stage_records_into_current_trace(self):
+        token = timing.start_trace()
+        try:
+            with timing.stage("sampling"):
+                pass
+            with timing.stage("sampling"):
+                pass
+            trace = timing.current_trace()
+        finally:
+            timing.reset_trace(token)
+
+        assert list(trace.stages) == ["sampling"]
+        assert trace.server_timing().startswith("sampling;dur=")
+
+    def test_counters_and_upstream_calls(self):
+        token = timing.start_trace()
+        try:
+            timing.incr("dedup_saved", 4)
+            timing.record_upstream("api.open-meteo.com", 0.0123, "200")
+            trace = timing.current_trace()
+        finally:
+            timing.reset_trace(token)
+
+        assert trace.counters == {"dedup_saved": 4, "upstream_calls": 1}
+        assert trace.upstream_calls == [
+            {"host": "api.open-meteo.com", "duration_ms": 12.3, "outcome": "200"}
+        ]
+
+    def test_helpers_are_noops_without_trace(self):
+        with timing.stage("sampling"):
+            timing.incr("waypoints")
+            timing.record_upstream("host", 0.1, "200")
+        assert timing.current_trace() is None
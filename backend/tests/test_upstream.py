@@ -0,0 +1,122 @@
+"""Tests for app.services.upstream — shared upstream client pool."""
+
+from unittest.mock import AsyncMock, patch
+
+import httpcore
+import httpx
+import pytest
+
+from app.services.upstream import (
+    CachingDNSBackend,
+    UpstreamClients,
+    UpstreamConfig,
+    environment_proxies,
+)
+
+CONFIGS = {
+    "google": UpstreamConfig(
+        timeout=5.0, max_connections=4, max_keepalive_connections=2, keepalive_expiry=10.0
+    ),
+}
+PROXY_VARS = ("http_proxy", "https_proxy", "all_proxy", "no_proxy")
+
+
+@pytest.fixture
+def proxy_env(monkeypatch):
+    """A clean proxy environment; tests set the variables they need."""
+    for var in PROXY_VARS:
+        monkeypatch.delenv(var, raising=False)
+        monkeypatch.delenv(var.upper(), raising=False)
+    return monkeypatch
+
+
+class TestUpstreamClients:
+    @pytest.mark.asyncio
+    async def test_reuses_client_per_upstream(self):
+        clients = UpstreamClients(CONFIGS, http2=False, dns_ttl=0)
+        assert clients.get("google") is clients.get("google")
+        assert clients.get("google").timeout.connect == 5.0
+        await clients.aclose()
+
+    @pytest.mark.asyncio
+    async def test_recreates_client_after_close(self):
+        clients = UpstreamClients(CONFIGS, http2=False, dns_ttl=0)
+        first = clients.get("google")
+        await clients.aclose()
+
+        assert first.is_closed
+        assert clients.get("google") is not first
+        await clients.aclose()
+
+    @pytest.mark.asyncio
+    async def test_pool_stats_and_collector(self):
+        clients = UpstreamClients(CONFIGS, http2=False, dns_ttl=0)
+        clients.start()
+
+        assert clients.pool_stats() == {"google": {"active": 0, "idle": 0}}
+        family = next(clients.collect())
+        assert {s.labels["state"] for s in family.samples} == {"active", "idle"}
+        await clients.aclose()
+
+    @pytest.mark.asyncio
+    async def test_environment_proxies_are_mounted(self, proxy_env):
+        proxy_env.setenv("HTTPS_PROXY", "http://proxy.internal:3128")
+        proxy_env.setenv("NO_PROXY", "localhost,.corp.example,10.0.0.5")
+        clients = UpstreamClients(CONFIGS, http2=False, dns_ttl=60)
+        client = clients.get("google")
+
+        proxied = client._transport_for_url(httpx.URL("https://maps.googleapis.com/"))
+        direct = client._transport_for_url(httpx.URL("https://api.corp.example/"))
+
+        assert isinstance(proxied._pool, httpcore.AsyncHTTPProxy)
+        assert isinstance(proxied._pool._network_backend, CachingDNSBackend)
+        assert not isinstance(direct._pool, httpcore.AsyncHTTPProxy)
+        assert clients.pool_stats() == {"google": {"active": 0, "idle": 0}}
+        await clients.aclose()
+
+
+def test_environment_proxies(proxy_env):
+    proxy_env.setenv("HTTPS_PROXY", "proxy.internal:3128")
+    proxy_env.setenv("NO_PROXY", "localhost,.corp.example,10.0.0.5,::1")
+
+    assert environment_proxies() == {
+        "https://": "http://proxy.internal:3128",
+        "all://*localhost": None,
+        "all://*corp.example": None,
+        "all://10.0.0.5": None,
+        "all://[::1]": None,
+    }
+
+    proxy_env.setenv("NO_PROXY", "*")
+    assert environment_proxies() == {}
+
+
+class TestCachingDNSBackend:
+    @pytest.mark.asyncio
+    async def test_resolves_once_within_ttl(self):
+        inner = AsyncMock(spec=httpcore.AsyncNetworkBackend)
+        backend = CachingDNSBackend(inner, ttl=60)
+        infos = [(None, None, None, "", ("10.0.0.1", 443))]
+
+        with patch("asyncio.BaseEventLoop.getaddrinfo", new_callable=AsyncMock) as lookup:
+            lookup.return_value = infos
+            await backend.connect_tcp("api.example.com", 443)
+            await backend.connect_tcp("api.example.com", 443)
+
+        assert lookup.await_count == 1
+        assert inner.connect_tcp.await_args.args[:2] == ("10.0.0.1", 443)
+
+    @pytest.mark.asyncio
+    async def test_failed_connect_evicts_cached_address(self):
+        inner = AsyncMock(spec=httpcore.AsyncNetworkBackend)
+        inner.connect_tcp.side_effect = httpcore.ConnectError("refused")
+        backend = CachingDNSBackend(inner, ttl=60)
+        infos = [(None, None, None, "", ("10.0.0.1", 443))]
+
+        with patch("asyncio.BaseEventLoop.getaddrinfo", new_callable=AsyncMock) as lookup:
+            lookup.return_value = infos
+            for _ in range(2):
+                with pytest.raises(httpcore.ConnectError):
+                    await backend.connect_tcp("api.example.com", 443)
+
+        assert lookup.await_count == 2
@@ -0,0 +1,124 @@
+"""Tests for app.warmup and app.readiness — startup warm-up reporting."""
+
+import json
+import time
+
+import httpx
+import pytest
+import respx
+
+from app import warmup
+from app.readiness import Readiness
+from app.services.cache import CacheSnapshotter, RouteCacheManager
+
+from tests.conftest import make_response
+
+
+async def _ok():
+    return None
+
+
+async def _boom():
+    raise RuntimeError("no model")
+
+
+async def _unreachable():
+    raise RuntimeError("no upstream reachable")
+
+
+class TestWarmUp:
+    async def test_reports_steps_and_becomes_ready(self, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_STEPS", [("model", _ok), ("connections", _ok)])
+        readiness = Readiness()
+
+        await warmup.warm_up(readiness)
+
+        state = readiness.snapshot()
+        assert readiness.ready
+        assert state["status"] == "ready"
+        assert [s["status"] for s in state["steps"].values()] == ["done", "done"]
+
+    async def test_failed_optional_step_is_recorded_without_blocking_readiness(self, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_STEPS", [("connections", _unreachable), ("model", _ok)])
+        readiness = Readiness()
+
+        await warmup.warm_up(readiness)
+
+        steps = readiness.snapshot()["steps"]
+        assert readiness.ready
+        assert steps["connections"]["status"] == "failed"
+        assert steps["connections"]["detail"] == "no upstream reachable"
+        assert steps["model"]["status"] == "done"
+
+    async def test_failed_model_step_blocks_readiness(self, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_STEPS", [("model", _boom), ("connections", _ok)])
+        readiness = Readiness()
+
+        await warmup.warm_up(readiness)
+
+        state = readiness.snapshot()
+        assert not readiness.ready
+        assert state["status"] == "failed"
+        assert state["steps"]["model"]["status"] == "failed"
+        assert state["steps"]["model"]["detail"] == "no model"
+        assert state["steps"]["connections"]["status"] == "done"
+
+    def test_snapshot_before_warm_up(self):
+        readiness = Readiness()
+        readiness.begin("model")
+        state = readiness.snapshot()
+        assert state["status"] == "starting"
+        assert state["steps"] == {"model": {"status": "running"}}
+
+
+class TestWarmUpSteps:
+    async def test_pipeline_runs_the_cpu_stages(self, monkeypatch):
+        monkeypatch.setattr("app.warmup.settings.warmup_pipeline", True)
+        assert await warmup._run_pipeline() is None
+
+    async def test_pipeline_can_be_disabled(self, monkeypatch):
+        monkeypatch.setattr("app.warmup.settings.warmup_pipeline", False)
+        with pytest.raises(warmup.StepSkipped):
+            await warmup._run_pipeline()
+
+    @respx.mock
+    async def test_connections_report_each_upstream(self, monkeypatch):
+        monkeypatch.setattr("app.warmup.settings.warmup_upstream_connections", True)
+        respx.get("https://maps.googleapis.com").mock(return_value=httpx.Response(404))
+        respx.get("https://api.open-meteo.com").mock(side_effect=httpx.ConnectError("down"))
+
+        detail = await warmup._open_connections()
+
+        assert detail == "google=404, open_meteo=ConnectError"
+
+    @respx.mock
+    async def test_connections_fail_when_nothing_is_reachable(self, monkeypatch):
+        monkeypatch.setattr("app.warmup.settings.warmup_upstream_connections", True)
+        respx.get(url__regex=r".*").mock(side_effect=httpx.ConnectError("down"))
+
+        with pytest.raises(RuntimeError, match="no upstream reachable"):
+            await warmup._open_connections()
+
+    async def test_preloads_most_hit_snapshot_entries(self, monkeypatch, tmp_path):
+        response = make_response()
+        now = time.time()
+        lines = [
+            {"key": "popular", "hits": 9, "expires_at": now + 600, "value": response.model_dump(mode="json")},
+            {"key": "rare", "hits": 1, "expires_at": now + 600, "value": response.model_dump(mode="json")},
+            {"key": "stale", "hits": 50, "expires_at": now - 1, "value": response.model_dump(mode="json")},
+        ]
+        snapshot = tmp_path / "routes.jsonl"
+        snapshot.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+        cache = RouteCacheManager()
+        monkeypatch.setattr("app.warmup.cache_snapshots", CacheSnapshotter(cache, snapshot, 0))
+        monkeypatch.setattr("app.warmup.settings.warmup_cache_keys", 1)
+
+        assert await warmup._preload_cache() == "1 entries"
+        assert cache.get("popular") == response
+        assert cache.get("rare") is None
+        assert cache.get("stale") is None
+
+    async def test_cache_preload_skipped_without_snapshot(self, monkeypatch):
+        monkeypatch.setattr("app.warmup.cache_snapshots", CacheSnapshotter(RouteCacheManager(), None, 0))
+        with pytest.raises(warmup.StepSkipped):
+            await warmup._preload_cache()
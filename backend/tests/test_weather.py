@@ -1,11 +1,13 @@
 """Tests for app.services.weather — Open-Meteo API client."""
 
+import asyncio
 from datetime import datetime, timezone
 
 import httpx
 import pytest
 import respx
 
+from app import deadline
 from app.models import LatLng, Waypoint
 from app.services.weather import (
     HOURLY_PARAMS,
@@ -211,3 +213,43 @@ class TestGetWeatherForWaypoints:
         assert wp2.weather is None
         assert wp3.weather is not None
         assert wp3.weather.temperature_c == 20.0
+
+
+class TestWeatherDeadline:
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_pending_points_left_empty_when_budget_runs_out(self, monkeypatch):
+        monkeypatch.setattr("app.services.weather.SCORING_RESERVE_SECONDS", 0.0)
+
+        async def responder(request: httpx.Request) -> httpx.Response:
+            if request.url.params.get("latitude") == "34.05":
+                await asyncio.sleep(5)
+            return httpx.Response(200, json=_hourly_response())
+
+        respx.get(OPEN_METEO_URL).mock(side_effect=responder)
+        fast = _make_wp(lat=37.77, lng=-122.42)
+        slow = _make_wp(lat=34.05, lng=-118.24)
+
+        token = deadline.start_budget(0.2)
+        try:
+            await get_weather_for_waypoints([fast, slow])
+            reasons = deadline.degraded_reasons()
+        finally:
+            deadline.reset_budget(token)
+
+        assert fast.weather is not None
+        assert slow.weather is None
+        assert reasons == ["weather_partial"]
+
+    @pytest.mark.asyncio
+    async def test_skips_weather_when_budget_already_spent(self):
+        wp = _make_wp()
+        token = deadline.start_budget(0.5)  # less than the scoring reserve
+        try:
+            await get_weather_for_waypoints([wp])
+            reasons = deadline.degraded_reasons()
+        finally:
+            deadline.reset_budget(token)
+
+        assert wp.weather is None
+        assert reasons == ["weather_skipped"]
@@ -36,6 +36,7 @@ export interface WeatherAdvisory {
   type: string;
   severity: AdvisorySeverity;
   message: string;
+  location?: LatLng | null;
 }
 
 export interface RouteScore {
@@ -49,6 +50,7 @@ export interface RouteRecommendation {
   recommended_route_index: number;
   scores: RouteScore[];
   advisories: WeatherAdvisory[][];
+  advisory_token?: string | null;
 }
 
 export interface MultiRouteResponse {
@@ -56,4 +58,6 @@ export interface MultiRouteResponse {
   destination_address: string;
   routes: RouteWithWeather[];
   recommendation?: RouteRecommendation;
+  degraded?: boolean;
+  degraded_reasons?: string[];
 }